@@ -0,0 +1,30 @@
+import os
+from typing import Dict, Any
+
+# Configuration des instantanés du dashboard analytics et de la rétention des événements
+ANALYTICS_CONFIG = {
+    # Périodes (en jours) pré-calculées en arrière-plan
+    "periods": [int(days) for days in os.getenv("ANALYTICS_PERIODS", "7,30,90").split(",") if days.strip()],
+    # Intervalle entre deux recalculs (secondes)
+    "refresh_interval_seconds": int(os.getenv("ANALYTICS_REFRESH_INTERVAL", "300")),
+    # Âge (secondes) au-delà duquel un instantané est signalé comme périmé
+    "stale_after_seconds": int(os.getenv("ANALYTICS_STALE_AFTER", "900")),
+    # Rétention de analytics_events (mois complets conservés en base)
+    "events_retention_months": int(os.getenv("ANALYTICS_EVENTS_RETENTION_MONTHS", "12")),
+    # Partitions mensuelles créées à l'avance
+    "future_partitions": int(os.getenv("ANALYTICS_FUTURE_PARTITIONS", "3")),
+    # Dossier des archives des partitions supprimées
+    "archive_dir": os.getenv("ANALYTICS_ARCHIVE_DIR", "archives"),
+    # Intervalle d'écriture des questions non répondues comptées en mémoire (secondes)
+    "unanswered_flush_interval_seconds": int(os.getenv("UNANSWERED_FLUSH_INTERVAL", "60")),
+    # Nombre de questions distinctes en attente déclenchant une écriture anticipée
+    "unanswered_max_pending": int(os.getenv("UNANSWERED_MAX_PENDING", "500")),
+    # Similarité cosinus minimale pour regrouper deux questions non répondues
+    "question_cluster_threshold": float(os.getenv("QUESTION_CLUSTER_THRESHOLD", "0.82")),
+    # Nombre de questions vectorisées par appel à Ollama
+    "question_embedding_batch_size": int(os.getenv("QUESTION_EMBEDDING_BATCH_SIZE", "64")),
+}
+
+def get_analytics_config() -> Dict[str, Any]:
+    """Retourne la configuration des instantanés analytics"""
+    return ANALYTICS_CONFIG
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Partitionnement mensuel, archivage et rétention de la table analytics_events
+
+analytics_events est partitionnée par mois (RANGE sur UNIX_TIMESTAMP(timestamp)).
+Les partitions expirées sont archivées en CSV compressé, puis sorties de la table par
+EXCHANGE PARTITION et supprimées : aucune suppression ligne à ligne.
+
+Usage:
+    python analytics_retention.py migrate [--batch-size 10000] [--drop-old]
+    python analytics_retention.py maintain [--dry-run]
+    python analytics_retention.py archive
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+from datetime import date
+from typing import List, Optional
+
+from mysql.connector import Error
+
+from analytics_config import get_analytics_config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EVENTS_TABLE = "analytics_events"
+PARTITION_PATTERN = re.compile(r"^p(\d{4})(\d{2})$")
+
+# Le timestamp fait partie de la clé primaire : MySQL l'exige pour partitionner sur cette colonne,
+# et une table partitionnée ne peut pas porter de clé étrangère.
+EVENTS_COLUMNS = """
+    id INT AUTO_INCREMENT,
+    session_id VARCHAR(255) NOT NULL,
+    event_type ENUM('question_asked', 'question_answered', 'abandonment', 'completion', 'qualification') NOT NULL,
+    event_data JSON,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, timestamp),
+    INDEX (session_id),
+    INDEX (event_type),
+    INDEX (timestamp)
+"""
+COPY_COLUMNS = "id, session_id, event_type, event_data"
+
+
+# ===== PARTITIONS MENSUELLES =====
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+def partition_month(name: str) -> Optional[date]:
+    """Retourne le mois d'une partition pAAAAMM (None pour pmax)"""
+    match = PARTITION_PATTERN.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+def partition_definition(month: date) -> str:
+    upper = add_months(month, 1)
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN (UNIX_TIMESTAMP('{upper:%Y-%m-%d} 00:00:00'))"
+
+def partitions_clause(first_month: date, last_month: date) -> str:
+    """Clause de partitionnement d'un mois à l'autre (inclus), plus la partition pmax"""
+    definitions = []
+    month = month_start(first_month)
+    while month <= last_month:
+        definitions.append(partition_definition(month))
+        month = add_months(month, 1)
+    definitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return "PARTITION BY RANGE (UNIX_TIMESTAMP(timestamp)) (\n    " + ",\n    ".join(definitions) + "\n)"
+
+def events_table_ddl(table: str = EVENTS_TABLE, first_month: Optional[date] = None) -> str:
+    """CREATE TABLE de analytics_events partitionnée, du premier mois aux partitions futures"""
+    current = month_start(date.today())
+    last_month = add_months(current, get_analytics_config()["future_partitions"])
+    return (f"CREATE TABLE IF NOT EXISTS {table} ({EVENTS_COLUMNS})\n"
+            f"{partitions_clause(first_month or current, last_month)}")
+
+
+class AnalyticsRetention:
+    """Opérations de partitionnement et de rétention sur une connexion DatabaseService ouverte"""
+
+    def __init__(self, db):
+        self.db = db
+        self.config = get_analytics_config()
+
+    def _execute(self, query: str, params=None, fetch: bool = False):
+        cursor = self.db.connection.cursor(buffered=True)
+        try:
+            cursor.execute(query, params or ())
+            rows = cursor.fetchall() if fetch else None
+            self.db.connection.commit()
+            return rows
+        finally:
+            cursor.close()
+
+    def list_partitions(self, table: str = EVENTS_TABLE) -> List[str]:
+        """Liste les partitions de la table (vide si elle n'est pas partitionnée)"""
+        rows = self._execute("""
+            SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """, (table,), fetch=True)
+        return [row[0] for row in rows]
+
+    def is_partitioned(self) -> bool:
+        return bool(self.list_partitions())
+
+    # ----- Migration -----
+
+    def migrate(self, batch_size: int = 10000, drop_old: bool = False) -> int:
+        """
+        Convertit une table analytics_events existante (créée sans partitions) en table partitionnée
+
+        Les lignes sont copiées par lots dans une nouvelle table. Les deux tables sont ensuite
+        verrouillées le temps de copier les derniers événements (MAX(id) exact) et de les
+        échanger par RENAME TABLE (MySQL >= 8.0.13) : les écritures ne sont bloquées que pendant
+        ce rattrapage.
+
+        Returns:
+            int: Nombre de lignes copiées
+        """
+        if self.is_partitioned():
+            logger.info(f"{EVENTS_TABLE} est déjà partitionnée")
+            return 0
+
+        new_table = f"{EVENTS_TABLE}_partitioned"
+        old_table = f"{EVENTS_TABLE}_old"
+        min_timestamp, max_id = self._execute(f"SELECT MIN(timestamp), MAX(id) FROM {EVENTS_TABLE}", fetch=True)[0]
+        first_month = month_start(min_timestamp.date()) if min_timestamp else None
+
+        self._execute(f"DROP TABLE IF EXISTS {new_table}")
+        self._execute(events_table_ddl(new_table, first_month))
+
+        copy_query = (f"INSERT IGNORE INTO {new_table} ({COPY_COLUMNS}, timestamp) "
+                      f"SELECT {COPY_COLUMNS}, COALESCE(timestamp, CURRENT_TIMESTAMP) FROM {EVENTS_TABLE} "
+                      f"WHERE id > %s AND id <= %s")
+
+        def copy_range(lower: int, upper: int) -> int:
+            self._execute(copy_query, (lower, upper))
+            return self._execute(f"SELECT COUNT(*) FROM {new_table} WHERE id > %s AND id <= %s",
+                                 (lower, upper), fetch=True)[0][0]
+
+        copied = 0
+        last_id = 0
+        # Deux passes sans verrou : la seconde copie les événements insérés pendant la première
+        for _ in range(2):
+            while max_id and last_id < max_id:
+                upper = min(last_id + batch_size, max_id)
+                copied += copy_range(last_id, upper)
+                last_id = upper
+                logger.info(f"Migration de {EVENTS_TABLE}: {copied} lignes copiées")
+            max_id = self._execute(f"SELECT MAX(id) FROM {EVENTS_TABLE}", fetch=True)[0][0]
+
+        # Rattrapage sous verrou : aucun événement ne peut être inséré entre le MAX(id) et l'échange
+        self._execute(f"LOCK TABLES {EVENTS_TABLE} WRITE, {new_table} WRITE")
+        try:
+            final_id = self._execute(f"SELECT MAX(id) FROM {EVENTS_TABLE}", fetch=True)[0][0] or 0
+            if final_id > last_id:
+                copied += copy_range(last_id, final_id)
+            self._execute(f"ALTER TABLE {new_table} AUTO_INCREMENT = {int(final_id) + 1}")
+            self._execute(f"RENAME TABLE {EVENTS_TABLE} TO {old_table}, {new_table} TO {EVENTS_TABLE}")
+        finally:
+            self._execute("UNLOCK TABLES")
+        logger.info(f"{EVENTS_TABLE} partitionnée ({copied} lignes copiées)")
+
+        if drop_old:
+            self._execute(f"DROP TABLE {old_table}")
+        else:
+            logger.info(f"L'ancienne table est conservée sous le nom {old_table}")
+        return copied
+
+    # ----- Maintenance -----
+
+    def ensure_future_partitions(self, dry_run: bool = False) -> List[str]:
+        """Crée les partitions mensuelles à venir en découpant pmax"""
+        months = [partition_month(name) for name in self.list_partitions()]
+        months = [month for month in months if month]
+        target = add_months(month_start(date.today()), self.config["future_partitions"])
+        month = add_months(max(months), 1) if months else month_start(date.today())
+
+        missing = []
+        while month <= target:
+            missing.append(month)
+            month = add_months(month, 1)
+        if missing and not dry_run:
+            definitions = [partition_definition(month) for month in missing]
+            definitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+            self._execute(f"ALTER TABLE {EVENTS_TABLE} REORGANIZE PARTITION pmax INTO ({', '.join(definitions)})")
+        return [partition_name(month) for month in missing]
+
+    def expired_partitions(self) -> List[str]:
+        """Partitions entièrement antérieures à la période de rétention"""
+        cutoff = add_months(month_start(date.today()), -self.config["events_retention_months"])
+        return [name for name in self.list_partitions()
+                if partition_month(name) and partition_month(name) < cutoff]
+
+    def closed_partitions(self) -> List[str]:
+        """Partitions des mois terminés"""
+        current = month_start(date.today())
+        return [name for name in self.list_partitions()
+                if partition_month(name) and partition_month(name) < current]
+
+    def archive_path(self, name: str) -> str:
+        return os.path.join(self.config["archive_dir"], f"{EVENTS_TABLE}_{name}.csv.gz")
+
+    def archive_partition(self, name: str, chunk_size: int = 5000) -> int:
+        """
+        Archive une partition en CSV compressé et vérifie le nombre de lignes écrites
+
+        Returns:
+            int: Nombre de lignes archivées
+        """
+        from export_analytics import CsvGzipWriter
+
+        os.makedirs(self.config["archive_dir"], exist_ok=True)
+        path = self.archive_path(name)
+        partial_path = path + ".partial"
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+        writer = CsvGzipWriter(partial_path)
+        archived = 0
+        try:
+            for columns, rows in self.db.stream_table_rows(EVENTS_TABLE, partition=name, chunk_size=chunk_size):
+                writer.write(columns, rows)
+                archived += len(rows)
+        finally:
+            writer.close()
+
+        expected = self._execute(f"SELECT COUNT(*) FROM {EVENTS_TABLE} PARTITION ({name})", fetch=True)[0][0]
+        if archived != expected:
+            raise RuntimeError(f"Archive incomplète pour {name}: {archived} lignes écrites sur {expected}")
+        os.replace(partial_path, path)
+        return archived
+
+    def drop_partition(self, name: str):
+        """Sort la partition de la table par EXCHANGE PARTITION puis la supprime"""
+        if not partition_month(name):
+            raise ValueError(f"Partition invalide: {name}")
+        staging = f"{EVENTS_TABLE}_{name}_swap"
+        self._execute(f"DROP TABLE IF EXISTS {staging}")
+        self._execute(f"CREATE TABLE {staging} LIKE {EVENTS_TABLE}")
+        self._execute(f"ALTER TABLE {staging} REMOVE PARTITIONING")
+        self._execute(f"ALTER TABLE {EVENTS_TABLE} EXCHANGE PARTITION {name} WITH TABLE {staging}")
+        self._execute(f"ALTER TABLE {EVENTS_TABLE} DROP PARTITION {name}")
+        self._execute(f"DROP TABLE {staging}")
+
+    def apply_retention(self, dry_run: bool = False) -> List[str]:
+        """Archive puis supprime les partitions expirées"""
+        expired = self.expired_partitions()
+        if dry_run:
+            return expired
+        for name in expired:
+            archived = self.archive_partition(name)
+            self.drop_partition(name)
+            logger.info(f"Partition {name} archivée ({archived} lignes) et supprimée")
+        return expired
+
+
+def _get_retention():
+    from database_service import get_database_service
+
+    db = get_database_service()
+    if not db.connect():
+        print("❌ Impossible de se connecter à la base de données")
+        sys.exit(1)
+    return db, AnalyticsRetention(db)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Partitionnement et rétention de analytics_events.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate", help="Convertir la table existante en table partitionnée.")
+    migrate.add_argument("--batch-size", type=int, default=10000, help="Nombre d'ids copiés par lot.")
+    migrate.add_argument("--drop-old", action="store_true", help="Supprimer l'ancienne table après l'échange.")
+
+    maintain = subparsers.add_parser("maintain", help="Créer les partitions futures et appliquer la rétention.")
+    maintain.add_argument("--dry-run", action="store_true", help="Afficher les opérations sans les exécuter.")
+
+    subparsers.add_parser("archive", help="Archiver les partitions des mois terminés (sans suppression).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    db, retention = _get_retention()
+    try:
+        if args.command == "migrate":
+            copied = retention.migrate(batch_size=args.batch_size, drop_old=args.drop_old)
+            print(f"✅ Migration terminée ({copied} lignes copiées)")
+        elif args.command == "maintain":
+            if not retention.is_partitioned():
+                print(f"❌ {EVENTS_TABLE} n'est pas partitionnée : lancez d'abord 'migrate'")
+                sys.exit(1)
+            added = retention.ensure_future_partitions(dry_run=args.dry_run)
+            dropped = retention.apply_retention(dry_run=args.dry_run)
+            prefix = "🔎 (simulation) " if args.dry_run else "✅ "
+            print(f"{prefix}Partitions créées: {', '.join(added) or 'aucune'}")
+            print(f"{prefix}Partitions archivées et supprimées: {', '.join(dropped) or 'aucune'}")
+        elif args.command == "archive":
+            for name in retention.closed_partitions():
+                if os.path.exists(retention.archive_path(name)):
+                    continue
+                archived = retention.archive_partition(name)
+                print(f"📦 {name}: {archived} lignes archivées dans {retention.archive_path(name)}")
+            print("✅ Archivage terminé")
+    except (Error, RuntimeError, ValueError) as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import threading
+import time
+import logging
+from typing import Dict, Any, List, Optional
+
+from analytics_config import get_analytics_config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsSnapshotService:
+    """
+    Calcule en arrière-plan les métriques analytics de chaque période (7/30/90 jours)
+    et les sert depuis un cache en mémoire : l'affichage du dashboard ne coûte aucune requête.
+    """
+
+    def __init__(self, periods: Optional[List[int]] = None, refresh_interval: Optional[int] = None):
+        config = get_analytics_config()
+        self.periods = periods or config["periods"]
+        self.refresh_interval = refresh_interval or config["refresh_interval_seconds"]
+        self.stale_after = config["stale_after_seconds"]
+        self._lock = threading.Lock()
+        self._snapshots: Dict[int, Dict[str, Any]] = {}
+        self._last_error = None
+        self._wake_event = threading.Event()
+        self._refreshed_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Démarre le thread de recalcul périodique"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="analytics-snapshots", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Arrête le thread de recalcul"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def refresh_now(self, wait: bool = True, timeout: float = 30) -> bool:
+        """Demande un recalcul immédiat (et attend sa fin si wait=True)"""
+        self._refreshed_event.clear()
+        self._wake_event.set()
+        if wait:
+            return self._refreshed_event.wait(timeout)
+        return True
+
+    def refresh(self) -> bool:
+        """Recalcule les métriques de toutes les périodes avec une seule connexion"""
+        from database_service import get_database_service
+
+        db = get_database_service()
+        if not db.connect():
+            with self._lock:
+                self._last_error = "Impossible de se connecter à la base de données"
+            return False
+
+        try:
+            for days in self.periods:
+                started = time.time()
+                metrics = db.get_analytics_metrics(days)
+                with self._lock:
+                    if metrics:
+                        self._snapshots[days] = {
+                            "metrics": metrics,
+                            "computed_at": time.time(),
+                            "compute_seconds": round(time.time() - started, 3),
+                        }
+                        self._last_error = None
+                    else:
+                        self._last_error = "Erreur lors du calcul des métriques"
+            return True
+        finally:
+            db.disconnect()
+
+    def get_snapshot(self, days: int) -> Optional[Dict[str, Any]]:
+        """
+        Retourne le dernier instantané calculé pour la période
+
+        Returns:
+            dict: metrics, computed_at, age_seconds, stale, error — ou None si jamais calculé
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(days)
+            error = self._last_error
+        if snapshot is None:
+            return None
+        age = time.time() - snapshot["computed_at"]
+        return dict(snapshot, age_seconds=round(age, 1), stale=age > self.stale_after, error=error)
+
+    def last_error(self) -> Optional[str]:
+        """Retourne la dernière erreur de recalcul"""
+        with self._lock:
+            return self._last_error
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Erreur lors du recalcul des métriques analytics: {e}")
+                with self._lock:
+                    self._last_error = str(e)
+            self._refreshed_event.set()
+            self._wake_event.wait(self.refresh_interval)
+            self._wake_event.clear()
+
+
+_snapshot_service = None
+_snapshot_service_lock = threading.Lock()
+
+def get_analytics_snapshot_service() -> AnalyticsSnapshotService:
+    """Retourne le service d'instantanés partagé (démarré au premier appel)"""
+    global _snapshot_service
+    with _snapshot_service_lock:
+        if _snapshot_service is None:
+            _snapshot_service = AnalyticsSnapshotService()
+            _snapshot_service.start()
+        return _snapshot_service
@@ -0,0 +1,118 @@
+"""
+Réponses pré-générées pour les questions fréquentes, consultées avant la chaîne RAG.
+
+Le fichier (ANSWER_STORE_PATH) est écrit par pregenerate_answers.py pour une version de
+l'index documentaire ; dès que l'index en service change, ses réponses sont ignorées
+jusqu'à la prochaine génération. Les questions sont comparées sous forme normalisée
+(question_hash). Une réponse n'est servie que pour une question autonome : première
+question de la conversation, ou question qui nomme une formation.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+import nlu
+from answer_store_config import get_answer_store_config
+from text_normalization import question_hash
+from tracing import get_tracer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def index_version(db) -> Optional[str]:
+    """Version de l'index prébuilt en service, ou collection active de l'index synchronisé"""
+    version = getattr(db, "version", None)
+    if version:
+        return version
+    status = getattr(db, "status", None)
+    return status().get("collection") if callable(status) else None
+
+
+def is_standalone(question: str, chat_history: Optional[List[dict]] = None) -> bool:
+    """Question compréhensible sans l'historique (réponse pré-générée utilisable)"""
+    earlier = [message for message in chat_history or []
+               if isinstance(message, dict) and message.get("role") == "user"]
+    if earlier and earlier[-1].get("content") == question:
+        earlier = earlier[:-1]
+    return not earlier or nlu.formation_index(question) is not None
+
+
+class AnswerStore:
+    """Fichier JSON des réponses d'une version d'index, relu quand il est remplacé"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._data: Dict[str, Any] = {"index_version": None, "answers": {}}
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return {"index_version": None, "answers": {}}
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Réponses pré-générées illisibles ({self.path}): {e}")
+                    self._data = {"index_version": None, "answers": {}}
+                self._mtime = mtime
+            return self._data
+
+    def answers(self, version: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """Réponses valables pour cette version d'index (aucune si le fichier date d'une autre version)"""
+        data = self._load()
+        if version is None or data.get("index_version") != version:
+            return {}
+        return data.get("answers", {})
+
+    def lookup(self, question: str, version: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self.answers(version).get(question_hash(question))
+
+    def save(self, version: str, answers: Dict[str, Dict[str, Any]], **metadata):
+        """Remplace (atomiquement) le fichier par les réponses d'une version d'index"""
+        data = {"index_version": version, "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                **metadata, "answers": answers}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        partial = self.path + ".partial"
+        with open(partial, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(partial, self.path)
+
+    def status(self) -> Dict[str, Any]:
+        data = self._load()
+        return {"index_version": data.get("index_version"), "generated_at": data.get("generated_at"),
+                "answers": len(data.get("answers", {}))}
+
+
+_answer_store = None
+_answer_store_lock = threading.Lock()
+
+def get_answer_store() -> AnswerStore:
+    """Réponses pré-générées partagées du processus"""
+    global _answer_store
+    with _answer_store_lock:
+        if _answer_store is None:
+            _answer_store = AnswerStore(get_answer_store_config()["path"])
+        return _answer_store
+
+
+def lookup_answer(question: str, chat_history: Optional[List[dict]], db) -> Optional[str]:
+    """Réponse pré-générée pour cette question et l'index en service, ou None"""
+    if not get_answer_store_config()["enabled"] or not is_standalone(question, chat_history):
+        return None
+    started = time.perf_counter()
+    entry = get_answer_store().lookup(question, index_version(db))
+    get_tracer().record("chat.answer_store", time.perf_counter() - started,
+                        {"outcome": "hit" if entry else "miss"})
+    return entry["answer"] if entry else None
@@ -0,0 +1,20 @@
+import os
+from typing import Dict, Any
+
+# Réponses pré-générées hors ligne pour les questions fréquentes (answer_store.py, pregenerate_answers.py)
+ANSWER_STORE_CONFIG = {
+    # Consulter les réponses pré-générées avant la chaîne RAG
+    "enabled": os.getenv("ANSWER_STORE", "true").lower() == "true",
+    "path": os.getenv("ANSWER_STORE_PATH", os.path.join("storage", "answer_store.json")),
+    # Questions pré-générées : les plus fréquentes, vues au moins min_frequency fois
+    "top_questions": int(os.getenv("ANSWER_STORE_TOP_QUESTIONS", "200")),
+    "min_frequency": int(os.getenv("ANSWER_STORE_MIN_FREQUENCY", "2")),
+    # Fenêtre des événements analytics exploités (jours)
+    "days": int(os.getenv("ANSWER_STORE_DAYS", "90")),
+    # Processus de génération (chacun charge son index et interroge Ollama)
+    "workers": int(os.getenv("ANSWER_STORE_WORKERS", "2")),
+}
+
+def get_answer_store_config() -> Dict[str, Any]:
+    """Retourne la configuration des réponses pré-générées"""
+    return ANSWER_STORE_CONFIG
@@ -1,20 +1,107 @@
 from langchain_ollama import ChatOllama
 
-from models import check_if_model_is_available
+from model_manager import ModelManager, get_keep_alive
 from document_loader import load_documents_into_database
 import argparse
+import contextlib
+import csv
+import json
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, TextIO
 
-from llm import getChatChain
+from llm import answer_question, getChatChain
+from tracing import correlation, get_tracer
 
 
-def main(llm_model_name: str, embedding_model_name: str, documents_path: str) -> None:
-   
+def read_questions(source: str) -> Iterator[Dict[str, Any]]:
+    """
+    Questions à traiter par lots : CSV avec une colonne "question", sinon JSONL
+    ({"question": ...}, les autres champs sont recopiés dans le résultat) ou texte
+    (une question par ligne) ; "-" = entrée standard
+    """
+    f = sys.stdin if source == "-" else open(source, encoding="utf-8", newline="")
     try:
-        check_if_model_is_available(llm_model_name)
-        check_if_model_is_available(embedding_model_name)
-    except Exception as e:
-        print(e)
+        if source.endswith(".csv"):
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line) if line.startswith("{") else {"question": line}
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def answer_batch_item(llm, db, index: int, row: Dict[str, Any]) -> Dict[str, Any]:
+    """Réponse, extraits et durée de chaque étape (ms) pour une ligne d'entrée"""
+    result = {"index": index, **row}
+    started = time.perf_counter()
+    with correlation() as correlation_id:
+        try:
+            answer, docs = answer_question(llm, db, row["question"])
+            result["answer"] = answer
+            result["sources"] = [{"source": doc.metadata.get("source"), "page": doc.metadata.get("page"),
+                                  "relevance": doc.metadata.get("relevance_score")} for doc in docs]
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+    timings = {}
+    for entry in get_tracer().get_request_spans(correlation_id):
+        timings[entry["name"]] = round(timings.get(entry["name"], 0.0) + entry["duration_ms"], 2)
+    result["timings_ms"] = timings
+    result["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def run_batch(llm, db, source: str, output: TextIO, concurrency: int) -> Dict[str, int]:
+    """
+    Répond aux questions avec au plus `concurrency` appels simultanés ; chaque résultat est
+    écrit (JSONL) dès qu'il est prêt, dans l'ordre d'achèvement (champ index = rang d'entrée)
+    """
+    counts = {"answered": 0, "errors": 0}
+
+    def write(futures):
+        for future in futures:
+            result = future.result()
+            counts["errors" if "error" in result else "answered"] += 1
+            output.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+        output.flush()
+
+    pending = set()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as executor:
+        for index, row in enumerate(read_questions(source)):
+            # Lecture au fil de l'eau : au plus 2 * concurrency questions en attente
+            if len(pending) >= 2 * concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write(done)
+            pending.add(executor.submit(answer_batch_item, llm, db, index, row))
+        write(wait(pending).done)
+    return counts
+
+
+def main(llm_model_name: str, embedding_model_name: str, documents_path: str,
+         batch: str = None, output: str = "-", concurrency: int = 4) -> None:
+    if batch and output == "-":
+        # Seuls les résultats JSONL vont sur la sortie standard, les messages sur stderr
+        results = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            return run(llm_model_name, embedding_model_name, documents_path, batch, results, concurrency)
+    if batch:
+        with open(output, "w", encoding="utf-8") as results:
+            return run(llm_model_name, embedding_model_name, documents_path, batch, results, concurrency)
+    return run(llm_model_name, embedding_model_name, documents_path)
+
+
+def run(llm_model_name: str, embedding_model_name: str, documents_path: str,
+        batch: str = None, results: TextIO = None, concurrency: int = 4) -> None:
+   
+    model_manager = ModelManager(chat_models=[llm_model_name], embedding_models=[embedding_model_name])
+    if not model_manager.start(wait=True):
+        for name, state in model_manager.status().items():
+            if state["error"]:
+                print(f"{name}: {state['error']}")
         sys.exit()
 
    
@@ -24,7 +111,15 @@ def main(llm_model_name: str, embedding_model_name: str, documents_path: str) ->
         print(e)
         sys.exit()
 
-    llm = ChatOllama(model=llm_model_name)
+    llm = ChatOllama(model=llm_model_name, keep_alive=get_keep_alive())
+
+    if batch:
+        started = time.perf_counter()
+        counts = run_batch(llm, db, batch, results, concurrency)
+        print(f"✅ {counts['answered']} réponses, {counts['errors']} erreurs en "
+              f"{time.perf_counter() - started:.1f}s", file=sys.stderr)
+        return
+
     chat = getChatChain(llm, db)
 
     while True:
@@ -35,6 +130,7 @@ def main(llm_model_name: str, embedding_model_name: str, documents_path: str) ->
             if user_input.lower() == "exit":
                 break
             else:
+                model_manager.touch(llm_model_name)
                 chat(user_input)
         
         except KeyboardInterrupt:
@@ -61,9 +157,24 @@ def parse_arguments() -> argparse.Namespace:
         default="Research",
         help="The path to the directory containing documents to load.",
     )
+    parser.add_argument(
+        "--batch",
+        help="Answer the questions of a JSONL, CSV or text file ('-' = stdin) instead of the interactive loop.",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        help="JSONL file for batch results ('-' = stdout).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of questions answered at the same time in batch mode.",
+    )
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_arguments()
-    main(args.model, args.embedding_model, args.path)
+    main(args.model, args.embedding_model, args.path, args.batch, args.output, args.concurrency)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark du stockage compressé des embeddings (embedding_compression.py)
+
+Compare la mémoire, la latence de requête et le recall@k des configurations tronquées
+(512, 256 dimensions) et/ou int8, avec et sans re-classement exact, à la recherche exacte
+en float32 et à la collection Chroma actuelle. La référence du recall est la recherche
+exacte en float32.
+
+Sources des vecteurs:
+    --index <version>   index prébuilt (index_build.py), requêtes embeddées avec son modèle
+    --documents Research   embeddings calculés avec Ollama
+    --synthetic 20000   vecteurs aléatoires (sans Ollama), pour extrapoler à un gros corpus
+
+Exemple:
+    python benchmark_embeddings.py --index 20261019T101500-3fa2c1d9 --k 10 --output bench_embeddings.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from benchmark_latency import summarize
+from embedding_compression import CompressedVectorIndex, normalize_rows
+
+QUESTIONS = [
+    "Quel est le prix de la formation macarons ?",
+    "Combien de jours dure la formation entremet ?",
+    "Est-ce que la formation fraisier est adaptée aux débutants ?",
+    "Quelles sont les recettes du plateau de mignardises ?",
+    "La formation viennoiseries comprend-elle les croissants ?",
+    "Quels sont les horaires des cours ?",
+    "Peut-on financer la formation avec le CPF ?",
+    "Où se trouve l'école Dream Pastry ?",
+    "Quel matériel faut-il apporter ?",
+    "Combien d'élèves par session ?",
+    "Que contient la formation layercake ?",
+    "Les tartelettes signature sont-elles au programme ?",
+    "Y a-t-il une formation trompe l'oeil ?",
+    "Quelles techniques de glaçage sont enseignées ?",
+    "La formation CAP pâtissier prépare-t-elle à l'examen ?",
+]
+
+CONFIGURATIONS = [
+    ("512", 512, False),
+    ("256", 256, False),
+    ("int8", None, True),
+    ("512+int8", 512, True),
+    ("256+int8", 256, True),
+]
+
+
+def load_vectors(args) -> Dict[str, Any]:
+    """Vecteurs des extraits, embeddings des requêtes et métadonnées"""
+    if args.synthetic:
+        rng = np.random.default_rng(args.seed)
+        # Variance décroissante le long des dimensions, comme un modèle Matryoshka
+        vectors = (rng.normal(size=(args.synthetic, 768)) * np.linspace(2.0, 0.2, 768)).astype(np.float32)
+        rows = rng.choice(args.synthetic, size=args.queries, replace=False)
+        queries = vectors[rows] + rng.normal(scale=0.5, size=(args.queries, 768)).astype(np.float32)
+        return {"vectors": vectors, "queries": queries, "metadatas": [{}] * args.synthetic, "source": "synthetic"}
+
+    from langchain_ollama import OllamaEmbeddings
+
+    if args.index:
+        from corpus_index import read_manifest
+        manifest = read_manifest(args.index_dir, args.index)
+        path = os.path.join(args.index_dir, args.index)
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(path, "chunks.jsonl"), encoding="utf-8") as f:
+            metadatas = [json.loads(line)["metadata"] for line in f]
+        embedding = OllamaEmbeddings(model=manifest["embedding_model"])
+        source = f"index {args.index}"
+    else:
+        from document_loader import get_embeddings, load_documents, split_documents
+        chunks = split_documents(load_documents(args.documents))
+        embedding = get_embeddings()
+        vectors = np.asarray(embedding.embed_documents([chunk.page_content for chunk in chunks]), dtype=np.float32)
+        metadatas = [chunk.metadata for chunk in chunks]
+        source = args.documents
+    queries = np.asarray(embedding.embed_documents(QUESTIONS[:args.queries]), dtype=np.float32)
+    return {"vectors": vectors, "queries": queries, "metadatas": metadatas, "source": source}
+
+
+def measure(index, queries: np.ndarray, k: int, truth: Optional[List[List[int]]]) -> Tuple[Dict[str, Any], List[List[int]]]:
+    """Latence par requête et recall@k par rapport aux résultats de référence"""
+    durations, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append([row for row, _ in index.search_vector(query, k)])
+        durations.append(time.perf_counter() - started)
+    report = {"latency": summarize(durations)}
+    if truth is not None:
+        report["recall_at_k"] = round(float(np.mean([len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)])), 4)
+    return report, results
+
+
+class _ChromaByVector:
+    """Collection Chroma interrogée par vecteur (la base actuelle, distance L2 sur vecteurs normalisés)"""
+
+    def __init__(self, vectors: np.ndarray):
+        import chromadb
+        self.directory = tempfile.TemporaryDirectory()
+        client = chromadb.PersistentClient(path=self.directory.name)
+        self.collection = client.create_collection("benchmark")
+        ids = [str(i) for i in range(len(vectors))]
+        for start in range(0, len(vectors), 1000):
+            block = normalize_rows(np.asarray(vectors[start:start + 1000], dtype=np.float32))
+            self.collection.add(ids=ids[start:start + 1000], embeddings=block.tolist())
+
+    def search_vector(self, query, k):
+        result = self.collection.query(query_embeddings=[normalize_rows(query).tolist()], n_results=k, include=["distances"])
+        return [(int(i), d) for i, d in zip(result["ids"][0], result["distances"][0])]
+
+    def disk_bytes(self) -> int:
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(self.directory.name) for name in names)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark des embeddings tronqués et quantifiés.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--index", help="Version d'index prébuilt à utiliser.")
+    source.add_argument("--documents", default="Research", help="Dossier des documents à embedder.")
+    source.add_argument("--synthetic", type=int, default=0, help="Nombre de vecteurs aléatoires (sans Ollama).")
+    parser.add_argument("--index-dir", default="indexes", help="Dossier des versions d'index.")
+    parser.add_argument("--queries", type=int, default=len(QUESTIONS), help="Nombre de requêtes.")
+    parser.add_argument("--k", type=int, default=10, help="Nombre d'extraits retournés.")
+    parser.add_argument("--rescore-factor", type=int, default=4, help="Candidats re-classés = facteur * k.")
+    parser.add_argument("--skip-chroma", action="store_true", help="Ne pas mesurer la collection Chroma.")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire (--synthetic).")
+    parser.add_argument("--output", default="-", help="Fichier JSON de sortie ('-' = stdout).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    data = load_vectors(args)
+    vectors, queries = data["vectors"], data["queries"]
+    count, dims = vectors.shape
+    ids = [str(i) for i in range(count)]
+    texts = [""] * count
+
+    exact = CompressedVectorIndex(vectors, ids, texts, data["metadatas"])
+    baseline, truth = measure(exact, queries, args.k, None)
+    configurations = {"float32": {"memory_mb": round(exact.memory_bytes / 1e6, 3),
+                                  "bytes_per_chunk": exact.memory_bytes // max(count, 1), **baseline, "recall_at_k": 1.0}}
+
+    if not args.skip_chroma:
+        chroma = _ChromaByVector(vectors)
+        report, _ = measure(chroma, queries, args.k, truth)
+        configurations["chroma"] = {"disk_mb": round(chroma.disk_bytes() / 1e6, 3),
+                                    "bytes_per_chunk": chroma.disk_bytes() // max(count, 1), **report}
+
+    for name, target_dims, quantize in CONFIGURATIONS:
+        if target_dims and target_dims >= dims:
+            continue
+        for rescore_factor in (0, args.rescore_factor):
+            index = CompressedVectorIndex(vectors, ids, texts, data["metadatas"], dims=target_dims,
+                                          quantize=quantize, rescore_factor=rescore_factor)
+            report, _ = measure(index, queries, args.k, truth)
+            label = f"{name}+rescore" if rescore_factor else name
+            configurations[label] = {"memory_mb": round(index.memory_bytes / 1e6, 3),
+                                     "bytes_per_chunk": index.memory_bytes // max(count, 1), **report}
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parameters": vars(args),
+        "source": data["source"],
+        "chunks": count,
+        "dimensions": dims,
+        "configurations": configurations,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"✅ Rapport écrit dans {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latence de bout en bout sur des services simulés (Ollama, Gemini, SMTP, MySQL)
+
+Mesure l'ingestion des documents, le chat RAG (getStreamingChain) et le parcours de
+qualification (process_qualification_flow), puis écrit un rapport JSON (p50/p95).
+
+Exemple:
+    python benchmark_latency.py --chat-requests 20 --token-rate 40 --output bench.json
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List
+
+from local_stubs import STUB_DATABASE_NOTICE, StubEnvironment
+
+CHAT_QUESTIONS = [
+    "Quel est le prix de la formation macarons ?",
+    "Combien de jours dure la formation entremet ?",
+    "Est-ce que la formation fraisier est adaptée aux débutants ?",
+    "Quelles sont les recettes du plateau de mignardises ?",
+    "La formation viennoiseries comprend-elle les croissants ?",
+]
+
+BENCH_CLIENT = {
+    "nom": "Martin",
+    "prenom": "Léa",
+    "numero_telephone": "0612345678",
+    "email": "lea.martin@example.com",
+    "age": 29,
+    "statut": "Salarié",
+    "cpf": "Oui",
+    "ville": "Paris",
+    "preference": "Présentiel",
+    "budget": 1500,
+    "motivation": "Reconversion",
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentile par interpolation linéaire"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    """Résumé statistique (en millisecondes)"""
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "mean_ms": round(statistics.mean(values) * 1000, 2) if values else 0.0,
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+def bench_ingestion(embedding_model: str, documents_path: str, persist_directory: str):
+    from document_loader import load_documents_into_database
+
+    started = time.perf_counter()
+    db = load_documents_into_database(embedding_model, documents_path, persist_directory=persist_directory)
+    elapsed = time.perf_counter() - started
+    chunks = db._collection.count()
+    return db, {
+        "seconds": round(elapsed, 3),
+        "chunks": chunks,
+        "chunks_per_second": round(chunks / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def bench_chat(db, chat_model: str, requests: int) -> Dict[str, Any]:
+    from langchain_ollama import ChatOllama
+    from llm import getStreamingChain
+
+    llm = ChatOllama(model=chat_model)
+    ttft, totals, tokens = [], [], 0
+    started_all = time.perf_counter()
+    for i in range(requests):
+        question = CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)]
+        memory = [
+            {"role": "assistant", "content": "Bonjour ! Posez vos questions sur nos formations."},
+            {"role": "user", "content": question},
+        ]
+        started = time.perf_counter()
+        first = None
+        for chunk in getStreamingChain(question, memory, llm, db):
+            if first is None:
+                first = time.perf_counter() - started
+            tokens += 1
+        totals.append(time.perf_counter() - started)
+        ttft.append(first if first is not None else totals[-1])
+    elapsed = time.perf_counter() - started_all
+    return {
+        "time_to_first_token": summarize(ttft),
+        "total_latency": summarize(totals),
+        "requests_per_second": round(requests / elapsed, 3) if elapsed else 0.0,
+        "tokens_per_second": round(tokens / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def answer_for(question_text: str) -> str:
+    """Réponse type d'un prospect à une question de qualification"""
+    if question_text.startswith("Quelle formation"):
+        return "Macarons"
+    if "Créneaux disponibles pour" in question_text:
+        return "1"
+    if "expérience" in question_text:
+        return "Débutant"
+    return "Oui"
+
+
+def run_qualification(client_info: Dict[str, Any], max_steps: int = 30) -> Dict[str, Any]:
+    """Déroule un parcours de qualification complet et mesure chaque étape"""
+    from llm import process_qualification_flow
+
+    session_state = {}
+    steps = []
+    started = time.perf_counter()
+    step_started = time.perf_counter()
+    _, _, completed = process_qualification_flow(client_info, "", "", session_state)
+    steps.append(("start", time.perf_counter() - step_started))
+    while not completed and len(steps) < max_steps:
+        index = session_state["current_question_index"]
+        answer = answer_for(session_state["qualification_questions"][index])
+        step_started = time.perf_counter()
+        _, _, completed = process_qualification_flow(client_info, answer, "", session_state)
+        steps.append((f"question_{index + 1}", time.perf_counter() - step_started))
+    return {"steps": steps, "total": time.perf_counter() - started, "completed": completed}
+
+
+def bench_qualification(prospects: int) -> Dict[str, Any]:
+    totals, step_latencies, final_steps = [], [], []
+    started_all = time.perf_counter()
+    for _ in range(prospects):
+        result = run_qualification(dict(BENCH_CLIENT))
+        totals.append(result["total"])
+        step_latencies.extend(latency for _, latency in result["steps"][:-1])
+        final_steps.append(result["steps"][-1][1])
+    elapsed = time.perf_counter() - started_all
+    return {
+        "total_latency": summarize(totals),
+        "question_step_latency": summarize(step_latencies),
+        "completion_step_latency": summarize(final_steps),
+        "prospects_per_second": round(prospects / elapsed, 3) if elapsed else 0.0,
+    }
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark de latence sur services simulés.")
+    parser.add_argument("--chat-requests", type=int, default=10, help="Nombre de questions de chat.")
+    parser.add_argument("--prospects", type=int, default=5, help="Nombre de parcours de qualification.")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="Tokens/s simulés par Ollama.")
+    parser.add_argument("--first-token-latency", type=float, default=0.05, help="Latence avant le premier token (s).")
+    parser.add_argument("--gemini-latency", type=float, default=0.2, help="Latence simulée de Gemini (s).")
+    parser.add_argument("--smtp-latency", type=float, default=0.05, help="Latence simulée du SMTP (s).")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="Latence simulée par requête SQL (s).")
+    parser.add_argument("--path", default="Research", help="Dossier des documents à indexer.")
+    parser.add_argument("--output", default="-", help="Fichier JSON de sortie ('-' = stdout).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with StubEnvironment(
+        tokens_per_second=args.token_rate,
+        first_token_latency=args.first_token_latency,
+        gemini_latency=args.gemini_latency,
+        smtp_latency=args.smtp_latency,
+        db_latency=args.db_latency,
+    ) as env, tempfile.TemporaryDirectory() as persist_directory:
+        from ollama_config import get_ollama_config
+
+        config = get_ollama_config()
+        db, ingestion = bench_ingestion(config["embedding_model"], args.path, persist_directory)
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "parameters": vars(args),
+            "database": STUB_DATABASE_NOTICE,
+            "ingestion": ingestion,
+            "chat": bench_chat(db, config["chat_model"], args.chat_requests),
+            "qualification": bench_qualification(args.prospects),
+            "stub_counters": {
+                "ollama_requests": dict(env.ollama.requests),
+                "gemini_requests": env.gemini.requests,
+                "emails_sent": len(env.smtp.messages),
+                "db_queries": env.store.queries,
+                "db_connections_opened": env.store.connections_opened,
+            },
+        }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"✅ Rapport écrit dans {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de la détection d'intention et de formation (nlu.py)
+
+Compare l'ancienne implémentation (une recherche par motif, double boucle sur l'historique)
+au module nlu sur des conversations synthétiques : chaque tour analyse le nouveau message
+et tout l'historique, comme ui.py.
+
+Exemple:
+    python benchmark_nlu.py --conversations 200 --turns 20
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from typing import Dict, Any, List
+
+import nlu
+
+LEGACY_INSCRIPTION_KEYWORDS = [
+    r'\binscrire\b', r'\binscription\b', r'\bs\'inscrire\b',
+    r'\bparticiper\b', r'\bparticiper à\b', r'\bsuivre\b',
+    r'\bformation\b.*\bintéressé\b', r'\bintéressé\b.*\bformation\b',
+    r'\bje veux\b.*\bformation\b', r'\bje souhaite\b.*\bformation\b',
+    r'\bje voudrais\b.*\bformation\b', r'\bje désire\b.*\bformation\b',
+    r'\bformation\b.*\bpour moi\b', r'\bformation\b.*\bmoi\b',
+    r'\bcomment faire\b.*\binscription\b', r'\bcomment s\'inscrire\b',
+    r'\bprocédure\b.*\binscription\b', r'\bétapes\b.*\binscription\b',
+    r'\bmodalités\b.*\binscription\b', r'\bconditions\b.*\binscription\b'
+]
+
+
+def legacy_detect_inscription_intent(question: str) -> bool:
+    """Implémentation d'origine de llm.detect_inscription_intent"""
+    question_lower = question.lower()
+    for pattern in LEGACY_INSCRIPTION_KEYWORDS:
+        if re.search(pattern, question_lower):
+            return True
+    return False
+
+
+def legacy_detect_formation_interest(question: str, chat_history: list = None) -> str:
+    """Implémentation d'origine de llm.detect_formation_interest"""
+    question_lower = question.lower()
+    for formation in nlu.FORMATIONS:
+        if formation in question_lower:
+            return formation.title()
+    if chat_history:
+        for message in chat_history:
+            if isinstance(message, dict) and message.get("role") == "user":
+                content = message.get("content", "").lower()
+                for formation in nlu.FORMATIONS:
+                    if formation in content:
+                        return formation.title()
+    return "Non spécifiée"
+
+
+SAMPLE_MESSAGES = [
+    "Bonjour, quels sont vos horaires d'ouverture ?",
+    "Combien coûte la formation ?",
+    "Est-ce que le matériel est fourni pendant les cours ?",
+    "Je voudrais en savoir plus sur vos tarifs et les financements possibles",
+    "Où se trouve votre école exactement ?",
+    "Je souhaite m'inscrire à la formation macarons",
+    "Est-ce qu'il y a un parking à proximité ?",
+    "Je suis intéressé par une formation en chocolat pour moi",
+    "Quelles sont les modalités d'inscription au CAP pâtissier ?",
+    "Avez-vous des créneaux le week-end pour les entremets ?",
+]
+
+
+def make_conversations(count: int, turns: int, seed: int) -> List[List[str]]:
+    rng = random.Random(seed)
+    return [[rng.choice(SAMPLE_MESSAGES) + f" ({i}-{t})" for t in range(turns)] for i in range(count)]
+
+
+def run(conversations: List[List[str]], detect_intent, detect_formation) -> float:
+    """Rejoue les conversations et retourne la durée totale (s)"""
+    started = time.perf_counter()
+    for messages in conversations:
+        history = []
+        for message in messages:
+            detect_intent(message)
+            detect_formation(message, history)
+            history.append({"role": "user", "content": message})
+            history.append({"role": "assistant", "content": "Réponse de l'assistant."})
+    return time.perf_counter() - started
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Micro-benchmark de la détection d'intention et de formation.")
+    parser.add_argument("--conversations", type=int, default=200, help="Nombre de conversations simulées.")
+    parser.add_argument("--turns", type=int, default=20, help="Messages utilisateur par conversation.")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    conversations = make_conversations(args.conversations, args.turns, args.seed)
+    messages = args.conversations * args.turns
+
+    legacy = run(conversations, legacy_detect_inscription_intent, legacy_detect_formation_interest)
+    nlu.normalize_message.cache_clear()
+    nlu.detect_inscription_intent.cache_clear()
+    nlu.formation_index.cache_clear()
+    current = run(conversations, nlu.detect_inscription_intent, nlu.detect_formation_interest)
+
+    report: Dict[str, Any] = {
+        "messages": messages,
+        "legacy_us_per_message": round(legacy * 1e6 / messages, 2),
+        "nlu_us_per_message": round(current * 1e6 / messages, 2),
+        "speedup": round(legacy / current, 2) if current else None,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la réutilisation du cache KV d'Ollama selon la disposition des prompts
+
+Rejoue des conversations de plusieurs tours (reformulation puis réponse, comme
+getStreamingChain) avec l'ancienne disposition (instructions, historique et extraits dans
+un seul message) et la disposition actuelle de llm.py (instructions fixes en message
+système, historique en messages, parties variables à la fin). Mesure, à partir du 2e tour,
+les tokens de prompt effectivement relus (prompt_eval_count) et la durée de prefill
+(prompt_eval_duration) rapportées par Ollama.
+
+Par défaut, Ollama est simulé avec un cache de préfixe (local_stubs) ; --ollama mesure sur
+le serveur configuré (OLLAMA_HOST), avec OLLAMA_NUM_PARALLEL >= 2 pour que reformulation
+et réponse gardent chacune leur slot.
+
+Exemple:
+    python benchmark_prompt_cache.py --conversations 3 --turns 6 --prefill-rate 300 --output bench_prompt_cache.json
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import Dict, Any, List
+
+from langchain.prompts.prompt import PromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
+
+from benchmark_latency import summarize
+from local_stubs import StubEnvironment
+
+CONVERSATION = [
+    "Quel est le prix de la formation macarons ?",
+    "Et combien de jours dure-t-elle ?",
+    "Est-ce qu'elle est adaptée aux débutants ?",
+    "Quel matériel faut-il apporter ?",
+    "Peut-on la financer avec le CPF ?",
+    "Combien d'élèves par session ?",
+    "Y a-t-il des sessions le week-end ?",
+    "Que faut-il faire pour s'inscrire ?",
+]
+
+CONTEXTS = [
+    "Source Document: Research/macarons.pdf, Page 1:\nLa formation macarons dure deux jours. Tarif : 450 euros, "
+    "matériel fourni. Les sessions accueillent six élèves au maximum, encadrés par un chef pâtissier.",
+    "Source Document: Research/dream_pastry.pdf, Page 3:\nToutes nos formations sont ouvertes aux débutants. "
+    "Les formations certifiantes sont éligibles au CPF ; un devis est envoyé sur demande.",
+    "Source Document: Research/dream_pastry.pdf, Page 5:\nLes cours ont lieu du lundi au samedi de 9h à 17h. "
+    "Apporter une tenue de travail et des boîtes pour emporter les réalisations.",
+]
+
+# Prompts avant réorganisation (instructions et parties variables mêlées)
+LEGACY_CONDENSE_PROMPT = PromptTemplate.from_template("""Given the following conversation and a follow-up question, rephrase the follow-up question to be a standalone question.
+
+Chat History:
+{chat_history}
+
+Follow Up Input: {question}
+Standalone question:""")
+
+
+def legacy_answer_prompt() -> ChatPromptTemplate:
+    from llm import ANSWER_INSTRUCTIONS, answer
+    return ChatPromptTemplate.from_template("\n" + ANSWER_INSTRUCTIONS + "\n\n" + answer)
+
+
+def _prefill(message) -> Dict[str, float]:
+    metadata = getattr(message, "response_metadata", {}) or {}
+    return {"tokens": metadata.get("prompt_eval_count") or 0,
+            "seconds": (metadata.get("prompt_eval_duration") or 0) / 1e9}
+
+
+def run_conversation(llm, layout: str, turns: int) -> List[Dict[str, float]]:
+    """Mesures de prefill (reformulation + réponse) de chaque tour d'une conversation"""
+    from llm import ANSWER_PROMPT, CONDENSE_QUESTION_PROMPT, history_messages
+
+    legacy_answer = legacy_answer_prompt()
+    memory = [{"role": "assistant", "content": "Bonjour ! Posez vos questions sur nos formations."}]
+    measures = []
+    for turn in range(turns):
+        question = CONVERSATION[turn % len(CONVERSATION)]
+        memory.append({"role": "user", "content": question})
+        if layout == "legacy":
+            history = "\n".join(f"{item['role']}: {item['content']}" for item in memory)
+            condensed = (LEGACY_CONDENSE_PROMPT | llm).invoke({"question": question, "chat_history": history})
+            answer_prompt = legacy_answer
+        else:
+            condensed = (CONDENSE_QUESTION_PROMPT | llm).invoke(
+                {"question": question, "chat_history": history_messages(memory, question)})
+            answer_prompt = ANSWER_PROMPT
+        answered = (answer_prompt | llm).invoke({"context": CONTEXTS[turn % len(CONTEXTS)],
+                                                 "question": condensed.content})
+        memory.append({"role": "assistant", "content": answered.content})
+        condense, generation = _prefill(condensed), _prefill(answered)
+        measures.append({"tokens": condense["tokens"] + generation["tokens"],
+                         "seconds": condense["seconds"] + generation["seconds"]})
+    return measures
+
+
+def bench_layout(llm, layout: str, conversations: int, turns: int) -> Dict[str, Any]:
+    first_turn, repeated = [], []
+    for _ in range(conversations):
+        measures = run_conversation(llm, layout, turns)
+        first_turn.append(measures[0])
+        repeated.extend(measures[1:])
+    return {
+        "first_turn_prefill": summarize([m["seconds"] for m in first_turn]),
+        "repeated_turn_prefill": summarize([m["seconds"] for m in repeated]),
+        "repeated_turn_prompt_tokens_evaluated": round(sum(m["tokens"] for m in repeated) / max(len(repeated), 1), 1),
+    }
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark du cache de préfixe selon la disposition des prompts.")
+    parser.add_argument("--conversations", type=int, default=3, help="Nombre de conversations par disposition.")
+    parser.add_argument("--turns", type=int, default=6, help="Nombre de tours par conversation.")
+    parser.add_argument("--model", default=None, help="Modèle de chat (défaut: OLLAMA_CHAT_MODEL).")
+    parser.add_argument("--ollama", action="store_true", help="Mesurer sur le serveur Ollama configuré.")
+    parser.add_argument("--prefill-rate", type=float, default=300.0, help="Tokens/s de prefill simulés.")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Tokens/s de génération simulés.")
+    parser.add_argument("--cache-slots", type=int, default=2, help="Slots de cache simulés par modèle.")
+    parser.add_argument("--output", default="-", help="Fichier JSON de sortie ('-' = stdout).")
+    return parser.parse_args()
+
+
+def run(args) -> Dict[str, Any]:
+    from langchain_ollama import ChatOllama
+    from ollama_config import get_ollama_config
+
+    llm = ChatOllama(model=args.model or get_ollama_config()["chat_model"])
+    layouts = {layout: bench_layout(llm, layout, args.conversations, args.turns) for layout in ("legacy", "cache_friendly")}
+    legacy = layouts["legacy"]["repeated_turn_prefill"]["mean_ms"]
+    current = layouts["cache_friendly"]["repeated_turn_prefill"]["mean_ms"]
+    return {
+        "layouts": layouts,
+        "repeated_turn_prefill_reduction": round(1 - current / legacy, 4) if legacy else None,
+    }
+
+
+def main():
+    args = parse_arguments()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    report = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "parameters": vars(args)}
+    if args.ollama:
+        report.update(run(args))
+    else:
+        with StubEnvironment(tokens_per_second=args.token_rate, first_token_latency=0.0,
+                             prefill_tokens_per_second=args.prefill_rate, cache_slots=args.cache_slots):
+            report.update(run(args))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"✅ Rapport écrit dans {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark du routage entre petit modèle et modèle principal (model_router.py)
+
+Pose les mêmes questions (factuelles simples, en plusieurs parties, demandes de conseil)
+via getStreamingChain, d'abord avec le seul modèle principal, puis avec le routeur, sur
+Ollama simulé avec un débit par modèle. Rapporte la latence de bout en bout et, par niveau
+de modèle, le nombre d'appels et la latence de reformulation et de génération.
+
+Exemple:
+    python benchmark_routing.py --large-rate 25 --small-rate 90 --rounds 3 --output bench_routing.json
+"""
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List
+
+from benchmark_latency import bench_ingestion, summarize
+from local_stubs import StubEnvironment
+
+QUESTIONS = [
+    "Quel est le prix de la formation macarons ?",
+    "Combien de jours dure la formation entremet ?",
+    "Combien d'élèves par session ?",
+    "Quels sont les horaires des cours ?",
+    "Où se trouve l'école Dream Pastry ?",
+    "Quel est le prix et combien de jours dure la formation fraisier ?",
+    "Quelle formation me recommandez-vous pour une reconversion ?",
+    "Quelle est la différence entre la formation entremet et la formation layercake ?",
+]
+
+STAGES = ("chat.condense", "chat.generation")
+
+
+def bench_router(router, db, questions: List[str]) -> Dict[str, Any]:
+    from llm import getStreamingChain
+    from tracing import correlation, get_tracer
+
+    totals, ttft = [], []
+    tiers: Dict[str, Dict[str, List[float]]] = {}
+    for question in questions:
+        memory = [{"role": "assistant", "content": "Bonjour ! Posez vos questions sur nos formations."},
+                  {"role": "user", "content": question}]
+        with correlation() as correlation_id:
+            started = time.perf_counter()
+            first = None
+            for _ in getStreamingChain(question, memory, router, db, track_unanswered=False):
+                if first is None:
+                    first = time.perf_counter() - started
+            totals.append(time.perf_counter() - started)
+            ttft.append(first if first is not None else totals[-1])
+        for entry in get_tracer().get_request_spans(correlation_id):
+            if entry["name"] in STAGES:
+                stages = tiers.setdefault(entry["labels"].get("tier", "large"), {stage: [] for stage in STAGES})
+                stages[entry["name"]].append(entry["duration_ms"] / 1000)
+    return {
+        "time_to_first_token": summarize(ttft),
+        "total_latency": summarize(totals),
+        "tiers": {tier: {stage.split(".")[1]: summarize(values) for stage, values in stages.items()}
+                  for tier, stages in sorted(tiers.items())},
+    }
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark du routage entre modèles sur Ollama simulé.")
+    parser.add_argument("--rounds", type=int, default=2, help="Passages sur la liste de questions.")
+    parser.add_argument("--large-rate", type=float, default=25.0, help="Tokens/s simulés du modèle principal.")
+    parser.add_argument("--small-rate", type=float, default=90.0, help="Tokens/s simulés du petit modèle.")
+    parser.add_argument("--first-token-latency", type=float, default=0.05, help="Latence avant le premier token (s).")
+    parser.add_argument("--path", default="Research", help="Dossier des documents à indexer.")
+    parser.add_argument("--output", default="-", help="Fichier JSON de sortie ('-' = stdout).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    from ollama_config import get_ollama_config
+
+    config = get_ollama_config()
+    rates = {config["chat_model"]: args.large_rate, config["small_chat_model"]: args.small_rate}
+    with StubEnvironment(first_token_latency=args.first_token_latency, model_tokens_per_second=rates) as env, \
+            tempfile.TemporaryDirectory() as persist_directory:
+        from langchain_ollama import ChatOllama
+        from model_router import ModelRouter, classify_question
+
+        db, _ = bench_ingestion(config["embedding_model"], args.path, persist_directory)
+        questions = QUESTIONS * args.rounds
+        large = ChatOllama(model=config["chat_model"])
+        small = ChatOllama(model=config["small_chat_model"])
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "parameters": vars(args),
+            "routes": {question: "/".join(classify_question(question)) for question in QUESTIONS},
+            "single_model": bench_router(ModelRouter(large), db, questions),
+            "routed": bench_router(ModelRouter(large, small), db, questions),
+            "ollama_requests": dict(env.ollama.requests),
+        }
+
+    single = report["single_model"]["total_latency"]["mean_ms"]
+    routed = report["routed"]["total_latency"]["mean_ms"]
+    report["mean_latency_reduction"] = round(1 - routed / single, 4) if single else None
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"✅ Rapport écrit dans {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
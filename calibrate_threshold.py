@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Calibration du seuil de pertinence sous lequel l'assistant répond « hors documents » sans LLM
+
+Chaque question étiquetée (réponse présente ou non dans les documents) est cherchée dans
+l'index en service ; le seuil retenu refuse le plus possible de questions hors documents
+sans dépasser le taux maximal de refus à tort sur les questions couvertes. Le résultat est
+écrit dans le fichier lu par retrieval.py (RELEVANCE_CALIBRATION_FILE).
+
+Format des questions (JSONL ou CSV avec en-tête):
+    {"question": "Quel est le prix de la formation macarons ?", "answerable": true}
+    question,answerable
+    Avez-vous un parking ?,non
+
+Exemple:
+    python calibrate_threshold.py questions_labels.jsonl --max-false-refusal 0.05
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from typing import Dict, Any, List, Tuple
+
+import nlu
+from retrieval import best_relevance, search_candidates
+from retrieval_config import get_retrieval_config
+
+TRUE_VALUES = {"1", "true", "oui", "yes", "o", "y"}
+
+
+def load_labeled_questions(path: str) -> List[Tuple[str, bool]]:
+    """(question, réponse présente dans les documents)"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    questions = []
+    for row in rows:
+        answerable = row["answerable"]
+        if not isinstance(answerable, bool):
+            answerable = str(answerable).strip().lower() in TRUE_VALUES
+        questions.append((row["question"], answerable))
+    return questions
+
+
+def pick_threshold(samples: List[Tuple[float, bool]], max_false_refusal: float = 0.05) -> Dict[str, Any]:
+    """
+    Seuil (refus si score < seuil) qui refuse le plus de questions hors documents avec au plus
+    max_false_refusal de questions couvertes refusées ; à égalité, le seuil le plus bas
+
+    Args:
+        samples: (meilleur score de pertinence, réponse présente dans les documents)
+    """
+    answerable = [score for score, label in samples if label]
+    unanswerable = [score for score, label in samples if not label]
+    if not answerable or not unanswerable:
+        raise ValueError("Il faut des questions couvertes et des questions hors documents")
+
+    # Les scores ne sont pas bornés à 0-1 (pertinence L2 de Chroma négative pour les extraits éloignés) :
+    # seuils croissants, d'un seuil qui ne refuse rien aux points milieux entre deux scores observés
+    scores = sorted({score for score, _ in samples})
+    candidates = [scores[0] - 1e-6] + [(low + high) / 2 for low, high in zip(scores, scores[1:])] + [scores[-1] + 1e-6]
+
+    best = None
+    for threshold in candidates:
+        false_refusals = sum(score < threshold for score in answerable) / len(answerable)
+        if false_refusals > max_false_refusal:
+            break
+        refused = sum(score < threshold for score in unanswerable) / len(unanswerable)
+        if best is None or refused > best["refusal_recall"]:
+            best = {"threshold": round(threshold, 6), "refusal_recall": round(refused, 4),
+                    "false_refusal_rate": round(false_refusals, 4)}
+    if best is None:
+        raise ValueError(f"Aucun seuil ne respecte le taux maximal de refus à tort ({max_false_refusal})")
+    best["samples"] = {"answerable": len(answerable), "unanswerable": len(unanswerable)}
+    return best
+
+
+def score_questions(db, questions: List[Tuple[str, bool]]) -> List[Tuple[float, bool]]:
+    """Meilleur score de pertinence de chaque question (même recherche que le chat)"""
+    return [(best_relevance(search_candidates(db, question, nlu.detect_formation_id(question))), answerable)
+            for question, answerable in questions]
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Calibration du seuil de pertinence.")
+    parser.add_argument("questions", help="Questions étiquetées (.jsonl ou .csv).")
+    parser.add_argument("--max-false-refusal", type=float, default=0.05,
+                        help="Part maximale de questions couvertes refusées à tort.")
+    parser.add_argument("--documents", default="Research", help="Dossier des documents (sans index prébuilt).")
+    parser.add_argument("--output", default=get_retrieval_config()["relevance_calibration_file"],
+                        help="Fichier de calibration à écrire.")
+    parser.add_argument("--dry-run", action="store_true", help="Afficher le seuil sans l'écrire.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    from corpus_index import open_corpus
+
+    questions = load_labeled_questions(args.questions)
+    db = open_corpus(args.documents, watch=False)
+    samples = score_questions(db, questions)
+    try:
+        result = pick_threshold(samples, args.max_false_refusal)
+    except ValueError as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+
+    result.update({
+        "calibrated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "max_false_refusal": args.max_false_refusal,
+        "index": getattr(db, "version", None) or db.status().get("collection"),
+    })
+    print(f"🎯 Seuil: {result['threshold']} — {result['refusal_recall']:.0%} des questions hors documents "
+          f"court-circuitées, {result['false_refusal_rate']:.0%} de refus à tort")
+    if args.dry_run:
+        return
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"✅ Calibration écrite dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
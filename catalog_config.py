@@ -0,0 +1,14 @@
+import os
+from typing import Dict, Any
+
+# Configuration du catalogue des formations chargé en mémoire
+CATALOG_CONFIG = {
+    # Durée de validité du catalogue avant rechargement (secondes)
+    "ttl_seconds": int(os.getenv("FORMATION_CATALOG_TTL", "60")),
+    # Similarité minimale (0-1) entre un mot saisi et un mot du nom d'une formation
+    "fuzzy_cutoff": float(os.getenv("FORMATION_FUZZY_CUTOFF", "0.8")),
+}
+
+def get_catalog_config() -> Dict[str, Any]:
+    """Retourne la configuration du catalogue des formations"""
+    return CATALOG_CONFIG
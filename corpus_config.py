@@ -0,0 +1,27 @@
+import os
+from typing import Dict, Any
+
+# Index documentaire tenu à jour en arrière-plan (corpus_watcher.py)
+CORPUS_CONFIG = {
+    "documents_path": os.getenv("CORPUS_DOCUMENTS_PATH", "Research"),
+    "persist_directory": os.getenv("CORPUS_PERSIST_DIRECTORY", "storage"),
+    # Surveillance du dossier des documents (sinon l'index n'est synchronisé qu'au démarrage)
+    "watch": os.getenv("CORPUS_WATCH", "true").lower() == "true",
+    # Délai sans nouvel événement avant de réindexer (plusieurs fichiers copiés = une seule réindexation)
+    "debounce_seconds": float(os.getenv("CORPUS_DEBOUNCE_SECONDS", "5")),
+    # Index prébuilts (index_build.py) : utilisés à la place de l'indexation au démarrage si présents
+    "index_dir": os.getenv("CORPUS_INDEX_DIR", "indexes"),
+    # Version épinglée (sinon celle désignée par <index_dir>/CURRENT, suivie à chaud)
+    "index_version": os.getenv("CORPUS_INDEX_VERSION", ""),
+    "index_verify": os.getenv("CORPUS_INDEX_VERIFY", "true").lower() == "true",
+    "index_check_interval_seconds": float(os.getenv("CORPUS_INDEX_CHECK_INTERVAL", "10")),
+    # Compression des embeddings d'un index prébuilt monté (0 = 768 dimensions float32)
+    "embedding_dims": int(os.getenv("CORPUS_EMBEDDING_DIMS", "0")),
+    "embedding_int8": os.getenv("CORPUS_EMBEDDING_INT8", "false").lower() == "true",
+    # Candidats re-classés avec les vecteurs complets : rescore_factor * k
+    "rescore_factor": int(os.getenv("CORPUS_RESCORE_FACTOR", "4")),
+}
+
+def get_corpus_config() -> Dict[str, Any]:
+    """Retourne la configuration de l'index documentaire"""
+    return CORPUS_CONFIG
@@ -0,0 +1,326 @@
+"""
+Index documentaires versionnés, construits hors ligne et montés en lecture seule.
+
+Une version est un dossier <index_dir>/<version>/ :
+- vectors.npy    embeddings des extraits (float32, une ligne par extrait)
+- chunks.jsonl   id, texte et métadonnées des extraits, dans le même ordre
+- manifest.json  corpus source (SHA-256 par fichier), découpage, modèle d'embedding,
+                 SHA-256 de chaque fichier de l'artefact
+
+<index_dir>/CURRENT contient la version en service et n'est modifié que par os.replace.
+Au chargement, les vecteurs sont lus tels quels : aucun appel au modèle d'embedding.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import chromadb
+import numpy as np
+from langchain_community.vectorstores import Chroma
+from langchain_ollama import OllamaEmbeddings
+
+from corpus_config import get_corpus_config
+from corpus_watcher import CorpusWatcher, scan_corpus
+from document_loader import EMBEDDING_MODEL, TEXT_SPLITTER, chunk_ids, load_documents, split_documents
+from embedding_compression import CompressedVectorIndex
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+ARTIFACT_FILES = ["vectors.npy", "chunks.jsonl"]
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ===== CONSTRUCTION =====
+
+def build_index(documents_path: str, index_dir: Optional[str] = None, embedding=None,
+                version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Construit une nouvelle version d'index à partir des documents
+
+    Returns:
+        Dict: Manifeste de la version construite
+    """
+    index_dir = index_dir or get_corpus_config()["index_dir"]
+    if not os.path.exists(documents_path):
+        raise FileNotFoundError(f"The specified path does not exist: {documents_path}")
+
+    sources = {os.path.relpath(path, documents_path): sha256_file(path) for path in scan_corpus(documents_path)}
+    corpus_digest = hashlib.sha256(json.dumps(sources, sort_keys=True).encode("utf-8")).hexdigest()
+    version = version or f"{datetime.now():%Y%m%dT%H%M%S}-{corpus_digest[:8]}"
+    target = os.path.join(index_dir, version)
+    if os.path.exists(target):
+        raise ValueError(f"La version {version} existe déjà")
+
+    chunks = split_documents(load_documents(documents_path))
+    ids = chunk_ids(chunks)
+    texts = [chunk.page_content for chunk in chunks]
+    embedding = embedding or OllamaEmbeddings(model=EMBEDDING_MODEL)
+    logger.info(f"Calcul des embeddings de {len(chunks)} extraits")
+    vectors = np.asarray(embedding.embed_documents(texts), dtype=np.float32)
+
+    partial = target + ".partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    os.makedirs(partial)
+    np.save(os.path.join(partial, "vectors.npy"), vectors)
+    with open(os.path.join(partial, "chunks.jsonl"), "w", encoding="utf-8") as f:
+        for chunk_id, chunk in zip(ids, chunks):
+            f.write(json.dumps({"id": chunk_id, "text": chunk.page_content, "metadata": chunk.metadata}, ensure_ascii=False) + "\n")
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "embedding_model": getattr(embedding, "model", type(embedding).__name__),
+        "dimensions": int(vectors.shape[1]) if vectors.size else 0,
+        "splitter": {
+            "type": type(TEXT_SPLITTER).__name__,
+            "chunk_size": TEXT_SPLITTER._chunk_size,
+            "chunk_overlap": TEXT_SPLITTER._chunk_overlap,
+        },
+        "corpus": {"path": documents_path, "sha256": corpus_digest, "files": sources},
+        "chunks": len(chunks),
+        "checksums": {name: sha256_file(os.path.join(partial, name)) for name in ARTIFACT_FILES},
+    }
+    with open(os.path.join(partial, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(partial, target)
+    return manifest
+
+
+# ===== VERSIONS =====
+
+def list_versions(index_dir: Optional[str] = None) -> List[str]:
+    """Versions complètes présentes dans le dossier des index (ordre chronologique)"""
+    index_dir = index_dir or get_corpus_config()["index_dir"]
+    if not os.path.isdir(index_dir):
+        return []
+    return sorted(name for name in os.listdir(index_dir)
+                  if os.path.isfile(os.path.join(index_dir, name, MANIFEST_FILE)))
+
+
+def current_version(index_dir: Optional[str] = None) -> Optional[str]:
+    """Version désignée par CURRENT, ou None"""
+    index_dir = index_dir or get_corpus_config()["index_dir"]
+    try:
+        with open(os.path.join(index_dir, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def read_manifest(index_dir: str, version: str) -> Dict[str, Any]:
+    with open(os.path.join(index_dir, version, MANIFEST_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify_version(index_dir: str, version: str) -> List[str]:
+    """Fichiers de la version dont la somme SHA-256 ne correspond pas au manifeste"""
+    manifest = read_manifest(index_dir, version)
+    return [name for name, checksum in manifest["checksums"].items()
+            if not os.path.isfile(os.path.join(index_dir, version, name))
+            or sha256_file(os.path.join(index_dir, version, name)) != checksum]
+
+
+def activate_version(index_dir: str, version: str):
+    """Met une version en service (remplacement atomique de CURRENT)"""
+    if version not in list_versions(index_dir):
+        raise ValueError(f"Version inconnue: {version}")
+    bad = verify_version(index_dir, version)
+    if bad:
+        raise ValueError(f"Version {version} corrompue: {', '.join(bad)}")
+    tmp_path = os.path.join(index_dir, CURRENT_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, os.path.join(index_dir, CURRENT_FILE))
+
+
+# ===== CHARGEMENT =====
+
+class IndexVersion:
+    """
+    Version d'index montée en mémoire (base vectorielle)
+
+    Par défaut les vecteurs complets sont chargés dans une collection Chroma en mémoire ;
+    avec dims et/ou quantize, dans un CompressedVectorIndex (embedding_compression.py).
+    """
+
+    def __init__(self, index_dir: str, version: str, verify: bool = True, embedding=None,
+                 dims: Optional[int] = None, quantize: bool = False, rescore_factor: int = 4):
+        self.path = os.path.join(index_dir, version)
+        self.manifest = read_manifest(index_dir, version)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Format d'index non pris en charge: {self.manifest.get('format_version')}")
+        if verify:
+            bad = verify_version(index_dir, version)
+            if bad:
+                raise ValueError(f"Version {version} corrompue: {', '.join(bad)}")
+        self.version = version
+
+        # Lecture seule : les fichiers de la version ne sont jamais ouverts en écriture
+        vectors = np.load(os.path.join(self.path, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(self.path, "chunks.jsonl"), encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+
+        # Les requêtes doivent être embeddées avec le modèle qui a construit l'index
+        self.embedding = embedding or OllamaEmbeddings(model=self.manifest["embedding_model"])
+        if dims or quantize:
+            # Vecteurs compressés en mémoire, vecteurs complets lus sur disque pour le re-classement
+            self.store = CompressedVectorIndex(
+                vectors, [chunk["id"] for chunk in chunks], [chunk["text"] for chunk in chunks],
+                [chunk["metadata"] for chunk in chunks], embedding=self.embedding,
+                dims=dims, quantize=quantize, rescore_factor=rescore_factor,
+            )
+            return
+        # Les collections en mémoire sont partagées par tout le processus : une collection par
+        # montage, pour que libérer une version retirée ne touche pas un remontage de la même version
+        self.store = Chroma(
+            collection_name=f"index_{version.replace(':', '-')[:48]}_{uuid.uuid4().hex[:8]}",
+            embedding_function=self.embedding,
+            client=chromadb.EphemeralClient(),
+        )
+        for start in range(0, len(chunks), 1000):
+            batch = chunks[start:start + 1000]
+            self.store._collection.add(
+                ids=[chunk["id"] for chunk in batch],
+                embeddings=vectors[start:start + len(batch)].tolist(),
+                documents=[chunk["text"] for chunk in batch],
+                metadatas=[chunk["metadata"] for chunk in batch],
+            )
+
+    def close(self):
+        """Libère la collection en mémoire"""
+        if not isinstance(self.store, Chroma):
+            return
+        try:
+            self.store.delete_collection()
+        except Exception as e:
+            logger.warning(f"Collection de la version {self.version} non libérée: {e}")
+
+
+class CorpusIndex:
+    """
+    Index prébuilt en service, partagé par le processus.
+
+    Monte la version désignée par CURRENT (ou une version épinglée) et suit les changements
+    du pointeur dans un thread d'arrière-plan : la nouvelle version (vérification comprise)
+    est entièrement chargée avant d'être mise en service en une affectation. Les
+    conversations ne font que lire la version en service. Même interface que CorpusWatcher.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None, version: Optional[str] = None,
+                 verify: Optional[bool] = None, embedding=None):
+        config = get_corpus_config()
+        self.index_dir = index_dir or config["index_dir"]
+        self.pinned_version = version or config["index_version"] or None
+        self.verify = config["index_verify"] if verify is None else verify
+        self.check_interval = config["index_check_interval_seconds"]
+        self.compression = {
+            "dims": config["embedding_dims"] or None,
+            "quantize": config["embedding_int8"],
+            "rescore_factor": config["rescore_factor"],
+        }
+        self.embedding = embedding
+        self._current: Optional[IndexVersion] = None
+        self._retired: Optional[IndexVersion] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, watch: bool = True) -> "CorpusIndex":
+        """Monte la version en service puis, sauf version épinglée, suit le pointeur CURRENT"""
+        version = self.pinned_version or current_version(self.index_dir)
+        if not version:
+            raise FileNotFoundError(f"Aucun index en service dans {self.index_dir}")
+        self.switch(version)
+        if watch and not self.pinned_version and self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="corpus-index", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Arrête le suivi du pointeur"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._current.version if self._current else None
+
+    @property
+    def store(self):
+        return self._current.store
+
+    def as_retriever(self, **kwargs):
+        """Retriever sur la version en service au moment de l'appel"""
+        return self.store.as_retriever(**kwargs)
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4, **kwargs):
+        """Recherche avec scores de pertinence sur la collection active"""
+        return self.store.similarity_search_with_relevance_scores(query, k=k, **kwargs)
+
+    def switch(self, version: str):
+        """Charge une version puis la met en service ; l'ancienne est libérée au changement suivant"""
+        with self._lock:
+            if self._current is not None and self._current.version == version:
+                return
+            started = time.perf_counter()
+            loaded = IndexVersion(self.index_dir, version, verify=self.verify, embedding=self.embedding, **self.compression)
+            previous, self._current = self._current, loaded
+            retired, self._retired = self._retired, previous
+        logger.info(f"Index {version} en service ({loaded.manifest['chunks']} extraits, "
+                    f"chargé en {(time.perf_counter() - started) * 1000:.0f} ms)")
+        if retired is not None:
+            retired.close()
+
+    def refresh(self) -> bool:
+        """
+        Met en service la version désignée par CURRENT si elle a changé
+
+        Returns:
+            bool: True si une nouvelle version a été mise en service
+        """
+        version = current_version(self.index_dir)
+        if not version or version == self.version:
+            return False
+        try:
+            self.switch(version)
+            return True
+        except Exception as e:
+            logger.error(f"Index {version} non chargé, {self.version} reste en service: {e}")
+            return False
+
+    def _run(self):
+        while not self._stop_event.wait(self.check_interval):
+            self.refresh()
+
+    def status(self) -> Dict[str, Any]:
+        return {"version": self.version, "chunks": self._current.manifest["chunks"] if self._current else 0}
+
+
+def open_corpus(documents_path: Optional[str] = None, watch: Optional[bool] = None):
+    """Index prébuilt déployé (CURRENT ou version épinglée) s'il y en a un, sinon index de documents_path tenu à jour"""
+    if get_corpus_config()["index_version"] or current_version():
+        return CorpusIndex().start(watch=watch is not False)
+    return CorpusWatcher(documents_path).start(watch=watch)
@@ -0,0 +1,291 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+from langchain_community.vectorstores import Chroma
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from corpus_config import get_corpus_config
+from document_loader import LOADER_CLASSES, chunk_ids, get_embeddings, load_file, split_documents
+from tracing import span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "corpus_state.json"
+COLLECTION_PREFIX = "corpus_"
+COPY_BATCH_SIZE = 1000
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def scan_corpus(documents_path: str) -> Dict[str, List[float]]:
+    """Empreinte (date de modification, taille) de chaque document indexable, par chemin source"""
+    files = {}
+    for root, _, names in os.walk(documents_path):
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() in LOADER_CLASSES:
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                files[path] = [stat.st_mtime, stat.st_size]
+    return files
+
+
+class _CorpusEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "CorpusWatcher"):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        if any(os.path.splitext(str(path))[1].lower() in LOADER_CLASSES for path in paths if path):
+            self.watcher.notify()
+
+
+class CorpusWatcher:
+    """
+    Index Chroma des documents, partagé par le processus et tenu à jour en arrière-plan.
+
+    Au démarrage, l'index persisté est réutilisé : seuls les fichiers ajoutés, modifiés ou
+    supprimés depuis la dernière indexation sont traités. Les événements du dossier sont
+    regroupés (debounce) puis la mise à jour est construite dans une collection fantôme :
+    les extraits des fichiers inchangés y sont copiés avec leurs embeddings, seuls les
+    fichiers touchés sont ré-embeddés. La collection fantôme remplace ensuite l'active en
+    une affectation ; les conversations en cours ne voient jamais un index partiel et
+    n'attendent jamais l'indexation.
+
+    Plusieurs workers peuvent partager le dossier de persistance : chaque collection porte
+    son propriétaire (hôte, pid) et un processus ne supprime que les collections qu'il a
+    créées, ou celles d'un processus terminé sur le même hôte.
+    """
+
+    def __init__(self, documents_path: Optional[str] = None, persist_directory: Optional[str] = None,
+                 embedding=None, debounce_seconds: Optional[float] = None):
+        config = get_corpus_config()
+        self.documents_path = documents_path or config["documents_path"]
+        self.persist_directory = persist_directory or config["persist_directory"]
+        self.debounce_seconds = config["debounce_seconds"] if debounce_seconds is None else debounce_seconds
+        self.embedding = embedding or get_embeddings()
+        self._store: Optional[Chroma] = None
+        self._files: Dict[str, List[float]] = {}
+        self._retired: Optional[Chroma] = None
+        self._created = set()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._last_event = 0.0
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._observer = None
+
+    # ----- Accès (conversations) -----
+
+    @property
+    def store(self) -> Chroma:
+        """Collection active"""
+        return self._store
+
+    def as_retriever(self, **kwargs):
+        """Retriever sur la collection active au moment de l'appel"""
+        return self._store.as_retriever(**kwargs)
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4, **kwargs):
+        """Recherche avec scores de pertinence sur la collection active"""
+        return self._store.similarity_search_with_relevance_scores(query, k=k, **kwargs)
+
+    # ----- Cycle de vie -----
+
+    def start(self, watch: Optional[bool] = None) -> "CorpusWatcher":
+        """Synchronise l'index puis surveille le dossier des documents"""
+        if not os.path.exists(self.documents_path):
+            raise FileNotFoundError(f"The specified path does not exist: {self.documents_path}")
+        self.sync()
+        watch = get_corpus_config()["watch"] if watch is None else watch
+        with self._lock:
+            if watch and self._thread is None:
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="corpus-watcher", daemon=True)
+                self._thread.start()
+                self._observer = Observer()
+                self._observer.schedule(_CorpusEventHandler(self), self.documents_path, recursive=True)
+                self._observer.start()
+        return self
+
+    def stop(self):
+        """Arrête la surveillance"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = self._observer = None
+
+    def notify(self):
+        """Signale un changement dans le dossier (réindexation après le délai de debounce)"""
+        self._last_event = time.monotonic()
+        self._wake_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake_event.wait()
+            while not self._stop_event.is_set():
+                remaining = self._last_event + self.debounce_seconds - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._stop_event.wait(remaining)
+            if self._stop_event.is_set():
+                return
+            self._wake_event.clear()
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"Erreur lors de la réindexation des documents: {e}")
+
+    # ----- Indexation -----
+
+    def _state_path(self) -> str:
+        return os.path.join(self.persist_directory, STATE_FILE)
+
+    def _open_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> Chroma:
+        return Chroma(collection_name=name, embedding_function=self.embedding, persist_directory=self.persist_directory,
+                      collection_metadata=metadata)
+
+    def _create_collection(self) -> Chroma:
+        """Nouvelle collection fantôme, marquée comme appartenant à ce processus"""
+        name = f"{COLLECTION_PREFIX}{uuid.uuid4().hex[:12]}"
+        collection = self._open_collection(name, {"owner_host": socket.gethostname(), "owner_pid": os.getpid(),
+                                                  "created_at": time.time()})
+        self._created.add(name)
+        return collection
+
+    def _load_state(self):
+        try:
+            with open(self._state_path(), encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._store = self._open_collection(state["collection"])
+        self._files = state["files"]
+        self._drop_orphan_collections(state["collection"])
+
+    def _drop_orphan_collections(self, active: str):
+        """
+        Supprime les collections laissées par un processus terminé (remplacées ou inachevées) ;
+        celles d'un autre worker en vie, d'un autre hôte ou sans propriétaire sont conservées
+        """
+        client = self._store._client
+        host = socket.gethostname()
+        for collection in client.list_collections():
+            name = collection if isinstance(collection, str) else collection.name
+            if not name.startswith(COLLECTION_PREFIX) or name == active or name in self._created:
+                continue
+            metadata = client.get_collection(name).metadata or {}
+            pid = metadata.get("owner_pid")
+            if metadata.get("owner_host") == host and pid and pid != os.getpid() and not _process_alive(int(pid)):
+                logger.info(f"Suppression de la collection orpheline {name}")
+                client.delete_collection(name)
+
+    def _save_state(self, collection_name: str, files: Dict[str, List[float]]):
+        os.makedirs(self.persist_directory, exist_ok=True)
+        tmp_path = self._state_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"collection": collection_name, "files": files}, f, indent=2)
+        os.replace(tmp_path, self._state_path())
+
+    def sync(self) -> bool:
+        """
+        Réindexe les fichiers ajoutés, modifiés ou supprimés
+
+        Returns:
+            bool: True si une nouvelle collection a été mise en service
+        """
+        with self._sync_lock:
+            if self._store is None:
+                self._load_state()
+            files = scan_corpus(self.documents_path)
+            changed = [path for path, fingerprint in files.items() if self._files.get(path) != fingerprint]
+            removed = [path for path in self._files if path not in files]
+            if self._store is not None and not changed and not removed:
+                return False
+
+            with span("corpus.reindex"):
+                logger.info(f"Réindexation des documents: {len(changed)} modifié(s), {len(removed)} supprimé(s)")
+                shadow = self._create_collection()
+                copied = self._copy_unchanged(shadow, set(changed) | set(removed))
+                chunks = split_documents([doc for path in changed for doc in load_file(path)])
+                if chunks:
+                    shadow.add_documents(chunks, ids=chunk_ids(chunks))
+                logger.info(f"Index prêt: {copied} extrait(s) repris, {len(chunks)} extrait(s) ré-embeddé(s)")
+
+            self._swap(shadow, files)
+            return True
+
+    def _copy_unchanged(self, shadow: Chroma, skip: set) -> int:
+        """Copie dans la collection fantôme les extraits (avec embeddings) des fichiers inchangés"""
+        if self._store is None:
+            return 0
+        records = self._store.get(include=["embeddings", "documents", "metadatas"])
+        keep = [i for i, metadata in enumerate(records["metadatas"]) if metadata.get("source") not in skip]
+        for start in range(0, len(keep), COPY_BATCH_SIZE):
+            batch = keep[start:start + COPY_BATCH_SIZE]
+            shadow._collection.add(
+                ids=[records["ids"][i] for i in batch],
+                embeddings=[records["embeddings"][i] for i in batch],
+                documents=[records["documents"][i] for i in batch],
+                metadatas=[records["metadatas"][i] for i in batch],
+            )
+        return len(keep)
+
+    def _swap(self, shadow: Chroma, files: Dict[str, List[float]]):
+        """
+        Met la collection fantôme en service ; l'ancienne est supprimée au remplacement suivant
+        si ce processus l'a créée (une collection reprise de l'état persisté peut servir ailleurs)
+        """
+        with self._lock:
+            previous, self._store, self._files = self._store, shadow, files
+            retired, self._retired = self._retired, previous
+        self._save_state(shadow._collection.name, files)
+        # Une génération de répit : une recherche commencée sur l'ancienne collection se termine
+        if retired is not None and retired._collection.name in self._created:
+            self._created.discard(retired._collection.name)
+            try:
+                retired.delete_collection()
+            except Exception as e:
+                logger.warning(f"Ancienne collection non supprimée: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        """Collection active et nombre de documents indexés"""
+        return {
+            "collection": self._store._collection.name if self._store is not None else None,
+            "files": len(self._files),
+            "watching": self._thread is not None,
+        }
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+def get_corpus_watcher() -> CorpusWatcher:
+    """Retourne l'index documentaire partagé du processus (synchronisé et surveillé au premier appel)"""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = CorpusWatcher().start()
+        return _watcher
@@ -13,4 +13,14 @@ DATABASE_CONFIG = {
 
 def get_database_config() -> Dict[str, Any]:
     """Retourne la configuration de la base de données"""
-    return DATABASE_CONFIG
\ No newline at end of file
+    return DATABASE_CONFIG
+
+# Réservation de places : nouvelles tentatives en cas d'interblocage (1213) ou d'attente de verrou (1205)
+RESERVATION_CONFIG = {
+    "max_retries": int(os.getenv("RESERVATION_MAX_RETRIES", "3")),
+    "retry_backoff_seconds": float(os.getenv("RESERVATION_RETRY_BACKOFF", "0.05")),
+}
+
+def get_reservation_config() -> Dict[str, Any]:
+    """Retourne la configuration des réservations"""
+    return RESERVATION_CONFIG
@@ -1,19 +1,50 @@
 import mysql.connector
 from mysql.connector import Error
-from typing import List, Dict, Any, Optional
-from database_config import get_database_config
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from database_config import get_database_config, get_reservation_config
+from tracing import traced
+from text_normalization import question_hash
+from formation_catalog import get_formation_catalog, invalidate_formation_catalog
 import logging
 import json
+import random
+import re
+import time
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Erreurs MySQL pour lesquelles une réservation est rejouée : interblocage, délai d'attente de verrou
+RETRYABLE_ERRORS = (1213, 1205)
+
+# Tables exportables en masse et leur colonne d'horodatage
+EXPORTABLE_TABLES = {
+    "analytics_events": "timestamp",
+    "analytics_sessions": "created_at",
+    "inscriptions": "date_inscription",
+}
+
+# Événement "question_asked" enregistré à l'ouverture d'une session de qualification (pas une vraie question)
+SESSION_START_QUESTION = "Début de session de qualification"
+
+
+def merge_question_counts(rows: List[Dict[str, Any]], limit: int, min_frequency: int = 1) -> List[Dict[str, Any]]:
+    """Additionne les fréquences des mêmes questions (texte normalisé) et garde les plus fréquentes"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        entry = merged.setdefault(question_hash(row["question_text"]),
+                                  {"question_text": row["question_text"], "frequency": 0})
+        entry["frequency"] += int(row["frequency"] or 0)
+    frequent = [entry for entry in merged.values() if entry["frequency"] >= min_frequency]
+    return sorted(frequent, key=lambda entry: -entry["frequency"])[:limit]
+
 class DatabaseService:
     def __init__(self):
         self.config = get_database_config()
         self.connection = None
     
+    @traced("db.connect")
     def connect(self) -> bool:
         """Établit une connexion à la base de données"""
         try:
@@ -78,6 +109,7 @@ class DatabaseService:
                     client_telephone VARCHAR(20),
                     formation_id INT NOT NULL,
                     session_id INT,
+                    creneau_id INT NULL,
                     statut_qualification ENUM('QUALIFIÉ', 'LISTE_D_ATTENTE', 'REFUSÉ') NOT NULL,
                     score_qualification INT,
                     date_inscription TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -97,6 +129,7 @@ class DatabaseService:
                     label VARCHAR(100) NULL,        -- ex: 'Demi-journée matin'
                     location VARCHAR(100) NULL,     -- ex: 'Paris'
                     capacity INT NULL,              -- optionnel si différent de la formation
+                    places_reservees INT NOT NULL DEFAULT 0,
                     statut ENUM('ouverte', 'complet', 'annulee') DEFAULT 'ouverte',
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (formation_id) REFERENCES formations(id) ON DELETE CASCADE,
@@ -125,36 +158,49 @@ class DatabaseService:
                 )
             """)
 
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS analytics_events (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    session_id VARCHAR(255) NOT NULL,
-                    event_type ENUM('question_asked', 'question_answered', 'abandonment', 'completion', 'qualification') NOT NULL,
-                    event_data JSON,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (session_id) REFERENCES analytics_sessions(session_id) ON DELETE CASCADE,
-                    INDEX (session_id),
-                    INDEX (event_type),
-                    INDEX (timestamp)
-                )
-            """)
+            # Événements partitionnés par mois (voir analytics_retention.py)
+            from analytics_retention import events_table_ddl
+            cursor.execute(events_table_ddl())
 
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS unanswered_questions (
                     id INT AUTO_INCREMENT PRIMARY KEY,
+                    question_hash CHAR(40) NOT NULL,
                     question_text TEXT NOT NULL,
                     frequency INT DEFAULT 1,
                     first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                     status ENUM('new', 'reviewed', 'added_to_faq', 'ignored') DEFAULT 'new',
                     suggested_answer TEXT NULL,
+                    embedding BLOB NULL,            -- vecteur float32 (question_clustering.py)
+                    cluster_id INT NULL,
+                    UNIQUE KEY uq_question_hash (question_hash),
                     INDEX (frequency),
                     INDEX (status),
-                    INDEX (last_seen)
+                    INDEX (last_seen),
+                    INDEX (cluster_id)
+                )
+            """)
+
+            # Regroupements de questions non répondues similaires (calculés par question_clustering.py)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS unanswered_question_clusters (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    representative_text TEXT NOT NULL,
+                    centroid BLOB NOT NULL,
+                    weight DOUBLE NOT NULL DEFAULT 0,
+                    question_count INT NOT NULL DEFAULT 0,
+                    total_frequency INT NOT NULL DEFAULT 0,
+                    sample_questions JSON NULL,
+                    last_seen TIMESTAMP NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX (total_frequency)
                 )
             """)
 
             self.connection.commit()
+            self.migrate_reservation_columns()
+            self.migrate_unanswered_questions()
             logger.info("Tables créées avec succès")
             return True
             
@@ -165,22 +211,55 @@ class DatabaseService:
             if cursor:
                 cursor.close()
     
+    @traced("db.load_formation_catalog")
+    def load_formation_catalog(self) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """Charge toutes les formations et tous les créneaux (pour formation_catalog.py)"""
+        cursor = None
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM formations ORDER BY id")
+            formations = cursor.fetchall()
+            cursor.execute("""
+                SELECT id, formation_id, start_datetime, end_datetime, label, location, capacity, places_reservees, statut
+                FROM formation_sessions
+                ORDER BY start_datetime
+            """)
+            sessions = cursor.fetchall()
+            return formations, sessions
+        except Error as e:
+            logger.error(f"Erreur lors du chargement du catalogue des formations: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+
+    def resolve_formation_id(self, formation_name: str) -> Optional[int]:
+        """Résout un nom de formation saisi librement en id (catalogue en mémoire)"""
+        return get_formation_catalog().resolve(formation_name, db=self)
+
+    @traced("db.get_formation_availability")
     def get_formation_availability(self, formation_name: str) -> Dict[str, Any]:
         """Vérifie la disponibilité d'une formation"""
+        formation_id = self.resolve_formation_id(formation_name)
+        if formation_id is None:
+            return {"disponible": False, "message": "Formation non trouvée"}
+        return self.get_formation_availability_by_id(formation_id)
+
+    @traced("db.get_formation_availability_by_id")
+    def get_formation_availability_by_id(self, formation_id: int) -> Dict[str, Any]:
+        """Vérifie la disponibilité d'une formation par son id"""
+        cursor = None
         try:
             cursor = self.connection.cursor(dictionary=True, buffered=True)
 
             cursor.execute("""
                 SELECT f.*,
                        (f.places_max - f.places_reservees) AS places_disponibles,
-                       COUNT(s.id) AS nb_sessions_ouvertes
+                       (SELECT COUNT(*) FROM sessions_formation s
+                        WHERE s.formation_id = f.id AND s.statut = 'ouverte') AS nb_sessions_ouvertes
                 FROM formations f
-                LEFT JOIN sessions_formation s
-                  ON f.id = s.formation_id AND s.statut = 'ouverte'
-                WHERE f.nom LIKE %s AND f.statut = 'active'
-                GROUP BY f.id
-                LIMIT 1
-            """, (f"%{formation_name}%",))
+                WHERE f.id = %s AND f.statut = 'active'
+            """, (formation_id,))
 
             result = cursor.fetchone()
 
@@ -206,12 +285,97 @@ class DatabaseService:
             if cursor:
                 cursor.close()
 
-    
+    @traced("db.get_qualification_snapshot")
+    def get_qualification_snapshot(self, formation_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Disponibilité, créneaux ouverts avec places restantes et alternatives d'une formation
+        en un seul aller-retour
 
+        Returns:
+            dict: mêmes clés que get_formation_availability_by_id, plus slots, alternatives
+                  et version (à comparer avec get_formation_version) ; None si introuvable
+        """
+        cursor = None
+        try:
+            cursor = self.connection.cursor(dictionary=True, buffered=True)
+            cursor.execute("""
+                SELECT f.id, f.nom, f.places_max, f.places_reservees, f.prix, f.duree_jours, f.statut, f.updated_at,
+                       (SELECT JSON_ARRAYAGG(JSON_OBJECT(
+                                   'id', fs.id,
+                                   'start_datetime', DATE_FORMAT(fs.start_datetime, '%%Y-%%m-%%d %%H:%%i:%%s'),
+                                   'end_datetime', DATE_FORMAT(fs.end_datetime, '%%Y-%%m-%%d %%H:%%i:%%s'),
+                                   'label', fs.label,
+                                   'location', fs.location,
+                                   'capacity', fs.capacity,
+                                   'places_reservees', fs.places_reservees,
+                                   'statut', fs.statut))
+                        FROM formation_sessions fs
+                        WHERE fs.formation_id = f.id AND fs.statut = 'ouverte'
+                          AND (fs.capacity IS NULL OR fs.places_reservees < fs.capacity)) AS slots,
+                       (SELECT JSON_ARRAYAGG(JSON_OBJECT(
+                                   'id', a.id, 'nom', a.nom, 'prix', a.prix,
+                                   'places_disponibles', a.places_disponibles))
+                        FROM (SELECT id, nom, prix, places_max - places_reservees AS places_disponibles
+                              FROM formations
+                              WHERE statut = 'active' AND id != %s AND places_max > places_reservees
+                              ORDER BY nom
+                              LIMIT 5) a) AS alternatives
+                FROM formations f
+                WHERE f.id = %s
+            """, (formation_id, formation_id))
+            result = cursor.fetchone()
+            if not result:
+                return None
 
-    
+            slots = sorted(json.loads(result["slots"] or "[]"), key=lambda slot: slot["start_datetime"])
+            alternatives = sorted(json.loads(result["alternatives"] or "[]"), key=lambda alt: alt["nom"])
+            places_disponibles = result["places_max"] - result["places_reservees"]
+            return {
+                "formation_id": result["id"],
+                "nom": result["nom"],
+                "places_max": result["places_max"],
+                "places_reservees": result["places_reservees"],
+                "places_disponibles": places_disponibles,
+                "nb_sessions_ouvertes": len(slots),
+                "disponible": result["statut"] == "active" and places_disponibles > 0,
+                "prix": result["prix"],
+                "duree_jours": result["duree_jours"],
+                "slots": slots,
+                "alternatives": alternatives,
+                "version": _formation_version(result["places_reservees"], result["statut"], result["updated_at"]),
+            }
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération de l'instantané de qualification: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+
+    @traced("db.get_formation_version")
+    def get_formation_version(self, formation_id: int) -> Optional[str]:
+        """Version courante d'une formation (change à chaque réservation ou mise à jour)"""
+        cursor = None
+        try:
+            cursor = self.connection.cursor(buffered=True)
+            cursor.execute("SELECT places_reservees, statut, updated_at FROM formations WHERE id = %s", (formation_id,))
+            result = cursor.fetchone()
+            return _formation_version(*result) if result else None
+        except Error as e:
+            logger.error(f"Erreur lors de la vérification de version de la formation: {e}")
+            return None
+        finally:
+            if cursor:
+                cursor.close()
+
+    @traced("db.get_alternative_formations")
     def get_alternative_formations(self, formation_name: str) -> List[Dict[str, Any]]:
         """Retourne des formations alternatives disponibles"""
+        return self.get_alternative_formations_by_id(self.resolve_formation_id(formation_name))
+
+    @traced("db.get_alternative_formations_by_id")
+    def get_alternative_formations_by_id(self, formation_id: Optional[int]) -> List[Dict[str, Any]]:
+        """Retourne des formations alternatives disponibles (hors formation_id)"""
+        cursor = None
         try:
             cursor = self.connection.cursor(dictionary=True)
             
@@ -220,11 +384,11 @@ class DatabaseService:
                        (f.places_max - f.places_reservees) as places_disponibles
                 FROM formations f
                 WHERE f.statut = 'active' 
-                AND f.nom != %s
+                AND f.id != %s
                 AND (f.places_max - f.places_reservees) > 0
                 ORDER BY f.nom
                 LIMIT 5
-            """, (formation_name,))
+            """, (formation_id or 0,))
             
             return cursor.fetchall()
             
@@ -237,93 +401,145 @@ class DatabaseService:
 
     def list_sessions_by_formation_name(self, formation_name: str) -> List[Dict[str, Any]]:
         """Retourne les créneaux (date/heure) d'une formation, triés par début."""
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT fs.id,
-                       fs.start_datetime,
-                       fs.end_datetime,
-                       fs.label,
-                       fs.location,
-                       fs.capacity,
-                       fs.statut
-                FROM formation_sessions fs
-                JOIN formations f ON f.id = fs.formation_id
-                WHERE f.nom LIKE %s
-                ORDER BY fs.start_datetime
-            """, (f"%{formation_name}%",))
-            return cursor.fetchall()
-        except Error as e:
-            logger.error(f"Erreur lors de la récupération des sessions: {e}")
+        formation_id = self.resolve_formation_id(formation_name)
+        if formation_id is None:
             return []
-        finally:
-            if cursor:
-                cursor.close()
+        return self.list_sessions_by_formation_id(formation_id)
+
+    def list_sessions_by_formation_id(self, formation_id: int) -> List[Dict[str, Any]]:
+        """Retourne les créneaux d'une formation par son id (catalogue en mémoire)"""
+        return get_formation_catalog().get_sessions(formation_id, db=self)
 
     def get_formation_by_name(self, formation_name: str) -> Optional[Dict[str, Any]]:
         """Récupère les informations d'une formation par son nom."""
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM formations WHERE nom LIKE %s LIMIT 1", (f"%{formation_name}%",))
-            return cursor.fetchone()
-        except Exception as e:
-            logger.error(f"Erreur lors de la récupération de la formation: {e}")
+        formation_id = self.resolve_formation_id(formation_name)
+        if formation_id is None:
             return None
-        finally:
-            if cursor:
-                cursor.close()
+        return self.get_formation_by_id(formation_id)
+
+    def get_formation_by_id(self, formation_id: int) -> Optional[Dict[str, Any]]:
+        """Récupère les informations d'une formation par son id (catalogue en mémoire)"""
+        return get_formation_catalog().get_formation(formation_id, db=self)
     
-    def reserve_place(self, formation_id: int, client_info: Dict[str, Any], 
-                     statut_qualification: str, score: int) -> bool:
-        """Réserve une place pour un client"""
+    def migrate_reservation_columns(self) -> bool:
+        """Ajoute le suivi des places par créneau (formation_sessions.places_reservees, inscriptions.creneau_id)"""
+        cursor = None
         try:
-            cursor = self.connection.cursor()
-            
-            
+            cursor = self.connection.cursor(buffered=True)
             cursor.execute("""
-                SELECT places_max, places_reservees 
-                FROM formations 
-                WHERE id = %s AND statut = 'active'
-            """, (formation_id,))
-            
-            result = cursor.fetchone()
-            if not result or result[1] >= result[0]:
-                return False
-            
-            
-            cursor.execute("""
-                INSERT INTO inscriptions 
-                (client_nom, client_prenom, client_email, client_telephone, 
-                 formation_id, statut_qualification, score_qualification)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                client_info.get('nom', ''),
-                client_info.get('prenom', ''),
-                client_info.get('email', ''),
-                client_info.get('numero_telephone', ''),
-                formation_id,
-                statut_qualification,
-                score
-            ))
-            
-            
+                SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND ((TABLE_NAME = 'formation_sessions' AND COLUMN_NAME = 'places_reservees')
+                    OR (TABLE_NAME = 'inscriptions' AND COLUMN_NAME = 'creneau_id'))
+            """)
+            existing = {row[0] for row in cursor.fetchall()}
+            if "formation_sessions" not in existing:
+                cursor.execute("ALTER TABLE formation_sessions ADD COLUMN places_reservees INT NOT NULL DEFAULT 0 AFTER capacity")
+            if "inscriptions" not in existing:
+                cursor.execute("ALTER TABLE inscriptions ADD COLUMN creneau_id INT NULL AFTER session_id")
+
             cursor.execute("""
-                UPDATE formations 
-                SET places_reservees = places_reservees + 1
-                WHERE id = %s
-            """, (formation_id,))
-            
+                SELECT COUNT(*) FROM information_schema.KEY_COLUMN_USAGE
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'inscriptions'
+                  AND COLUMN_NAME = 'creneau_id' AND REFERENCED_TABLE_NAME = 'formation_sessions'
+            """)
+            if not cursor.fetchone()[0]:
+                cursor.execute("""
+                    ALTER TABLE inscriptions
+                        ADD CONSTRAINT fk_inscriptions_creneau FOREIGN KEY (creneau_id) REFERENCES formation_sessions(id)
+                """)
             self.connection.commit()
-            logger.info(f"Place réservée pour {client_info.get('prenom', '')} {client_info.get('nom', '')}")
             return True
-            
         except Error as e:
-            logger.error(f"Erreur lors de la réservation: {e}")
-            self.connection.rollback()
+            logger.error(f"Erreur lors de la migration des colonnes de réservation: {e}")
             return False
         finally:
             if cursor:
                 cursor.close()
+
+    @traced("db.reserve_place")
+    def reserve_place(self, formation_id: int, client_info: Dict[str, Any], 
+                     statut_qualification: str, score: int, creneau_id: Optional[int] = None) -> bool:
+        """
+        Réserve une place pour un client (et sur le créneau choisi) de façon atomique
+
+        Chaque compteur est incrémenté par un UPDATE conditionnel qui échoue si la capacité
+        est atteinte : aucune surréservation possible, même sous forte concurrence. Les verrous
+        sont toujours pris dans le même ordre (formation puis créneau) et la transaction est
+        rejouée un nombre limité de fois en cas d'interblocage.
+
+        Args:
+            formation_id: Id de la formation
+            client_info: Informations du client
+            statut_qualification: Statut issu de la qualification
+            score: Score de qualification
+            creneau_id: Id du créneau choisi dans formation_sessions (optionnel)
+
+        Returns:
+            bool: True si la place a été réservée
+        """
+        config = get_reservation_config()
+        for attempt in range(config["max_retries"] + 1):
+            cursor = None
+            try:
+                cursor = self.connection.cursor()
+
+                cursor.execute("""
+                    UPDATE formations
+                    SET places_reservees = places_reservees + 1
+                    WHERE id = %s AND statut = 'active' AND places_reservees < places_max
+                """, (formation_id,))
+                if cursor.rowcount != 1:
+                    self.connection.rollback()
+                    return False
+
+                if creneau_id:
+                    # statut est évalué après l'incrément (affectations de gauche à droite)
+                    cursor.execute("""
+                        UPDATE formation_sessions
+                        SET places_reservees = places_reservees + 1,
+                            statut = IF(capacity IS NOT NULL AND places_reservees >= capacity, 'complet', statut)
+                        WHERE id = %s AND formation_id = %s AND statut = 'ouverte'
+                          AND (capacity IS NULL OR places_reservees < capacity)
+                    """, (creneau_id, formation_id))
+                    if cursor.rowcount != 1:
+                        self.connection.rollback()
+                        return False
+
+                cursor.execute("""
+                    INSERT INTO inscriptions 
+                    (client_nom, client_prenom, client_email, client_telephone, 
+                     formation_id, creneau_id, statut_qualification, score_qualification)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    client_info.get('nom', ''),
+                    client_info.get('prenom', ''),
+                    client_info.get('email', ''),
+                    client_info.get('numero_telephone', ''),
+                    formation_id,
+                    creneau_id,
+                    statut_qualification,
+                    score
+                ))
+
+                self.connection.commit()
+                invalidate_formation_catalog()
+                logger.info(f"Place réservée pour {client_info.get('prenom', '')} {client_info.get('nom', '')}")
+                return True
+
+            except Error as e:
+                self.connection.rollback()
+                if e.errno in RETRYABLE_ERRORS and attempt < config["max_retries"]:
+                    delay = config["retry_backoff_seconds"] * (2 ** attempt) * random.uniform(0.5, 1.5)
+                    logger.warning(f"Réservation rejouée après l'erreur {e.errno} (tentative {attempt + 1}), attente {delay:.3f}s")
+                    time.sleep(delay)
+                    continue
+                logger.error(f"Erreur lors de la réservation: {e}")
+                return False
+            finally:
+                if cursor:
+                    cursor.close()
+        return False
     
     def populate_sample_data(self):
         """Remplit la base avec des données d'exemple"""
@@ -348,6 +564,7 @@ class DatabaseService:
                 """, formation)
             
             self.connection.commit()
+            invalidate_formation_catalog()
             logger.info("Données d'exemple insérées")
             
         except Error as e:
@@ -358,6 +575,7 @@ class DatabaseService:
 
     
     
+    @traced("db.start_analytics_session")
     def start_analytics_session(self, session_id: str, client_info: dict = None) -> bool:
         """Démarre une session de tracking analytics"""
         try:
@@ -376,6 +594,7 @@ class DatabaseService:
             if cursor:
                 cursor.close()
 
+    @traced("db.end_analytics_session")
     def end_analytics_session(self, session_id: str, completion_status: str, 
                             qualification_status: str = None, duration_seconds: int = None) -> bool:
         """Termine une session de tracking analytics"""
@@ -398,6 +617,7 @@ class DatabaseService:
             if cursor:
                 cursor.close()
 
+    @traced("db.log_analytics_event")
     def log_analytics_event(self, session_id: str, event_type: str, event_data: dict = None) -> bool:
         """Enregistre un événement analytics"""
         try:
@@ -415,26 +635,309 @@ class DatabaseService:
             if cursor:
                 cursor.close()
 
+    @traced("db.log_unanswered_question")
     def log_unanswered_question(self, question_text: str) -> bool:
         """Enregistre une question non répondue"""
+        return self.upsert_unanswered_questions([(question_hash(question_text), question_text, 1)])
+
+    @traced("db.upsert_unanswered_questions")
+    def upsert_unanswered_questions(self, rows: List[Tuple[str, str, int]]) -> bool:
+        """
+        Ajoute des occurrences de questions non répondues en une seule requête
+
+        Args:
+            rows: Liste de (hash du texte normalisé, texte, nombre d'occurrences)
+        """
+        cursor = None
         try:
             cursor = self.connection.cursor()
-            cursor.execute("""
-                INSERT INTO unanswered_questions (question_text, frequency)
-                VALUES (%s, 1)
-                ON DUPLICATE KEY UPDATE 
-                    frequency = frequency + 1,
+            cursor.executemany("""
+                INSERT INTO unanswered_questions (question_hash, question_text, frequency)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    frequency = frequency + VALUES(frequency),
                     last_seen = NOW()
-            """, (question_text,))
+            """, rows)
             self.connection.commit()
             return True
         except Error as e:
-            logger.error(f"Erreur lors de l'enregistrement de question non répondue: {e}")
+            logger.error(f"Erreur lors de l'enregistrement de questions non répondues: {e}")
             return False
         finally:
             if cursor:
                 cursor.close()
 
+    def migrate_unanswered_questions(self, chunk_size: int = 5000) -> bool:
+        """
+        Ajoute la clé question_hash à une table unanswered_questions existante
+        et fusionne les doublons (fréquences additionnées)
+        """
+        cursor = None
+        try:
+            cursor = self.connection.cursor(buffered=True)
+            cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'unanswered_questions'
+                  AND COLUMN_NAME = 'question_hash'
+            """)
+            if cursor.fetchone()[0]:
+                self._add_clustering_columns(cursor)
+                return True
+
+            logger.info("Migration de unanswered_questions (ajout de question_hash)")
+            cursor.execute("ALTER TABLE unanswered_questions ADD COLUMN question_hash CHAR(40) NULL AFTER id")
+            last_id = 0
+            while True:
+                cursor.execute("""
+                    SELECT id, question_text FROM unanswered_questions
+                    WHERE id > %s ORDER BY id LIMIT %s
+                """, (last_id, chunk_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                cursor.executemany("UPDATE unanswered_questions SET question_hash = %s WHERE id = %s",
+                                   [(question_hash(text), row_id) for row_id, text in rows])
+                self.connection.commit()
+                last_id = rows[-1][0]
+
+            cursor.execute("""
+                UPDATE unanswered_questions u
+                JOIN (
+                    SELECT question_hash, MIN(id) AS keep_id, SUM(frequency) AS total,
+                           MIN(first_seen) AS first_seen, MAX(last_seen) AS last_seen
+                    FROM unanswered_questions
+                    GROUP BY question_hash
+                    HAVING COUNT(*) > 1
+                ) d ON u.id = d.keep_id
+                SET u.frequency = d.total, u.first_seen = d.first_seen, u.last_seen = d.last_seen
+            """)
+            cursor.execute("""
+                DELETE u FROM unanswered_questions u
+                JOIN (
+                    SELECT question_hash, MIN(id) AS keep_id
+                    FROM unanswered_questions
+                    GROUP BY question_hash
+                ) k ON u.question_hash = k.question_hash AND u.id <> k.keep_id
+            """)
+            cursor.execute("""
+                ALTER TABLE unanswered_questions
+                    MODIFY question_hash CHAR(40) NOT NULL,
+                    ADD UNIQUE KEY uq_question_hash (question_hash)
+            """)
+            self._add_clustering_columns(cursor)
+            self.connection.commit()
+            return True
+        except Error as e:
+            logger.error(f"Erreur lors de la migration de unanswered_questions: {e}")
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+
+    def _add_clustering_columns(self, cursor):
+        """Ajoute les colonnes embedding et cluster_id à une table unanswered_questions existante"""
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'unanswered_questions'
+              AND COLUMN_NAME = 'cluster_id'
+        """)
+        if not cursor.fetchone()[0]:
+            cursor.execute("""
+                ALTER TABLE unanswered_questions
+                    ADD COLUMN embedding BLOB NULL,
+                    ADD COLUMN cluster_id INT NULL,
+                    ADD INDEX (cluster_id)
+            """)
+
+    # ===== REGROUPEMENT DES QUESTIONS NON RÉPONDUES =====
+
+    @traced("db.get_questions_to_embed")
+    def get_questions_to_embed(self, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Questions non répondues dont l'embedding n'a pas encore été calculé"""
+        cursor = None
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT id, question_text, frequency
+                FROM unanswered_questions
+                WHERE embedding IS NULL
+                ORDER BY frequency DESC, id
+                LIMIT %s
+            """, (limit,))
+            return cursor.fetchall()
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des questions à regrouper: {e}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+
+    @traced("db.get_embedded_questions")
+    def get_embedded_questions(self) -> List[Dict[str, Any]]:
+        """Questions non répondues déjà vectorisées (pour un regroupement complet)"""
+        cursor = None
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT id, question_text, frequency, embedding
+                FROM unanswered_questions
+                WHERE embedding IS NOT NULL
+                ORDER BY frequency DESC, id
+            """)
+            return cursor.fetchall()
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des questions vectorisées: {e}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+
+    @traced("db.get_question_clusters")
+    def get_question_clusters(self) -> List[Dict[str, Any]]:
+        """Centroïdes des regroupements existants"""
+        cursor = None
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute("SELECT id, representative_text, centroid, weight FROM unanswered_question_clusters ORDER BY id")
+            return cursor.fetchall()
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des regroupements: {e}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+
+    @traced("db.save_question_clusters")
+    def save_question_clusters(self, clusters: List[Dict[str, Any]], assignments: List[Tuple[bytes, int, int]],
+                               replace: bool = False) -> bool:
+        """
+        Enregistre les regroupements et l'affectation des questions dans une transaction
+
+        Args:
+            clusters: dicts id (None pour un nouveau regroupement), key, representative_text, centroid, weight
+            assignments: Liste de (embedding, clé du regroupement, id de la question)
+            replace: Remplace tous les regroupements existants (regroupement complet)
+        """
+        cursor = None
+        try:
+            cursor = self.connection.cursor()
+            if replace:
+                cursor.execute("UPDATE unanswered_questions SET cluster_id = NULL WHERE cluster_id IS NOT NULL")
+                cursor.execute("DELETE FROM unanswered_question_clusters")
+
+            cluster_ids = {}
+            for cluster in clusters:
+                if cluster["id"] is None:
+                    cursor.execute("""
+                        INSERT INTO unanswered_question_clusters (representative_text, centroid, weight)
+                        VALUES (%s, %s, %s)
+                    """, (cluster["representative_text"], cluster["centroid"], cluster["weight"]))
+                    cluster_ids[cluster["key"]] = cursor.lastrowid
+                else:
+                    cursor.execute("""
+                        UPDATE unanswered_question_clusters SET centroid = %s, weight = %s WHERE id = %s
+                    """, (cluster["centroid"], cluster["weight"], cluster["id"]))
+                    cluster_ids[cluster["key"]] = cluster["id"]
+
+            cursor.executemany("UPDATE unanswered_questions SET embedding = %s, cluster_id = %s WHERE id = %s",
+                               [(embedding, cluster_ids[key], question_id) for embedding, key, question_id in assignments])
+            self.connection.commit()
+            return True
+        except Error as e:
+            logger.error(f"Erreur lors de l'enregistrement des regroupements: {e}")
+            self.connection.rollback()
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+
+    @traced("db.refresh_question_cluster_stats")
+    def refresh_question_cluster_stats(self, samples_per_cluster: int = 5) -> bool:
+        """Recalcule fréquence totale, nombre de variantes et exemples de chaque regroupement"""
+        cursor = None
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                UPDATE unanswered_question_clusters c
+                LEFT JOIN (
+                    SELECT cluster_id, COUNT(*) AS question_count, SUM(frequency) AS total_frequency,
+                           MAX(last_seen) AS last_seen
+                    FROM unanswered_questions
+                    WHERE status = 'new' AND cluster_id IS NOT NULL
+                    GROUP BY cluster_id
+                ) s ON c.id = s.cluster_id
+                SET c.question_count = COALESCE(s.question_count, 0),
+                    c.total_frequency = COALESCE(s.total_frequency, 0),
+                    c.last_seen = s.last_seen
+            """)
+            cursor.execute("""
+                SELECT cluster_id, question_text FROM (
+                    SELECT cluster_id, question_text,
+                           ROW_NUMBER() OVER (PARTITION BY cluster_id ORDER BY frequency DESC, id) AS position
+                    FROM unanswered_questions
+                    WHERE status = 'new' AND cluster_id IS NOT NULL
+                ) ranked
+                WHERE position <= %s
+            """, (samples_per_cluster,))
+            samples: Dict[int, List[str]] = {}
+            for cluster_id, question_text in cursor.fetchall():
+                samples.setdefault(cluster_id, []).append(question_text)
+            cursor.executemany("UPDATE unanswered_question_clusters SET sample_questions = %s WHERE id = %s",
+                               [(json.dumps(texts, ensure_ascii=False), cluster_id) for cluster_id, texts in samples.items()])
+            self.connection.commit()
+            return True
+        except Error as e:
+            logger.error(f"Erreur lors du calcul des statistiques des regroupements: {e}")
+            return False
+        finally:
+            if cursor:
+                cursor.close()
+
+    # ===== QUESTIONS FRÉQUENTES =====
+
+    @traced("db.get_frequent_questions")
+    def get_frequent_questions(self, limit: int = 200, min_frequency: int = 2, days: int = 90) -> List[Dict[str, Any]]:
+        """
+        Questions les plus posées : questions non répondues (hors ignorées) et questions
+        des événements analytics "question_asked" des N derniers jours, fréquences additionnées
+
+        Returns:
+            list: [{"question_text", "frequency"}] par fréquence décroissante
+        """
+        cursor = None
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT question_text, frequency
+                FROM unanswered_questions
+                WHERE status <> 'ignored'
+                ORDER BY frequency DESC, last_seen DESC
+                LIMIT %s
+            """, (limit,))
+            rows = cursor.fetchall()
+            cursor.execute("""
+                SELECT question_text, COUNT(*) AS frequency
+                FROM (
+                    SELECT JSON_UNQUOTE(JSON_EXTRACT(event_data, '$.question')) AS question_text
+                    FROM analytics_events
+                    WHERE event_type = 'question_asked'
+                      AND timestamp >= DATE_SUB(NOW(), INTERVAL %s DAY)
+                ) questions
+                WHERE question_text IS NOT NULL AND question_text <> %s
+                GROUP BY question_text
+                ORDER BY frequency DESC
+                LIMIT %s
+            """, (days, SESSION_START_QUESTION, limit))
+            rows += cursor.fetchall()
+        except Error as e:
+            logger.error(f"Erreur lors de la récupération des questions fréquentes: {e}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+        return merge_question_counts(rows, limit, min_frequency)
+
+    @traced("db.get_analytics_metrics")
     def get_analytics_metrics(self, days: int = 30) -> dict:
         """Récupère les métriques analytics des derniers N jours"""
         try:
@@ -485,7 +988,18 @@ class DatabaseService:
             """)
             unanswered_questions = cursor.fetchall()
 
-           
+            # Regroupements précalculés (question_clustering.py)
+            cursor.execute("""
+                SELECT id, representative_text, question_count, total_frequency, sample_questions, last_seen
+                FROM unanswered_question_clusters
+                WHERE total_frequency > 0
+                ORDER BY total_frequency DESC, last_seen DESC
+                LIMIT 10
+            """)
+            unanswered_clusters = cursor.fetchall()
+            for cluster in unanswered_clusters:
+                cluster['sample_questions'] = json.loads(cluster['sample_questions'] or "[]")
+
             avg_seconds = duration_metrics.get('avg_duration_seconds') or 0
             median_seconds = duration_metrics.get('median_duration_seconds') or 0
             
@@ -497,7 +1011,8 @@ class DatabaseService:
                 'qualified_count': qualification_metrics.get('qualified_count', 0),
                 'avg_duration_minutes': round(avg_seconds / 60, 1) if avg_seconds > 0 else 0,
                 'median_duration_minutes': round(median_seconds / 60, 1) if median_seconds > 0 else 0,
-                'top_unanswered_questions': unanswered_questions
+                'top_unanswered_questions': unanswered_questions,
+                'top_unanswered_clusters': unanswered_clusters
             }
 
         except Error as e:
@@ -507,6 +1022,57 @@ class DatabaseService:
             if cursor:
                 cursor.close()
 
+    def stream_table_rows(self, table: str, after_id: int = 0, since: Optional[str] = None,
+                          chunk_size: int = 5000, partition: Optional[str] = None) -> Iterator[Tuple[List[str], List[tuple]]]:
+        """
+        Parcourt une table par blocs (pagination par clé sur id) avec un curseur non bufferisé
+
+        Args:
+            table: Table exportable (voir EXPORTABLE_TABLES)
+            after_id: Ne retourne que les lignes d'id strictement supérieur
+            since: Ne retourne que les lignes postérieures à cet horodatage (YYYY-MM-DD[ HH:MM:SS])
+            chunk_size: Nombre de lignes par bloc
+            partition: Ne lit qu'une partition mensuelle (pAAAAMM)
+
+        Yields:
+            tuple: (noms des colonnes, lignes du bloc)
+        """
+        if table not in EXPORTABLE_TABLES:
+            raise ValueError(f"Table non exportable: {table}")
+        timestamp_column = EXPORTABLE_TABLES[table]
+        source = table
+        if partition:
+            if not re.match(r"^p\d{6}$", partition):
+                raise ValueError(f"Partition invalide: {partition}")
+            source = f"{table} PARTITION ({partition})"
+
+        last_id = after_id
+        while True:
+            cursor = self.connection.cursor(buffered=False)
+            try:
+                query = f"SELECT * FROM {source} WHERE id > %s"
+                params = [last_id]
+                if since:
+                    query += f" AND {timestamp_column} >= %s"
+                    params.append(since)
+                query += " ORDER BY id LIMIT %s"
+                params.append(chunk_size)
+                cursor.execute(query, params)
+                columns = [column[0] for column in cursor.description]
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+
+            if not rows:
+                return
+            yield columns, rows
+            last_id = rows[-1][columns.index("id")]
+            if len(rows) < chunk_size:
+                return
+
+def _formation_version(places_reservees: int, statut: str, updated_at) -> str:
+    return f"{places_reservees}:{statut}:{updated_at}"
+
 def get_database_service() -> DatabaseService:
         """Retourne une instance du service de base de données"""
         return DatabaseService()
@@ -10,33 +10,71 @@ from langchain_ollama import OllamaEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+from nlu import formation_id_from_source
+
 import logging
 os.environ["CHROMA_TELEMETRY_ANONYMOUS"] = "False" 
 logging.getLogger("chromadb").setLevel(logging.WARNING)
 
 PERSIST_DIRECTORY = "storage"
 TEXT_SPLITTER = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+EMBEDDING_MODEL = "nomic-embed-text:latest"
+LOADER_CLASSES = {".pdf": PyPDFLoader, ".md": TextLoader}
+
+
+def get_embeddings() -> OllamaEmbeddings:
+    return OllamaEmbeddings(model=EMBEDDING_MODEL)
 
 
-def load_documents_into_database(model_name: str, documents_path: str, reload: bool = True) -> Chroma:
+def load_documents_into_database(model_name: str, documents_path: str, reload: bool = True,
+                                 persist_directory: str = PERSIST_DIRECTORY) -> Chroma:
     if reload:
         print("Loading documents")
         raw_documents = load_documents(documents_path)
-        documents = TEXT_SPLITTER.split_documents(raw_documents)
+        documents = split_documents(raw_documents)
         print("Creating embeddings and loading documents into Chroma")
         return Chroma.from_documents(
             documents=documents,
-            embedding=OllamaEmbeddings(model="nomic-embed-text:latest"),
-            persist_directory=PERSIST_DIRECTORY
+            embedding=get_embeddings(),
+            persist_directory=persist_directory
         )
     else:
         return Chroma(
-            embedding_function=OllamaEmbeddings(model="nomic-embed-text:latest"),
-            persist_directory=PERSIST_DIRECTORY
+            embedding_function=get_embeddings(),
+            persist_directory=persist_directory
         )
 
 
 
+def tag_formations(documents: List[Document]) -> List[Document]:
+    """Ajoute à chaque extrait l'identifiant de la formation décrite par son fichier source"""
+    for document in documents:
+        document.metadata["formation_id"] = formation_id_from_source(document.metadata.get("source", ""))
+    return documents
+
+
+def split_documents(raw_documents: List[Document]) -> List[Document]:
+    """Découpe les documents en extraits étiquetés par formation"""
+    return tag_formations(TEXT_SPLITTER.split_documents(raw_documents))
+
+
+def chunk_ids(chunks: List[Document]) -> List[str]:
+    """Identifiants stables des extraits : chemin source + rang dans le fichier"""
+    counters = {}
+    ids = []
+    for chunk in chunks:
+        source = chunk.metadata.get("source", "")
+        counters[source] = counters.get(source, 0) + 1
+        ids.append(f"{source}#{counters[source]}")
+    return ids
+
+
+def load_file(file_path: str) -> List[Document]:
+    """Charge un seul fichier (.pdf ou .md), avec les mêmes métadonnées que load_documents"""
+    loader_cls = LOADER_CLASSES[os.path.splitext(file_path)[1].lower()]
+    return loader_cls(file_path).load()
+
+
 def load_documents(path: str) -> List[Document]:
 
     if not os.path.exists(path):
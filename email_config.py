@@ -8,7 +8,7 @@ EMAIL_CONFIG = {
     "email_user": os.getenv("EMAIL_USER", "votre email"),
     "email_password": os.getenv("EMAIL_PASSWORD", "mot de passe"),
     "team_email": os.getenv("TEAM_EMAIL", "equipe email"),
-    "use_tls": True
+    "use_tls": os.getenv("SMTP_USE_TLS", "true").lower() == "true"
 }
 
 def get_email_config() -> Dict[str, Any]:
@@ -4,6 +4,7 @@ from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 from typing import Dict, Any, Optional
 from email_config import get_email_config
+from tracing import traced
 import logging
 
 # Configuration du logging
@@ -14,6 +15,7 @@ class EmailService:
     def __init__(self):
         self.config = get_email_config()
     
+    @traced("smtp.send_inscription_email")
     def send_inscription_email(self, client_info: Dict[str, Any], formation_details: str) -> bool:
         """
         Envoie un email à l'équipe avec les informations du client qui souhaite s'inscrire
@@ -119,6 +121,7 @@ def send_inscription_notification(client_info: Dict[str, Any], formation_details
 
 
 
+@traced("smtp.send_client_notification")
 def send_client_notification(client_info: dict, status: str, formation_details: str = ""):
     """
     Envoie un email de notification au client selon son statut de qualification
@@ -129,11 +132,11 @@ def send_client_notification(client_info: dict, status: str, formation_details:
         formation_details: Détails de la formation et du créneau choisi
     """
     try:
-     
-        smtp_server = "smtp.gmail.com"
-        smtp_port = 587
-        sender_email = "hajarelaouni43@gmail.com"  
-        sender_password = "rtsa ynab dwfi leso"  
+        config = get_email_config()
+        smtp_server = config["smtp_server"]
+        smtp_port = config["smtp_port"]
+        sender_email = config["email_user"]
+        sender_password = config["email_password"]
         
         
        
@@ -228,7 +231,8 @@ L'équipe Dream Pastry
         msg.attach(MIMEText(body, 'plain', 'utf-8'))
         
         server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
+        if config["use_tls"]:
+            server.starttls()
         server.login(sender_email, sender_password)
         text = msg.as_string()
         server.sendmail(sender_email, recipient_email, text)
@@ -0,0 +1,198 @@
+"""
+Stockage compressé des embeddings pour la recherche documentaire.
+
+Les vecteurs gardés en mémoire peuvent être :
+- tronqués aux premières dimensions puis renormalisés (Matryoshka : 256 ou 512 sur 768 pour
+  nomic-embed-text v1.5, entraîné pour que les premières dimensions portent l'essentiel) ;
+- quantifiés en int8 avec une échelle par vecteur (4 fois moins de mémoire que float32).
+La recherche approchée sélectionne rescore_factor * k candidats, puis ceux-ci sont
+re-classés avec les vecteurs float complets, lus à la demande depuis le fichier (memmap)
+sans être chargés en mémoire.
+"""
+
+import json
+import math
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# Lignes traitées par bloc lors du calcul des scores (borne la mémoire temporaire en int8)
+SCORE_BLOCK_ROWS = 8192
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def truncate(vectors: np.ndarray, dims: Optional[int]) -> np.ndarray:
+    """Premières dimensions (Matryoshka), renormalisées"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dims:
+        vectors = vectors[..., :dims]
+    return normalize_rows(vectors).astype(np.float32)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantification symétrique par ligne : vectors ≈ codes * scales"""
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def matches_filter(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    """Sous-ensemble des filtres Chroma : égalité, $eq, $ne, $in, $nin, $and, $or"""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if operator == "$eq" and value != operand:
+                    return False
+                if operator == "$ne" and value == operand:
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class CompressedVectorIndex:
+    """
+    Index vectoriel en mémoire sur des embeddings tronqués et/ou quantifiés, avec
+    re-classement exact des meilleurs candidats. Expose la même interface de recherche
+    que Chroma pour retrieval.py (as_retriever, similarity_search, filtres de métadonnées).
+    """
+
+    def __init__(self, vectors: np.ndarray, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]],
+                 embedding=None, dims: Optional[int] = None, quantize: bool = False, rescore_factor: int = 4):
+        """
+        Args:
+            vectors: Embeddings float complets (de préférence np.load(..., mmap_mode="r"))
+            dims: Dimensions conservées en mémoire (None = toutes)
+            quantize: Stocker les vecteurs en int8
+            rescore_factor: Candidats re-classés en float = rescore_factor * k (0 = pas de re-classement)
+        """
+        if dims and dims > vectors.shape[1]:
+            raise ValueError(f"{dims} dimensions demandées, l'index en a {vectors.shape[1]}")
+        self.full_vectors = vectors
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.embedding = embedding
+        self.dims = dims or None
+        self.quantized = quantize
+        self.rescore_factor = rescore_factor
+
+        reduced = np.concatenate([truncate(vectors[start:start + SCORE_BLOCK_ROWS], self.dims)
+                                  for start in range(0, len(vectors), SCORE_BLOCK_ROWS)]) \
+            if len(vectors) else np.zeros((0, self.dims or vectors.shape[1]), dtype=np.float32)
+        if quantize:
+            self.codes, self.scales = quantize_int8(reduced)
+        else:
+            self.codes, self.scales = reduced, None
+        self._filter_masks: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Mémoire occupée par les vecteurs de recherche (hors vecteurs complets sur disque)"""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def _mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        key = json.dumps(where, sort_keys=True)
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            mask = np.fromiter((matches_filter(metadata, where) for metadata in self.metadatas), dtype=bool, count=len(self))
+            self._filter_masks[key] = mask
+        return mask
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        reduced = truncate(query, self.dims)
+        if not self.quantized:
+            return self.codes @ reduced
+        scores = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), SCORE_BLOCK_ROWS):
+            block = self.codes[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ reduced
+        return scores * self.scales
+
+    def search_vector(self, query: np.ndarray, k: int = 10,
+                      where: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """(rang de l'extrait, similarité cosinus) des k meilleurs extraits pour un embedding de requête"""
+        if not len(self):
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        scores = self._approximate_scores(query)
+        mask = self._mask(where)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            available = int(mask.sum())
+        else:
+            available = len(self)
+        if not available:
+            return []
+
+        exact = self.rescore_factor > 0 and (self.dims is not None or self.quantized)
+        candidates = min(available, k * self.rescore_factor if exact else k)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        if exact:
+            rows = np.sort(top)
+            full = normalize_rows(np.asarray(self.full_vectors[rows], dtype=np.float32))
+            rescored = full @ normalize_rows(query)
+            order = np.argsort(-rescored)[:k]
+            return [(int(rows[i]), float(rescored[i])) for i in order]
+        order = top[np.argsort(-scores[top])][:k]
+        return [(int(i), float(scores[i])) for i in order]
+
+    def _document(self, row: int) -> Document:
+        return Document(page_content=self.texts[row], metadata=dict(self.metadatas[row]), id=self.ids[row])
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                                     **kwargs) -> List[Tuple[Document, float]]:
+        """Extraits et similarité cosinus (plus élevée = plus pertinent)"""
+        vector = self.embedding.embed_query(query)
+        return [(self._document(row), score) for row, score in self.search_vector(vector, k, filter)]
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                                                **kwargs) -> List[Tuple[Document, float]]:
+        """
+        Extraits et pertinence sur la même échelle que Chroma (distance L2 au carré d,
+        pertinence 1 - d / √2), pour que le seuil calibré soit valable quel que soit le store
+        """
+        return [(doc, 1.0 - (2.0 - 2.0 * score) / math.sqrt(2))
+                for doc, score in self.similarity_search_with_score(query, k, filter)]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                          **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None, **kwargs) -> "CompressedRetriever":
+        search_kwargs = search_kwargs or {}
+        return CompressedRetriever(index=self, k=search_kwargs.get("k", 4), filter=search_kwargs.get("filter"))
+
+
+class CompressedRetriever(BaseRetriever):
+    """Retriever LangChain sur un CompressedVectorIndex"""
+
+    index: Any
+    k: int = 4
+    filter: Optional[Dict[str, Any]] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.index.similarity_search(query, k=self.k, filter=self.filter)
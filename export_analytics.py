@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Export en masse des tables analytics_events, analytics_sessions et inscriptions pour la BI
+
+Les lignes sont lues par blocs (pagination par clé sur id, curseur non bufferisé) et écrites
+au fil de l'eau en CSV compressé (gzip) ou en Parquet : la mémoire utilisée reste constante.
+Le dernier id et le dernier horodatage exportés sont enregistrés après chaque bloc pour
+permettre la reprise (--resume, par id ou --resume-by timestamp) ; sans --resume, l'export
+repart de zéro et remplace les fichiers de la table.
+
+Exemples:
+    python export_analytics.py --tables analytics_events --output-dir exports
+    python export_analytics.py --resume --output-dir exports
+    python export_analytics.py --resume --resume-by timestamp --output-dir exports
+    python export_analytics.py --format parquet --since "2025-01-01"
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Dict, Any, List, Optional
+
+from database_service import get_database_service, EXPORTABLE_TABLES
+
+STATE_FILE = "export_state.json"
+
+
+def _serialize(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", "replace")
+    return value
+
+
+def load_state(output_dir: str) -> Dict[str, Any]:
+    """Charge l'état de reprise (dernier id et horodatage exportés par table)"""
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(output_dir: str, state: Dict[str, Any]):
+    """Enregistre l'état de reprise de façon atomique"""
+    path = os.path.join(output_dir, STATE_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class CsvGzipWriter:
+    """Écrit les blocs dans un CSV compressé (remplacé, ou complété lors d'une reprise)"""
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        append = append and os.path.exists(self.path)
+        self._write_header = not append
+        self._file = gzip.open(self.path, "at" if append else "wt", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+
+    def write(self, columns: List[str], rows: List[tuple]):
+        if self._write_header:
+            self._writer.writerow(columns)
+            self._write_header = False
+        self._writer.writerows([_serialize(v) for v in row] for row in rows)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Écrit les blocs comme groupes de lignes d'un fichier <table>.<premier id>.parquet"""
+
+    def __init__(self, output_dir: str, table: str, first_id: int):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Le format Parquet nécessite pyarrow (pip install pyarrow)")
+        self._pa = pa
+        self._pq = pq
+        self.path = os.path.join(output_dir, f"{table}.{first_id + 1}.parquet")
+        self._writer = None
+
+    def write(self, columns: List[str], rows: List[tuple]):
+        pa = self._pa
+        data = {
+            column: [_serialize(row[i]) if not isinstance(row[i], (datetime, int, float)) else row[i] for row in rows]
+            for i, column in enumerate(columns)
+        }
+        if self._writer is None:
+            table = pa.table(data)
+            # Les colonnes entièrement nulles du premier bloc sont typées en texte
+            schema = pa.schema([
+                pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                for field in table.schema
+            ])
+            self._writer = self._pq.ParquetWriter(self.path, schema, compression="snappy")
+        self._writer.write_table(pa.table(data, schema=self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def remove_parquet_parts(output_dir: str, table: str):
+    """Supprime les fichiers <table>.<premier id>.parquet d'un export précédent"""
+    pattern = re.compile(rf"^{re.escape(table)}\.\d+\.parquet$")
+    for name in os.listdir(output_dir):
+        if pattern.match(name):
+            os.remove(os.path.join(output_dir, name))
+
+
+def _last_timestamp(rows: List[tuple], index: int, previous: Optional[str]) -> Optional[str]:
+    """Horodatage le plus récent du bloc (format YYYY-MM-DD HH:MM:SS), au moins égal au précédent"""
+    values = [row[index] for row in rows if row[index] is not None]
+    if not values:
+        return previous
+    latest = max(values)
+    latest = latest.isoformat(sep=" ") if isinstance(latest, datetime) else str(latest)
+    return max(latest, previous) if previous else latest
+
+
+def export_table(db, table: str, output_dir: str, file_format: str, after_id: int,
+                 since: Optional[str], chunk_size: int, state: Dict[str, Any], append: bool = False) -> int:
+    """Exporte une table et retourne le nombre de lignes écrites"""
+    previous = state.get(table, {})
+    if file_format == "csv":
+        writer = CsvGzipWriter(os.path.join(output_dir, f"{table}.csv.gz"), append=append)
+    else:
+        if not append:
+            remove_parquet_parts(output_dir, table)
+        # Nom du fichier : premier id après le dernier exporté (y compris en reprise par horodatage)
+        writer = ParquetWriter(output_dir, table, max(after_id, previous.get("last_id", 0)) if append else after_id)
+    timestamp_column = EXPORTABLE_TABLES[table]
+    last_timestamp = previous.get("last_timestamp") if append else None
+    exported = 0
+    try:
+        for columns, rows in db.stream_table_rows(table, after_id=after_id, since=since, chunk_size=chunk_size):
+            writer.write(columns, rows)
+            exported += len(rows)
+            last_timestamp = _last_timestamp(rows, columns.index(timestamp_column), last_timestamp)
+            state[table] = {
+                "last_id": max(rows[-1][columns.index("id")], previous.get("last_id", 0) if append else 0),
+                "last_timestamp": last_timestamp,
+                "since": since if not append else previous.get("since", since),
+                "exported_at": datetime.now().isoformat(timespec="seconds"),
+                "format": file_format,
+            }
+            save_state(output_dir, state)
+            print(f"  {table}: {exported} lignes (dernier id {state[table]['last_id']})", file=sys.stderr)
+    finally:
+        writer.close()
+    return exported
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export en masse des données analytics et des inscriptions.")
+    parser.add_argument("--tables", default=",".join(EXPORTABLE_TABLES),
+                        help="Tables à exporter, séparées par des virgules.")
+    parser.add_argument("--output-dir", default="exports", help="Dossier de destination.")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="Format de sortie.")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Nombre de lignes par bloc.")
+    parser.add_argument("--resume", action="store_true", help="Reprendre après le dernier id (ou horodatage) exporté.")
+    parser.add_argument("--resume-by", choices=["id", "timestamp"], default="id",
+                        help="Point de reprise : dernier id, ou dernier horodatage (lignes de même horodatage réexportées).")
+    parser.add_argument("--since-id", type=int, default=0, help="N'exporter que les ids strictement supérieurs.")
+    parser.add_argument("--since", default=None, help="N'exporter que les lignes postérieures (YYYY-MM-DD[ HH:MM:SS]).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    tables = [table.strip() for table in args.tables.split(",") if table.strip()]
+    unknown = [table for table in tables if table not in EXPORTABLE_TABLES]
+    if unknown:
+        print(f"❌ Tables non exportables: {', '.join(unknown)}")
+        sys.exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    state = load_state(args.output_dir)
+
+    db = get_database_service()
+    if not db.connect():
+        print("❌ Impossible de se connecter à la base de données")
+        sys.exit(1)
+
+    try:
+        for table in tables:
+            after_id, since = args.since_id, args.since
+            resume = args.resume and table in state
+            if resume:
+                previous = state[table]
+                if previous.get("format", args.format) != args.format:
+                    print(f"❌ {table}: l'export à reprendre est au format {previous.get('format')}")
+                    sys.exit(1)
+                if args.since and args.since != previous.get("since"):
+                    print(f"❌ {table}: --since différent de l'export à reprendre ({previous.get('since')})")
+                    sys.exit(1)
+                since = previous.get("since")
+                if args.resume_by == "timestamp" and previous.get("last_timestamp"):
+                    since = max(since or "", previous["last_timestamp"])
+                else:
+                    after_id = max(after_id, previous["last_id"])
+            else:
+                # Nouvel export : les fichiers et l'état précédents de la table sont remplacés
+                state.pop(table, None)
+                save_state(args.output_dir, state)
+            print(f"📦 Export de {table} (id > {after_id}{f', depuis {since}' if since else ''})...", file=sys.stderr)
+            exported = export_table(db, table, args.output_dir, args.format, after_id,
+                                    since, args.chunk_size, state, append=resume)
+            print(f"✅ {table}: {exported} lignes exportées", file=sys.stderr)
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import difflib
+import logging
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from catalog_config import get_catalog_config
+from text_normalization import normalize_text
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Mots ignorés lors de la comparaison mot à mot
+STOPWORDS = {
+    "formation", "formations", "cours", "stage", "atelier", "de", "du", "des", "la", "le", "les",
+    "l", "d", "en", "un", "une", "et", "a", "au", "aux", "pour", "par", "sur", "je", "j", "veux",
+    "voudrais", "souhaite", "aimerais", "interesse", "interessee", "suis", "m", "me", "moi",
+}
+
+
+def _stem(token: str) -> str:
+    """Singulier approximatif (macarons -> macaron, gateaux -> gateau)"""
+    if len(token) > 3 and token[-1] in "sx":
+        return token[:-1]
+    return token
+
+
+def _keywords(normalized: str) -> List[str]:
+    return [_stem(token) for token in normalized.split() if token not in STOPWORDS]
+
+
+class FormationCatalog:
+    """
+    Catalogue des formations et de leurs créneaux gardé en mémoire.
+
+    Résout un texte libre ("je veux faire les macarons", "patiserie francaise") en id de
+    formation sans requête SQL : correspondance exacte, puis inclusion, puis comparaison
+    approchée mot à mot, le tout sans accents ni casse. Le catalogue est rechargé après
+    expiration du TTL ou après invalidate() (appelé par les écritures). Si le rechargement
+    échoue (base indisponible), le dernier catalogue chargé reste servi et la tentative
+    suivante n'a lieu qu'un TTL plus tard.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None, fuzzy_cutoff: Optional[float] = None):
+        config = get_catalog_config()
+        self.ttl_seconds = config["ttl_seconds"] if ttl_seconds is None else ttl_seconds
+        self.fuzzy_cutoff = fuzzy_cutoff or config["fuzzy_cutoff"]
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._loaded_at = None
+        self._failed_at = None
+        self._formations: Dict[int, Dict[str, Any]] = {}
+        self._sessions: Dict[int, List[Dict[str, Any]]] = {}
+        self._by_name: Dict[str, int] = {}
+        self._names: List[Tuple[str, int]] = []
+        self._keywords: Dict[int, List[str]] = {}
+        self._vocabulary: Dict[str, List[int]] = {}
+
+    # ----- Chargement -----
+
+    def invalidate(self):
+        """Force le rechargement au prochain accès"""
+        with self._lock:
+            self._loaded_at = None
+            self._failed_at = None
+
+    def load(self, db=None) -> bool:
+        """Charge formations et créneaux (avec la connexion fournie ou une nouvelle connexion)"""
+        own_connection = db is None
+        if own_connection:
+            from database_service import get_database_service
+            db = get_database_service()
+            if not db.connect():
+                logger.error("Catalogue des formations non chargé: connexion impossible")
+                return False
+        try:
+            data = db.load_formation_catalog()
+        finally:
+            if own_connection:
+                db.disconnect()
+        if data is None:
+            return False
+
+        formations, sessions = data
+        self._index(formations, sessions)
+        return True
+
+    def _index(self, formations: List[Dict[str, Any]], sessions: List[Dict[str, Any]]):
+        by_id = {formation["id"]: dict(formation) for formation in formations}
+        sessions_by_formation: Dict[int, List[Dict[str, Any]]] = {}
+        for session in sorted(sessions, key=lambda s: s["start_datetime"]):
+            session = dict(session)
+            sessions_by_formation.setdefault(session.pop("formation_id"), []).append(session)
+
+        by_name, names, keywords, vocabulary = {}, [], {}, {}
+        for formation_id in sorted(by_id):
+            normalized = normalize_text(by_id[formation_id]["nom"])
+            by_name.setdefault(normalized, formation_id)
+            names.append((normalized, formation_id))
+            keywords[formation_id] = _keywords(normalized)
+            for keyword in keywords[formation_id]:
+                vocabulary.setdefault(keyword, []).append(formation_id)
+
+        with self._lock:
+            self._formations = by_id
+            self._sessions = sessions_by_formation
+            self._by_name = by_name
+            # Les noms les plus longs d'abord : "cap patissier" avant "patissier"
+            self._names = sorted(names, key=lambda item: (-len(item[0]), item[1]))
+            self._keywords = keywords
+            self._vocabulary = vocabulary
+            self._loaded_at = time.monotonic()
+            self._failed_at = None
+
+    def _needs_reload(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self._loaded_at is not None and now - self._loaded_at < self.ttl_seconds:
+                return False
+            return self._failed_at is None or now - self._failed_at >= self.ttl_seconds
+
+    def _ensure_loaded(self, db=None):
+        if not self._needs_reload():
+            return
+        # Un seul rechargement à la fois, hors du verrou des lectures : les autres appels
+        # servent le catalogue courant (ou attendent s'il n'y en a pas encore)
+        with self._lock:
+            has_catalog = bool(self._formations)
+        if not self._load_lock.acquire(blocking=not has_catalog):
+            return
+        try:
+            if not self._needs_reload():
+                return
+            try:
+                loaded = self.load(db)
+            except Exception as e:
+                logger.error(f"Catalogue des formations non chargé: {e}")
+                loaded = False
+            if not loaded:
+                with self._lock:
+                    self._failed_at = time.monotonic()
+        finally:
+            self._load_lock.release()
+
+    # ----- Accès -----
+
+    def resolve(self, text: str, db=None) -> Optional[int]:
+        """
+        Retourne l'id de la formation désignée par le texte, ou None
+
+        Args:
+            text: Saisie libre de l'utilisateur
+            db: Connexion DatabaseService ouverte à utiliser si un rechargement est nécessaire
+        """
+        self._ensure_loaded(db)
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+
+        with self._lock:
+            formation_id = self._by_name.get(normalized)
+            if formation_id is not None:
+                return formation_id
+
+            padded = f" {normalized} "
+            for name, formation_id in self._names:
+                if f" {name} " in padded:
+                    return formation_id
+            if len(normalized) >= 3:
+                for name, formation_id in sorted(self._names, key=lambda item: item[1]):
+                    if normalized in name:
+                        return formation_id
+
+            return self._fuzzy_match(_keywords(normalized))
+
+    def _fuzzy_match(self, query_keywords: List[str]) -> Optional[int]:
+        """Part des mots du nom retrouvés (éventuellement mal orthographiés) dans la saisie"""
+        matched: Dict[int, Dict[str, float]] = {}
+        vocabulary = list(self._vocabulary)
+        for keyword in query_keywords:
+            for candidate in difflib.get_close_matches(keyword, vocabulary, n=3, cutoff=self.fuzzy_cutoff):
+                ratio = difflib.SequenceMatcher(None, keyword, candidate).ratio()
+                for formation_id in self._vocabulary[candidate]:
+                    scores = matched.setdefault(formation_id, {})
+                    scores[candidate] = max(scores.get(candidate, 0.0), ratio)
+
+        best, best_score = None, (0.0, 0.0)
+        for formation_id, scores in sorted(matched.items()):
+            coverage = len(scores) / max(len(self._keywords[formation_id]), 1)
+            score = (coverage, sum(scores.values()) / len(scores))
+            if score > best_score:
+                best, best_score = formation_id, score
+        return best if best_score[0] >= 0.5 else None
+
+    def get_formation(self, formation_id: int, db=None) -> Optional[Dict[str, Any]]:
+        """Formation par id (copie)"""
+        self._ensure_loaded(db)
+        with self._lock:
+            formation = self._formations.get(formation_id)
+            return dict(formation) if formation else None
+
+    def get_sessions(self, formation_id: int, db=None) -> List[Dict[str, Any]]:
+        """Créneaux d'une formation triés par début (copies)"""
+        self._ensure_loaded(db)
+        with self._lock:
+            return [dict(session) for session in self._sessions.get(formation_id, [])]
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_formation_catalog() -> FormationCatalog:
+    """Retourne le catalogue partagé du processus"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = FormationCatalog()
+        return _catalog
+
+def invalidate_formation_catalog():
+    """Invalide le catalogue partagé (à appeler après une écriture sur formations ou créneaux)"""
+    if _catalog is not None:
+        _catalog.invalidate()
@@ -0,0 +1,25 @@
+import os
+from typing import Dict, Any
+
+# Configuration Gemini
+GEMINI_CONFIG = {
+    "api_key": os.getenv("GEMINI_API_KEY", "votre cle api"),
+    "model": os.getenv("GEMINI_MODEL", "gemini-2.0-flash"),
+    # Point d'accès alternatif (ex: serveur local de test), vide = API Google
+    "api_endpoint": os.getenv("GEMINI_API_ENDPOINT", ""),
+    "transport": os.getenv("GEMINI_TRANSPORT", ""),
+}
+
+def get_gemini_config() -> Dict[str, Any]:
+    """Retourne la configuration Gemini"""
+    return GEMINI_CONFIG
+
+def get_gemini_configure_kwargs() -> Dict[str, Any]:
+    """Retourne les arguments à passer à genai.configure"""
+    config = get_gemini_config()
+    kwargs = {"api_key": config["api_key"]}
+    if config["transport"]:
+        kwargs["transport"] = config["transport"]
+    if config["api_endpoint"]:
+        kwargs["client_options"] = {"api_endpoint": config["api_endpoint"]}
+    return kwargs
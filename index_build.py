@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Construction et déploiement des index documentaires versionnés (voir corpus_index.py)
+
+Usage:
+    python index_build.py build [--documents Research] [--index-dir indexes] [--activate]
+    python index_build.py activate <version>
+    python index_build.py verify [<version>]
+    python index_build.py list
+"""
+
+import argparse
+import sys
+
+from corpus_config import get_corpus_config
+from corpus_index import activate_version, build_index, current_version, list_versions, read_manifest, verify_version
+
+
+def parse_arguments() -> argparse.Namespace:
+    config = get_corpus_config()
+    parser = argparse.ArgumentParser(description="Index documentaires versionnés.")
+    parser.add_argument("--index-dir", default=config["index_dir"], help="Dossier des versions d'index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Construire une nouvelle version à partir des documents.")
+    build.add_argument("--documents", default=config["documents_path"], help="Dossier des documents.")
+    build.add_argument("--version", help="Nom de la version (par défaut: date + empreinte du corpus).")
+    build.add_argument("--activate", action="store_true", help="Mettre la version en service une fois construite.")
+
+    activate = subparsers.add_parser("activate", help="Mettre une version en service (CURRENT).")
+    activate.add_argument("version")
+
+    verify = subparsers.add_parser("verify", help="Vérifier les sommes SHA-256 d'une version.")
+    verify.add_argument("version", nargs="?", help="Version (par défaut: celle en service).")
+
+    subparsers.add_parser("list", help="Lister les versions disponibles.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    try:
+        if args.command == "build":
+            manifest = build_index(args.documents, args.index_dir, version=args.version)
+            print(f"✅ Index {manifest['version']} construit ({manifest['chunks']} extraits, "
+                  f"{len(manifest['corpus']['files'])} fichiers, {manifest['embedding_model']})")
+            if args.activate:
+                activate_version(args.index_dir, manifest["version"])
+                print(f"🚀 {manifest['version']} en service")
+        elif args.command == "activate":
+            activate_version(args.index_dir, args.version)
+            print(f"🚀 {args.version} en service")
+        elif args.command == "verify":
+            version = args.version or current_version(args.index_dir)
+            if not version:
+                print("❌ Aucune version en service")
+                sys.exit(1)
+            bad = verify_version(args.index_dir, version)
+            if bad:
+                print(f"❌ {version} corrompue: {', '.join(bad)}")
+                sys.exit(1)
+            print(f"✅ {version} intègre")
+        elif args.command == "list":
+            current = current_version(args.index_dir)
+            for version in list_versions(args.index_dir):
+                manifest = read_manifest(args.index_dir, version)
+                marker = "*" if version == current else " "
+                print(f"{marker} {version}  {manifest['chunks']} extraits  {manifest['embedding_model']}  {manifest['created_at']}")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
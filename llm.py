@@ -6,41 +6,57 @@ from datetime import datetime
 
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.memory import ConversationBufferMemory
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnableLambda, RunnablePassthrough
-from langchain_core.messages import get_buffer_string
 from langchain_core.prompts import format_document
 from langchain.prompts.prompt import PromptTemplate
 import google.generativeai as genai
 from email_service import send_client_notification
-
-condense_question = """Given the following conversation and a follow-up question, rephrase the follow-up question to be a standalone question.
-
-Chat History:
-{chat_history}
-
-Follow Up Input: {question}
-Standalone question:"""
-CONDENSE_QUESTION_PROMPT = PromptTemplate.from_template(condense_question)
-
-answer = """
-### Instruction:
+from gemini_config import get_gemini_config, get_gemini_configure_kwargs
+from tracing import span, traced, get_tracer, correlation
+import answer_store
+import nlu
+import retrieval
+from retrieval_config import get_retrieval_config
+from model_router import LARGE, as_router, model_name
+
+# Les prompts sont découpés pour la réutilisation du cache KV d'Ollama : les instructions
+# fixes forment un message système identique d'une requête à l'autre, l'historique suit
+# dans l'ordre chronologique (on ne fait qu'y ajouter des messages) et les parties
+# variables (extraits, question) viennent en dernier. Ollama ne relit alors que la fin du
+# prompt. Toute modification de ces instructions invalide le préfixe en cache.
+CONDENSE_INSTRUCTIONS = """Given the conversation so far and the last user message (a follow-up question), rephrase the follow-up question to be a standalone question.
+Reply with the standalone question only."""
+
+CONDENSE_QUESTION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", CONDENSE_INSTRUCTIONS),
+    MessagesPlaceholder("chat_history"),
+    ("human", "{question}"),
+])
+
+# Réponse lorsque les documents ne contiennent pas l'information (aussi imposée au LLM par le prompt)
+NO_ANSWER_MESSAGE = "Je ne peux pas répondre avec certitude sur la base des documents disponibles."
+
+ANSWER_INSTRUCTIONS = """### Instruction:
 Tu es un assistant Dream Pastry spécialisé en formations de pâtisserie.
-- Tu réponds et fais des recommandations UNIQUEMENT à partir des documents fournis ci-dessous (PDFs indexés).
+- Tu réponds et fais des recommandations UNIQUEMENT à partir des documents fournis dans le message de l'utilisateur (PDFs indexés).
 - Si l'information n'est pas présente dans ces documents, dis clairement: "Je ne peux pas répondre avec certitude sur la base des documents disponibles."
 - N'invente JAMAIS de chiffres, dates, durées, tarifs, conditions ou contenus. Pas de connaissances externes.
 - Réponds en français, de façon claire et concise.
 - Lorsque tu peux répondre, fournis les sources (nom de document et page) issues du contexte. Si tu ne peux pas répondre, n'affiche aucune source.
-- Les recommandations/orientations doivent être justifiées par des extraits présents dans les documents (et sourcées).
+- Les recommandations/orientations doivent être justifiées par des extraits présents dans les documents (et sourcées)."""
 
-## Recherche (extraits des documents):
+answer = """## Recherche (extraits des documents):
 {context}
 
 ## Question:
 {question}
 """
 
-ANSWER_PROMPT = ChatPromptTemplate.from_template(answer)
+ANSWER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", ANSWER_INSTRUCTIONS),
+    ("human", answer),
+])
 
 DEFAULT_DOCUMENT_PROMPT = PromptTemplate.from_template(
     template="Source Document: {source}, Page {page}:\n{page_content}"
@@ -54,44 +70,111 @@ def _combine_documents(
     return document_separator.join(doc_strings)
 
 
-memory = ConversationBufferMemory(return_messages=True, output_key="answer", input_key="question")
+def _message_content(message):
+    return message.content if hasattr(message, "content") else message
 
 
-def getStreamingChain(question: str, memory, llm, db):
-    retriever = db.as_retriever(search_kwargs={"k": 10})
-    loaded_memory = RunnablePassthrough.assign(
-        chat_history=RunnableLambda(
-            lambda x: "\n".join(
-                [f"{item['role']}: {item['content']}" for item in x["memory"]]
-            )
-        ),
-    )
+def history_messages(memory, question: str = None) -> list:
+    """
+    Historique du chat en messages (role, contenu), dans l'ordre chronologique et sans
+    troncature pour garder le préfixe du tour précédent ; la question en cours, si elle a
+    déjà été ajoutée à l'historique, est retirée (elle est passée à part)
+    """
+    messages = [(item["role"], item["content"]) if isinstance(item, dict) else item for item in memory]
+    if question is not None and messages and messages[-1] == ("user", question):
+        messages = messages[:-1]
+    return messages
 
-    standalone_question = {
-        "standalone_question": {
-            "question": lambda x: x["question"],
-            "chat_history": lambda x: x["chat_history"],
-        }
-        | CONDENSE_QUESTION_PROMPT
-        | llm
-        | (lambda x: x.content if hasattr(x, "content") else x)
-    }
 
-    retrieved_documents = {
-        "docs": itemgetter("standalone_question") | retriever,
-        "question": lambda x: x["standalone_question"],
-    }
+def condense_question(llm, question: str, chat_history: list, tier: str = LARGE) -> str:
+    """Reformule la question de suivi en question autonome"""
+    with span("chat.condense", tier=tier, model=model_name(llm)):
+        chain = CONDENSE_QUESTION_PROMPT | llm
+        return _message_content(chain.invoke({"question": question, "chat_history": chat_history}))
 
-    final_inputs = {
-        "context": lambda x: _combine_documents(x["docs"]),
-        "question": itemgetter("question"),
-    }
 
-    answer = final_inputs | ANSWER_PROMPT | llm
+def retrieve_documents(db, query: str, formation_id: str = None):
+    """Recherche les extraits de documents pertinents (limitée à la formation si elle est connue)"""
+    return retrieval.retrieve(db, query, formation_id)
 
-    final_chain = loaded_memory | standalone_question | retrieved_documents | answer
 
-    return final_chain.stream({"question": question, "memory": memory})
+def build_context(docs) -> str:
+    """Assemble les extraits en contexte pour le prompt"""
+    with span("chat.prompt_assembly"):
+        return _combine_documents(docs)
+
+
+def stream_answer(llm, context: str, question: str, tier: str = LARGE):
+    """Génère la réponse en streaming"""
+    labels = {"tier": tier, "model": model_name(llm)}
+    with span("chat.generation", **labels):
+        started = time.perf_counter()
+        first_token = True
+        for chunk in (ANSWER_PROMPT | llm).stream({"context": context, "question": question}):
+            if first_token:
+                get_tracer().record("chat.first_token", time.perf_counter() - started, labels)
+                first_token = False
+            yield chunk
+
+
+def answer_question(llm, db, question: str):
+    """
+    Réponse complète à une question posée sans historique (traitements par lots), avec les
+    extraits utilisés ; NO_ANSWER_MESSAGE et aucun extrait si rien n'atteint le seuil de pertinence
+
+    Returns:
+        tuple: (réponse, extraits)
+    """
+    docs = retrieve_documents(db, question, nlu.detect_formation_id(question))
+    if not docs:
+        return NO_ANSWER_MESSAGE, []
+    tier, answer_llm = as_router(llm).for_answer(question)
+    chunks = stream_answer(answer_llm, build_context(docs), question, tier)
+    return "".join(_message_content(chunk) for chunk in chunks), docs
+
+
+memory = ConversationBufferMemory(return_messages=True, output_key="answer", input_key="question")
+
+
+def getStreamingChain(question: str, memory, llm, db, track_unanswered: bool = True):
+    """
+    Réponse RAG en streaming ; si aucun extrait n'atteint le seuil de pertinence, renvoie
+    directement NO_ANSWER_MESSAGE sans génération (et compte la question comme non répondue,
+    sauf track_unanswered=False si l'appelant l'a déjà fait). Les questions fréquentes ont
+    une réponse pré-générée, servie sans appel au LLM (answer_store.py).
+
+    llm peut être un ModelRouter (model_router.py) : reformulation et réponse passent
+    alors chacune par le modèle choisi par le routeur.
+    """
+    stored_answer = answer_store.lookup_answer(question, memory, db)
+    if stored_answer is not None:
+        # Réponse pré-générée (pregenerate_answers.py) pour la version d'index en service
+        yield stored_answer
+        return
+
+    router = as_router(llm)
+    formation_id = nlu.detect_formation_id(question, memory)
+    chat_history = history_messages(memory, question)
+    condense_tier, condense_llm = router.for_condense()
+
+    def condense():
+        return condense_question(condense_llm, question, chat_history, condense_tier)
+
+    if get_retrieval_config()["speculative"]:
+        # Recherche sur la question brute en parallèle de la reformulation
+        standalone_question, docs = retrieval.speculative_retrieve(db, question, formation_id, condense)
+    else:
+        standalone_question = condense()
+        docs = retrieve_documents(db, standalone_question, formation_id)
+    if not docs:
+        if track_unanswered:
+            track_unanswered_question(question)
+        yield NO_ANSWER_MESSAGE
+        return
+    context = build_context(docs)
+
+    answer_tier, answer_llm = router.for_answer(standalone_question)
+    yield from stream_answer(answer_llm, context, standalone_question, answer_tier)
 
 
 import json
@@ -104,24 +187,25 @@ with open(FALLBACK_PATH, "r", encoding="utf-8") as f:
 
 # ===== FONCTIONS POUR ANALYTICS & TRACKING =====
 
-def get_or_create_session_id() -> str:
+def get_or_create_session_id(session_state=None) -> str:
     """Génère ou récupère un ID de session unique pour le tracking"""
-    if "analytics_session_id" not in st.session_state:
-        st.session_state["analytics_session_id"] = str(uuid.uuid4())
-        st.session_state["analytics_start_time"] = time.time()
-    return st.session_state["analytics_session_id"]
+    session_state = st.session_state if session_state is None else session_state
+    if "analytics_session_id" not in session_state:
+        session_state["analytics_session_id"] = str(uuid.uuid4())
+        session_state["analytics_start_time"] = time.time()
+    return session_state["analytics_session_id"]
 
-def start_analytics_tracking(client_info: dict = None) -> str:
+def start_analytics_tracking(client_info: dict = None, session_state=None) -> str:
     """Démarre le tracking analytics d'une session"""
-    session_id = get_or_create_session_id()
+    session_id = get_or_create_session_id(session_state)
     
     try:
-        from database_service import get_database_service
+        from database_service import SESSION_START_QUESTION, get_database_service
         db = get_database_service()
         if db.connect():
             db.start_analytics_session(session_id, client_info)
             db.log_analytics_event(session_id, "question_asked", {
-                "question": "Début de session de qualification",
+                "question": SESSION_START_QUESTION,
                 "timestamp": datetime.now().isoformat()
             })
             db.disconnect()
@@ -130,10 +214,10 @@ def start_analytics_tracking(client_info: dict = None) -> str:
     
     return session_id
 
-def log_analytics_event(event_type: str, event_data: dict = None):
+def log_analytics_event(event_type: str, event_data: dict = None, session_state=None):
     """Enregistre un événement analytics"""
     try:
-        session_id = get_or_create_session_id()
+        session_id = get_or_create_session_id(session_state)
         from database_service import get_database_service
         db = get_database_service()
         if db.connect():
@@ -142,14 +226,15 @@ def log_analytics_event(event_type: str, event_data: dict = None):
     except Exception as e:
         print(f"Erreur lors de l'enregistrement d'événement analytics: {e}")
 
-def end_analytics_tracking(completion_status: str, qualification_status: str = None):
+def end_analytics_tracking(completion_status: str, qualification_status: str = None, session_state=None):
     """Termine le tracking analytics d'une session"""
     try:
-        session_id = get_or_create_session_id()
+        session_state = st.session_state if session_state is None else session_state
+        session_id = get_or_create_session_id(session_state)
         duration_seconds = None
         
-        if "analytics_start_time" in st.session_state:
-            duration_seconds = int(time.time() - st.session_state["analytics_start_time"])
+        if "analytics_start_time" in session_state:
+            duration_seconds = int(time.time() - session_state["analytics_start_time"])
         
         from database_service import get_database_service
         db = get_database_service()
@@ -158,22 +243,19 @@ def end_analytics_tracking(completion_status: str, qualification_status: str = N
             db.disconnect()
         
         # Nettoyer la session
-        if "analytics_session_id" in st.session_state:
-            del st.session_state["analytics_session_id"]
-        if "analytics_start_time" in st.session_state:
-            del st.session_state["analytics_start_time"]
+        if "analytics_session_id" in session_state:
+            del session_state["analytics_session_id"]
+        if "analytics_start_time" in session_state:
+            del session_state["analytics_start_time"]
             
     except Exception as e:
         print(f"Erreur lors de la fin du tracking analytics: {e}")
 
 def track_unanswered_question(question: str):
-    """Enregistre une question non répondue pour enrichir la FAQ"""
+    """Compte une question non répondue pour enrichir la FAQ (écrite en base par lots)"""
     try:
-        from database_service import get_database_service
-        db = get_database_service()
-        if db.connect():
-            db.log_unanswered_question(question)
-            db.disconnect()
+        from unanswered_aggregator import get_unanswered_aggregator
+        get_unanswered_aggregator().record(question)
     except Exception as e:
         print(f"Erreur lors de l'enregistrement de question non répondue: {e}")
 
@@ -198,26 +280,7 @@ def detect_inscription_intent(question: str) -> bool:
     Returns:
         bool: True si une intention d'inscription est détectée
     """
-    
-    inscription_keywords = [
-        r'\binscrire\b', r'\binscription\b', r'\bs\'inscrire\b',
-        r'\bparticiper\b', r'\bparticiper à\b', r'\bsuivre\b',
-        r'\bformation\b.*\bintéressé\b', r'\bintéressé\b.*\bformation\b',
-        r'\bje veux\b.*\bformation\b', r'\bje souhaite\b.*\bformation\b',
-        r'\bje voudrais\b.*\bformation\b', r'\bje désire\b.*\bformation\b',
-        r'\bformation\b.*\bpour moi\b', r'\bformation\b.*\bmoi\b',
-        r'\bcomment faire\b.*\binscription\b', r'\bcomment s\'inscrire\b',
-        r'\bprocédure\b.*\binscription\b', r'\bétapes\b.*\binscription\b',
-        r'\bmodalités\b.*\binscription\b', r'\bconditions\b.*\binscription\b'
-    ]
-    
-    question_lower = question.lower()
-    
-    for pattern in inscription_keywords:
-        if re.search(pattern, question_lower):
-            return True
-    
-    return False
+    return nlu.detect_inscription_intent(question)
 
 from datetime import datetime
 
@@ -302,8 +365,7 @@ def evaluate_qualification_score(client_info: dict, answers: dict) -> tuple[str,
     """
     
     
-    API_KEY = "votre cle api" 
-    genai.configure(api_key=API_KEY)
+    genai.configure(**get_gemini_configure_kwargs())
     
     
     prompt = f"""
@@ -374,8 +436,9 @@ def evaluate_qualification_score(client_info: dict, answers: dict) -> tuple[str,
     """
 
     try:
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(prompt)
+        model = genai.GenerativeModel(get_gemini_config()["model"])
+        with span("gemini.generate_content"):
+            response = model.generate_content(prompt)
         
         
         response_text = response.text
@@ -547,30 +610,7 @@ def detect_formation_interest(question: str, chat_history: list = None) -> str:
     Returns:
         str: Formation détectée ou "Non spécifiée"
     """
-    
-    formations = [
-        "pâtisserie française", "pâtisserie", "capcakes", "cookies", "macarons", "Cap Blanc",
-        "croissant", "pain", "viennoiserie", "chocolat", "entremet", "fraisier", "Tablette chocolat Dubai",
-        "layercake", "wedding cake", "trompe l'oeil", "mignardise", "tartelette", 
-        "cap pâtissier", "formation pâtisserie", "apprentissage pâtisserie"
-    ]
-    
-    
-    question_lower = question.lower()
-    for formation in formations:
-        if formation in question_lower:
-            return formation.title()
-    
-    
-    if chat_history:
-        for message in chat_history:
-            if isinstance(message, dict) and message.get("role") == "user":
-                content = message.get("content", "").lower()
-                for formation in formations:
-                    if formation in content:
-                        return formation.title()
-    
-    return "Non spécifiée"
+    return nlu.detect_formation_interest(question, chat_history)
 
 def process_inscription_request(client_info: dict, question: str, response: str) -> tuple[str, bool]:
     """
@@ -601,40 +641,47 @@ def process_inscription_request(client_info: dict, question: str, response: str)
     return response, False
 
 def getChatChain(llm, db):
-    retriever = db.as_retriever(search_kwargs={"k": 10})
-
+    router = as_router(llm)
+    condense_tier, condense_llm = router.for_condense()
     loaded_memory = RunnablePassthrough.assign(
         chat_history=RunnableLambda(memory.load_memory_variables)
         | itemgetter("history"),
     )
 
     standalone_question = {
-        "standalone_question": {
-            "question": lambda x: x["question"],
-            "chat_history": lambda x: get_buffer_string(x["chat_history"]),
-        }
-        | CONDENSE_QUESTION_PROMPT
-        | llm
-        | (lambda x: x.content if hasattr(x, "content") else x)
+        "standalone_question": RunnableLambda(
+            lambda x: condense_question(condense_llm, x["question"], x["chat_history"], condense_tier)
+        )
     }
 
     
     retrieved_documents = {
-        "docs": itemgetter("standalone_question") | retriever,
+        "docs": itemgetter("standalone_question")
+        | RunnableLambda(lambda q: retrieve_documents(db, q, nlu.detect_formation_id(q))),
         "question": lambda x: x["standalone_question"],
     }
 
     
     final_inputs = {
-        "context": lambda x: _combine_documents(x["docs"]),
+        "context": lambda x: build_context(x["docs"]),
         "question": itemgetter("question"),
     }
 
-    
+    def answer_or_refuse(x):
+        # Aucun extrait assez pertinent : réponse standard sans appel au LLM
+        if not x["docs"]:
+            return NO_ANSWER_MESSAGE
+        tier, answer_llm = router.for_answer(x["question"])
+        streaming_llm = answer_llm.with_config(callbacks=[StreamingStdOutCallbackHandler()])
+
+        def generate(prompt):
+            with span("chat.generation", tier=tier, model=model_name(answer_llm)):
+                return streaming_llm.invoke(prompt)
+
+        return (final_inputs | ANSWER_PROMPT | RunnableLambda(generate)).invoke(x)
+
     answer = {
-        "answer": final_inputs
-        | ANSWER_PROMPT
-        | llm.with_config(callbacks=[StreamingStdOutCallbackHandler()]),
+        "answer": RunnableLambda(answer_or_refuse),
         "docs": itemgetter("docs"),
     }
 
@@ -642,11 +689,17 @@ def getChatChain(llm, db):
 
     def chat(question: str):
         inputs = {"question": question}
-        result = final_chain.invoke(inputs)
+        with correlation(), span("chat.request"):
+            result = final_chain.invoke(inputs)
+        if not result["docs"]:
+            # Les réponses générées s'affichent en streaming ; le refus est affiché ici
+            print(NO_ANSWER_MESSAGE)
+            track_unanswered_question(question)
         memory.save_context(inputs, {"answer": result["answer"].content if hasattr(result["answer"], "content") else result["answer"]})
 
     return chat
 
+@traced("qualification.step")
 def process_qualification_flow(client_info: dict, question: str, response: str, session_state: dict) -> tuple[str, bool, bool]:
     """
     Traite le flux de qualification du client avec vérification des places
@@ -668,8 +721,10 @@ def process_qualification_flow(client_info: dict, question: str, response: str,
         session_state["qualification_answers"] = {}
         session_state["current_question_index"] = 0
         session_state["sessions_options"] = []
+        session_state["formation_snapshot"] = None
         session_state["selected_session_id"] = None
         session_state["formation_choisie"] = None
+        session_state["formation_id"] = None
         session_state["slot_required"] = False
         session_state["refuse_no_slot"] = False
 
@@ -678,8 +733,8 @@ def process_qualification_flow(client_info: dict, question: str, response: str,
         session_state["qualification_in_progress"] = True
 
         
-        start_analytics_tracking(client_info)
-        log_analytics_event("qualification", {"action": "start", "client_info": client_info})
+        start_analytics_tracking(client_info, session_state)
+        log_analytics_event("qualification", {"action": "start", "client_info": client_info}, session_state)
 
         
         questions = [
@@ -729,13 +784,26 @@ Veuillez répondre à cette question pour continuer le processus.
 
     
     if current_index == 0:
-        session_state["formation_choisie"] = question.strip()
-        db = get_database_service()
-        if db.connect():
-            sessions = db.list_sessions_by_formation_name(session_state["formation_choisie"])
-            db.disconnect()
+        # Résolution de la saisie libre via le catalogue en mémoire (aucune requête si le catalogue est à jour)
+        from formation_catalog import get_formation_catalog
+        catalog = get_formation_catalog()
+        formation_id = catalog.resolve(question)
+        formation = catalog.get_formation(formation_id) if formation_id else None
+        session_state["formation_id"] = formation_id
+        session_state["formation_choisie"] = formation["nom"] if formation else question.strip()
+
+        # Instantané (disponibilité, créneaux ouverts, alternatives) réutilisé à la fin du parcours
+        snapshot = None
+        if formation_id:
+            db = get_database_service()
+            if db.connect():
+                snapshot = db.get_qualification_snapshot(formation_id)
+                db.disconnect()
+        session_state["formation_snapshot"] = snapshot
+        if snapshot:
+            sessions = snapshot["slots"]
         else:
-            sessions = []
+            sessions = catalog.get_sessions(formation_id) if formation_id else []
 
         if sessions:
             session_state["sessions_options"] = sessions
@@ -794,7 +862,7 @@ Veuillez répondre pour continuer.
             "question": current_q_text,
             "answer": question,
             "question_index": session_state["current_question_index"]
-        })
+        }, session_state)
 
     
     session_state["current_question_index"] += 1
@@ -821,11 +889,16 @@ Veuillez répondre pour continuer.
         if not db_service.connect():
             return "Erreur de connexion à la base de données. Veuillez réessayer plus tard.", False, True
 
-        availability = db_service.get_formation_availability(formation_interesse)
+        # L'instantané de l'étape 1 n'est relu que si la formation a changé depuis
+        formation_id = session_state.get("formation_id")
+        snapshot = session_state.get("formation_snapshot")
+        if formation_id and (not snapshot or db_service.get_formation_version(formation_id) != snapshot["version"]):
+            snapshot = db_service.get_qualification_snapshot(formation_id)
+        availability = snapshot or {"disponible": False, "message": "Formation non trouvée"}
 
         
         if not availability["disponible"]:
-            alternatives = db_service.get_alternative_formations(formation_interesse)
+            alternatives = snapshot["alternatives"] if snapshot else db_service.get_alternative_formations_by_id(None)
             session_label = ""
             if session_state.get("selected_session_id") and session_state.get("sessions_options"):
                 chosen = next((s for s in session_state["sessions_options"] if s["id"] == session_state["selected_session_id"]), None)
@@ -860,13 +933,14 @@ La formation "{formation_interesse}" n'est pas disponible actuellement.
             session_state["qualification_answers"] = []
             session_state["current_question_index"] = 0
             session_state["sessions_options"] = []
+            session_state["formation_snapshot"] = None
             session_state["selected_session_id"] = None
             session_state["slot_required"] = False
             session_state["refuse_no_slot"] = False
 
             
-            log_analytics_event("completion", {"status": statut, "score": score, "formation": formation_interesse, "session_chosen": session_label})
-            end_analytics_tracking("completed", statut)
+            log_analytics_event("completion", {"status": statut, "score": score, "formation": formation_interesse, "session_chosen": session_label}, session_state)
+            end_analytics_tracking("completed", statut, session_state=session_state)
 
             return message_final, True, True
 
@@ -876,7 +950,8 @@ La formation "{formation_interesse}" n'est pas disponible actuellement.
                 availability["formation_id"],
                 client_info,
                 statut,
-                score
+                score,
+                creneau_id=session_state.get("selected_session_id")
             )
             if reservation_success:
                 session_label = ""
@@ -930,6 +1005,7 @@ Cela peut arriver si la formation s'est remplie entre temps.
         session_state["qualification_answers"] = {}
         session_state["current_question_index"] = 0
         session_state["sessions_options"] = []
+        session_state["formation_snapshot"] = None
         session_state["selected_session_id"] = None
         session_state["slot_required"] = False
         session_state["refuse_no_slot"] = False
@@ -959,8 +1035,8 @@ Cela peut arriver si la formation s'est remplie entre temps.
             "formation": formation_interesse,
             "session_chosen": chosen_str,
             "client_email_sent": client_email_sent 
-        })
-        end_analytics_tracking("completed", statut)
+        }, session_state)
+        end_analytics_tracking("completed", statut, session_state=session_state)
 
         return message_final, True, True
 
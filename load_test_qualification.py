@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test de charge du parcours de qualification avec N prospects virtuels simultanés
+
+Chaque prospect virtuel remplit un client_info, puis répond à toutes les questions de
+process_qualification_flow avec un temps de réflexion aléatoire. Le test s'exécute contre
+les services simulés de local_stubs.py (MySQL en mémoire, Gemini, SMTP) et augmente la
+concurrence par paliers.
+
+Exemple:
+    python load_test_qualification.py --levels 1,4,16,32 --prospects-per-worker 2 --think-time 0.5
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List
+
+from local_stubs import STUB_DATABASE_NOTICE, StubEnvironment
+from benchmark_latency import summarize, answer_for
+
+STATUTS = ["Salarié", "Demandeur d'emploi", "Indépendant", "Étudiant"]
+FORMATIONS = ["Macarons", "Chocolat", "Entremets", "Pâtisserie Française", "CAP Pâtissier", "Viennoiseries"]
+
+
+def make_client_info(index: int, rng: random.Random) -> Dict[str, Any]:
+    """Génère un prospect virtuel"""
+    return {
+        "nom": f"Prospect{index}",
+        "prenom": "Test",
+        "numero_telephone": f"06{index:08d}"[:10],
+        "email": f"prospect{index}@example.com",
+        "age": rng.randint(18, 60),
+        "statut": rng.choice(STATUTS),
+        "cpf": rng.choice(["Oui", "Non"]),
+        "ville": "Paris",
+        "preference": "Présentiel",
+        "budget": rng.choice([300, 800, 1500, 3000]),
+        "motivation": "Test de charge",
+    }
+
+
+def step_kind(question_text: str) -> str:
+    """Catégorie d'étape utilisée pour agréger les latences"""
+    if question_text.startswith("Quelle formation"):
+        return "formation"
+    if "Créneaux disponibles pour" in question_text:
+        return "creneau"
+    return "question"
+
+
+class VirtualProspect:
+    """Prospect virtuel qui déroule un parcours de qualification complet"""
+
+    def __init__(self, index: int, think_time: float, seed: int):
+        self.rng = random.Random(seed + index)
+        self.client_info = make_client_info(index, self.rng)
+        self.formation = self.rng.choice(FORMATIONS)
+        self.think_time = think_time
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: List[str] = []
+
+    def _think(self):
+        if self.think_time > 0:
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.think_time)
+
+    def _answer(self, question_text: str) -> str:
+        if question_text.startswith("Quelle formation"):
+            return self.formation
+        return answer_for(question_text)
+
+    def _step(self, kind: str, answer: str, session_state: dict):
+        from llm import process_qualification_flow
+
+        started = time.perf_counter()
+        message, _, completed = process_qualification_flow(self.client_info, answer, "", session_state)
+        self.latencies.setdefault(kind, []).append(time.perf_counter() - started)
+        if message.startswith("Erreur") or "Erreur lors de l'évaluation" in message:
+            self.errors.append(message.strip().splitlines()[0][:120])
+        return completed
+
+    def run(self, max_steps: int = 30) -> bool:
+        session_state = {}
+        try:
+            completed = self._step("start", "", session_state)
+            steps = 1
+            while not completed and steps < max_steps:
+                self._think()
+                question_text = session_state["qualification_questions"][session_state["current_question_index"]]
+                before = len(session_state["qualification_questions"]) - session_state["current_question_index"]
+                kind = "completion" if before == 1 else step_kind(question_text)
+                completed = self._step(kind, self._answer(question_text), session_state)
+                steps += 1
+            if not completed:
+                self.errors.append("parcours non terminé")
+            return completed
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+            return False
+
+
+def run_level(env: StubEnvironment, concurrency: int, prospects: int, think_time: float, seed: int) -> Dict[str, Any]:
+    """Exécute un palier de concurrence et retourne ses statistiques"""
+    store = env.reset_database()
+    gemini_before = env.gemini.requests
+    emails_before = len(env.smtp.messages)
+    virtual_prospects = [VirtualProspect(i, think_time, seed) for i in range(prospects)]
+
+    active_samples = []
+    stop_sampling = threading.Event()
+
+    def sample_connections():
+        while not stop_sampling.wait(0.05):
+            active_samples.append(store.active_connections)
+
+    sampler = threading.Thread(target=sample_connections, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    completed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(prospect.run) for prospect in virtual_prospects]
+        for future in as_completed(futures):
+            completed += 1 if future.result() else 0
+    elapsed = time.perf_counter() - started
+    stop_sampling.set()
+    sampler.join()
+
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for prospect in virtual_prospects:
+        for kind, values in prospect.latencies.items():
+            latencies.setdefault(kind, []).extend(values)
+        for error in prospect.errors:
+            errors[error] = errors.get(error, 0) + 1
+
+    step_stats = {}
+    for kind, values in sorted(latencies.items()):
+        stats = summarize(values)
+        stats["p99_ms"] = round(sorted(values)[min(len(values) - 1, int(len(values) * 0.99))] * 1000, 2)
+        step_stats[kind] = stats
+
+    return {
+        "concurrency": concurrency,
+        "prospects": prospects,
+        "completed": completed,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_prospects_per_second": round(completed / elapsed, 3) if elapsed else 0.0,
+        "step_latency": step_stats,
+        "db": {
+            "connections_opened": store.connections_opened,
+            "max_active_connections": store.max_active_connections,
+            "mean_active_connections": round(sum(active_samples) / len(active_samples), 2) if active_samples else 0.0,
+            "queries": store.queries,
+            "reservations": len(store.inscriptions),
+        },
+        "gemini_requests": env.gemini.requests - gemini_before,
+        "emails_sent": len(env.smtp.messages) - emails_before,
+        "errors": errors,
+        "error_count": sum(errors.values()),
+    }
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Test de charge du parcours de qualification.")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Paliers de concurrence, séparés par des virgules.")
+    parser.add_argument("--prospects-per-worker", type=int, default=2, help="Prospects simulés par worker et par palier.")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Temps de réflexion moyen entre deux réponses (s).")
+    parser.add_argument("--gemini-latency", type=float, default=1.0, help="Latence simulée de Gemini (s).")
+    parser.add_argument("--smtp-latency", type=float, default=0.2, help="Latence simulée du SMTP (s).")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="Latence simulée par requête SQL (s).")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire des prospects.")
+    parser.add_argument("--output", default="-", help="Fichier JSON de sortie ('-' = stdout).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("email_service").setLevel(logging.WARNING)
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+
+    with StubEnvironment(gemini_latency=args.gemini_latency, smtp_latency=args.smtp_latency,
+                         db_latency=args.db_latency) as env:
+        results = []
+        for concurrency in levels:
+            print(f"🚀 Palier {concurrency} prospects simultanés...", file=sys.stderr)
+            results.append(run_level(env, concurrency, concurrency * args.prospects_per_worker,
+                                     args.think_time, args.seed))
+
+    report = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "parameters": vars(args),
+              "database": STUB_DATABASE_NOTICE, "levels": results}
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"✅ Rapport écrit dans {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
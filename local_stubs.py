@@ -0,0 +1,844 @@
+"""
+Services locaux simulant Ollama, Gemini, SMTP et MySQL pour les benchmarks et tests de charge.
+
+Les serveurs doivent être démarrés (et les variables d'environnement positionnées)
+AVANT l'import de ollama, llm, email_service ou database_service, car ces modules
+lisent leur configuration au chargement.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import socketserver
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+
+from text_normalization import question_hash
+
+EMBEDDING_DIMENSION = 768
+
+DEFAULT_ANSWER = (
+    "D'après la brochure, la formation dure deux jours et comprend la réalisation "
+    "de plusieurs recettes encadrées par un chef pâtissier. Les sessions se déroulent "
+    "en petit groupe de six personnes maximum. Source Document: Research/dream_pastry.pdf, Page 1."
+)
+
+
+def _tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r"\w+", text)
+
+
+def fake_embedding(text: str, dimension: int = EMBEDDING_DIMENSION) -> List[float]:
+    """Embedding déterministe (hachage des mots et trigrammes) : des textes proches ont des vecteurs proches"""
+    vector = [0.0] * dimension
+    for token in _tokenize(text):
+        features = [token] + [token[i:i + 3] for i in range(max(len(token) - 2, 0))]
+        for feature in features:
+            digest = hashlib.md5(feature.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % dimension
+            vector[index] += 1.0 if digest[4] % 2 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+# ===== OLLAMA =====
+
+class OllamaStubServer:
+    """
+    Serveur HTTP reproduisant l'API Ollama (/api/chat, /api/generate, /api/embed, /api/show, /api/tags).
+
+    Args:
+        tokens_per_second: Débit de génération simulé (par défaut pour tous les modèles)
+        first_token_latency: Latence fixe avant le premier token (secondes)
+        answer: Texte renvoyé pour les questions (les reformulations renvoient la question)
+        model_tokens_per_second: Débit spécifique par modèle (ex: {"gemma3:1b": 120})
+        embedding_latency: Latence par requête d'embedding (secondes)
+        prefill_tokens_per_second: Débit de lecture du prompt (0 = prefill non simulé)
+        cache_slots: Prompts gardés en cache KV par modèle ; seul le préfixe non commun
+            avec l'un d'eux est relu (comme les slots d'Ollama, OLLAMA_NUM_PARALLEL)
+    """
+
+    def __init__(self, tokens_per_second: float = 50.0, first_token_latency: float = 0.05,
+                 answer: str = DEFAULT_ANSWER, model_tokens_per_second: Optional[Dict[str, float]] = None,
+                 embedding_latency: float = 0.0, prefill_tokens_per_second: float = 0.0, cache_slots: int = 1,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.tokens_per_second = tokens_per_second
+        self.first_token_latency = first_token_latency
+        self.answer = answer
+        self.model_tokens_per_second = model_tokens_per_second or {}
+        self.embedding_latency = embedding_latency
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.cache_slots = cache_slots
+        self.requests = {"chat": 0, "generate": 0, "embed": 0}
+        self.prefill = {"prompt_tokens": 0, "cached_tokens": 0}
+        self._slots: Dict[str, List[List[str]]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "OllamaStubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ollama-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, kind: str):
+        with self._lock:
+            self.requests[kind] += 1
+
+    def _rate_for(self, model: str) -> float:
+        return self.model_tokens_per_second.get(model, self.tokens_per_second)
+
+    def _prefill_delay(self, prompt_tokens: int) -> float:
+        return prompt_tokens / self.prefill_tokens_per_second if self.prefill_tokens_per_second else 0.0
+
+    def _completion_text(self, prompt: str, messages: Optional[List[Dict[str, Any]]] = None) -> str:
+        if "standalone question" in prompt.lower() or "question autonome" in prompt:
+            match = re.search(r"Follow Up Input:\s*(.*?)\s*(?:Standalone question:|$)", prompt, re.S)
+            if match:
+                return match.group(1).strip()
+            if messages:
+                return messages[-1].get("content", "").strip()
+            return prompt.strip().splitlines()[-1]
+        return self.answer
+
+    def _evaluate_prompt(self, model: str, tokens: List[str]) -> int:
+        """
+        Tokens à relire (hors préfixe en cache) ; le prompt remplace le slot dont il prolonge
+        l'essentiel, sinon le slot le moins récemment utilisé
+        """
+        with self._lock:
+            slots = self._slots.setdefault(model, [])
+            best, cached = None, 0
+            for i, slot in enumerate(slots):
+                common = 0
+                for a, b in zip(slot, tokens):
+                    if a != b:
+                        break
+                    common += 1
+                if common > cached:
+                    best, cached = i, common
+            if best is not None and cached * 2 >= len(slots[best]):
+                slots.pop(best)
+            elif len(slots) >= self.cache_slots:
+                slots.pop(0)
+            slots.append(tokens)
+            self.prefill["prompt_tokens"] += len(tokens)
+            self.prefill["cached_tokens"] += cached
+        return len(tokens) - cached
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _read_json(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _send_json(self, payload: Dict[str, Any], status: int = 200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, model: str, text: str, prompt_tokens: int, message: bool):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                started = time.perf_counter()
+                time.sleep(stub.first_token_latency + stub._prefill_delay(prompt_tokens))
+                prompt_eval_ns = int((time.perf_counter() - started) * 1e9)
+                tokens = re.findall(r"\S+\s*", text)
+                delay = 1.0 / stub._rate_for(model)
+                for token in tokens:
+                    chunk = {"model": model, "created_at": datetime.utcnow().isoformat() + "Z", "done": False}
+                    if message:
+                        chunk["message"] = {"role": "assistant", "content": token}
+                    else:
+                        chunk["response"] = token
+                    self._write_chunk(chunk)
+                    time.sleep(delay)
+                total_ns = int((time.perf_counter() - started) * 1e9)
+                final = {
+                    "model": model,
+                    "created_at": datetime.utcnow().isoformat() + "Z",
+                    "done": True,
+                    "done_reason": "stop",
+                    "total_duration": total_ns,
+                    "load_duration": 0,
+                    "prompt_eval_count": prompt_tokens,
+                    "prompt_eval_duration": prompt_eval_ns,
+                    "eval_count": len(tokens),
+                    "eval_duration": total_ns - prompt_eval_ns,
+                }
+                if message:
+                    final["message"] = {"role": "assistant", "content": ""}
+                else:
+                    final["response"] = ""
+                self._write_chunk(final)
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, payload: Dict[str, Any]):
+                data = json.dumps(payload).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path.startswith("/api/tags") or self.path.startswith("/api/ps"):
+                    models = set(stub.model_tokens_per_second) | {"gemma3:4b", "nomic-embed-text:latest"}
+                    self._send_json({"models": [{"model": m, "name": m} for m in sorted(models)]})
+                else:
+                    self._send_json({"status": "ok"})
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.end_headers()
+
+            def do_POST(self):
+                payload = self._read_json()
+                model = payload.get("model", "")
+                if self.path.startswith("/api/chat"):
+                    stub._count("chat")
+                    messages = payload.get("messages", [])
+                    prompt = "\n".join(m.get("content", "") for m in messages)
+                    # Rendu avec les rôles, comme le template du modèle : c'est ce texte qui est mis en cache
+                    rendered = "".join(f"<{m.get('role', '')}> {m.get('content', '')} " for m in messages) + "<assistant>"
+                    self._respond_generation(model, prompt, payload, message=True, messages=messages, rendered=rendered)
+                elif self.path.startswith("/api/generate"):
+                    stub._count("generate")
+                    prompt = payload.get("prompt") or ""
+                    self._respond_generation(model, prompt, payload, message=False, rendered=(payload.get("system") or "") + " " + prompt)
+                elif self.path.startswith("/api/embed"):
+                    stub._count("embed")
+                    time.sleep(stub.embedding_latency)
+                    inputs = payload.get("input", payload.get("prompt", ""))
+                    if isinstance(inputs, str):
+                        inputs = [inputs]
+                    embeddings = [fake_embedding(text) for text in inputs]
+                    if self.path.startswith("/api/embeddings"):
+                        self._send_json({"embedding": embeddings[0]})
+                    else:
+                        self._send_json({"model": model, "embeddings": embeddings})
+                elif self.path.startswith("/api/show"):
+                    self._send_json({"modelfile": "", "parameters": "", "template": "", "details": {}, "model_info": {}})
+                elif self.path.startswith("/api/pull"):
+                    self._send_json({"status": "success"})
+                else:
+                    self._send_json({"error": f"unknown endpoint {self.path}"}, status=404)
+
+            def _respond_generation(self, model: str, prompt: str, payload: Dict[str, Any], message: bool,
+                                    messages: Optional[List[Dict[str, Any]]] = None, rendered: str = ""):
+                text = stub._completion_text(prompt, messages)
+                num_predict = (payload.get("options") or {}).get("num_predict")
+                if num_predict:
+                    text = " ".join(text.split()[:num_predict])
+                prompt_tokens = stub._evaluate_prompt(model, rendered.split())
+                if payload.get("stream", True):
+                    self._stream(model, text, prompt_tokens, message)
+                    return
+                time.sleep(stub.first_token_latency + stub._prefill_delay(prompt_tokens)
+                           + len(text.split()) / stub._rate_for(model))
+                response = {"model": model, "created_at": datetime.utcnow().isoformat() + "Z",
+                            "done": True, "done_reason": "stop", "prompt_eval_count": prompt_tokens,
+                            "eval_count": len(text.split())}
+                if message:
+                    response["message"] = {"role": "assistant", "content": text}
+                else:
+                    response["response"] = text
+                self._send_json(response)
+
+        return Handler
+
+
+# ===== GEMINI =====
+
+class GeminiStubServer:
+    """Serveur HTTP reproduisant generateContent de l'API Gemini (transport REST)"""
+
+    def __init__(self, latency: float = 0.2, score: int = 85, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.score = score
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "GeminiStubServer":
+        threading.Thread(target=self._server.serve_forever, name="gemini-stub", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _verdict(self) -> str:
+        if self.score >= 80:
+            return "QUALIFIÉ"
+        if self.score >= 60:
+            return "LISTE D'ATTENTE"
+        return "REFUSÉ"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                with stub._lock:
+                    stub.requests += 1
+                time.sleep(stub.latency)
+                text = f"SCORE: {stub.score}/100\nCATÉGORIE: {stub._verdict()}\nJustification simulée."
+                body = json.dumps({
+                    "candidates": [{
+                        "content": {"parts": [{"text": text}], "role": "model"},
+                        "finishReason": "STOP",
+                        "index": 0,
+                    }]
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+# ===== SMTP =====
+
+class SMTPStubServer:
+    """Serveur SMTP minimal (sans TLS) qui accepte l'authentification et conserve les messages reçus"""
+
+    def __init__(self, latency: float = 0.05, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.messages = []
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "SMTPStubServer":
+        threading.Thread(target=self._server.serve_forever, name="smtp-stub", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def _reply(self, line: str):
+                self.wfile.write((line + "\r\n").encode("utf-8"))
+
+            def handle(self):
+                self._reply("220 localhost ESMTP stub")
+                mail_from, recipients = None, []
+                while True:
+                    raw = self.rfile.readline()
+                    if not raw:
+                        return
+                    line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                    command = line[:4].upper()
+                    if command in ("EHLO", "HELO"):
+                        self._reply("250-localhost")
+                        self._reply("250 AUTH PLAIN LOGIN")
+                    elif command == "AUTH":
+                        self._reply("235 2.7.0 Authentication successful")
+                    elif command == "MAIL":
+                        mail_from, recipients = line[10:].strip(), []
+                        self._reply("250 OK")
+                    elif command == "RCPT":
+                        recipients.append(line[8:].strip())
+                        self._reply("250 OK")
+                    elif command == "DATA":
+                        self._reply("354 End data with <CR><LF>.<CR><LF>")
+                        data = []
+                        while True:
+                            data_line = self.rfile.readline()
+                            if not data_line or data_line in (b".\r\n", b".\n"):
+                                break
+                            data.append(data_line)
+                        time.sleep(stub.latency)
+                        with stub._lock:
+                            stub.messages.append({"from": mail_from, "to": recipients, "size": sum(map(len, data))})
+                        self._reply("250 OK: queued")
+                    elif command in ("RSET", "NOOP"):
+                        self._reply("250 OK")
+                    elif command == "QUIT":
+                        self._reply("221 Bye")
+                        return
+                    else:
+                        self._reply("502 Command not implemented")
+
+        return Handler
+
+
+# ===== MYSQL =====
+
+class InMemoryStore:
+    """Données partagées par toutes les connexions InMemoryDatabaseService"""
+
+    def __init__(self, query_latency: float = 0.002):
+        self.query_latency = query_latency
+        self.lock = threading.RLock()
+        self.formations = {}
+        self.formation_sessions = {}
+        self.inscriptions = []
+        self.analytics_sessions = {}
+        self.analytics_events = []
+        self.unanswered_questions = {}
+        self.connections_opened = 0
+        self.active_connections = 0
+        self.max_active_connections = 0
+        self.queries = 0
+        self._populate()
+
+    def _populate(self):
+        formations = [
+            ("Pâtisserie Française", 15, 5, 1200.00, 5),
+            ("Macarons", 8, 2, 450.00, 2),
+            ("Chocolat", 10, 3, 600.00, 3),
+            ("Entremets", 12, 7, 800.00, 4),
+            ("CAP Pâtissier", 20, 15, 2500.00, 10),
+            ("Viennoiseries", 6, 6, 300.00, 1),
+        ]
+        start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=7)
+        for formation_id, (nom, places_max, places_reservees, prix, duree) in enumerate(formations, 1):
+            self.formations[formation_id] = {
+                "id": formation_id, "nom": nom, "description": f"Formation {nom}",
+                "places_max": places_max, "places_reservees": places_reservees,
+                "prix": prix, "duree_jours": duree, "statut": "active",
+            }
+            for offset in range(2):
+                session_id = len(self.formation_sessions) + 1
+                begin = start + timedelta(days=7 * offset + formation_id)
+                self.formation_sessions[session_id] = {
+                    "id": session_id, "formation_id": formation_id,
+                    "start_datetime": begin, "end_datetime": begin + timedelta(hours=4),
+                    "label": "Demi-journée matin", "location": "Paris",
+                    "capacity": places_max, "places_reservees": 0, "statut": "ouverte",
+                }
+
+    def query(self):
+        """Simule la latence d'un aller-retour SQL"""
+        with self.lock:
+            self.queries += 1
+        if self.query_latency:
+            time.sleep(self.query_latency)
+
+
+_default_store = None
+
+def get_default_store() -> InMemoryStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = InMemoryStore()
+    return _default_store
+
+
+def _import_database_service():
+    import database_service
+    return database_service
+
+
+# Rappel joint aux rapports des benchmarks : les durées base de données viennent de la copie en mémoire
+STUB_DATABASE_NOTICE = {
+    "backend": "local_stubs.InMemoryDatabaseService",
+    "note": "Base MySQL simulée : les étapes db.* mesurent une réimplémentation en mémoire de DatabaseService "
+            "(latence fixe db_latency par requête), pas les requêtes SQL de database_service.py.",
+}
+
+
+class InMemoryDatabaseService:
+    """
+    Équivalent en mémoire de DatabaseService (mêmes méthodes publiques, mêmes formats de retour).
+    Compte les connexions ouvertes pour les tests de charge. Les méthodes composées
+    (get_qualification_snapshot, reserve_place…) sont réécrites ici : leurs durées ne
+    reflètent pas les requêtes réelles (voir STUB_DATABASE_NOTICE).
+    """
+
+    def __init__(self, store: Optional[InMemoryStore] = None):
+        self.store = store or get_default_store()
+        self.connection = None
+
+    def connect(self) -> bool:
+        store = self.store
+        with store.lock:
+            store.connections_opened += 1
+            store.active_connections += 1
+            store.max_active_connections = max(store.max_active_connections, store.active_connections)
+        store.query()
+        self.connection = True
+        return True
+
+    def disconnect(self):
+        if self.connection:
+            with self.store.lock:
+                self.store.active_connections -= 1
+            self.connection = None
+
+    def create_tables(self) -> bool:
+        return True
+
+    def populate_sample_data(self):
+        pass
+
+    def _find_formation(self, formation_name: str) -> Optional[Dict[str, Any]]:
+        with self.store.lock:
+            needle = formation_name.lower()
+            for formation in self.store.formations.values():
+                if needle in formation["nom"].lower():
+                    return formation
+        return None
+
+    def load_formation_catalog(self):
+        self.store.query()
+        with self.store.lock:
+            return ([dict(f) for f in self.store.formations.values()],
+                    [dict(s) for s in self.store.formation_sessions.values()])
+
+    def get_formation_availability(self, formation_name: str) -> Dict[str, Any]:
+        formation = self._find_formation(formation_name)
+        if not formation:
+            return {"disponible": False, "message": "Formation non trouvée"}
+        return self.get_formation_availability_by_id(formation["id"])
+
+    def get_formation_availability_by_id(self, formation_id: int) -> Dict[str, Any]:
+        self.store.query()
+        with self.store.lock:
+            formation = self.store.formations.get(formation_id)
+            if not formation or formation["statut"] != "active":
+                return {"disponible": False, "message": "Formation non trouvée"}
+            places_disponibles = formation["places_max"] - formation["places_reservees"]
+            return {
+                "formation_id": formation["id"],
+                "nom": formation["nom"],
+                "places_max": formation["places_max"],
+                "places_reservees": formation["places_reservees"],
+                "places_disponibles": places_disponibles,
+                "nb_sessions_ouvertes": sum(1 for s in self.store.formation_sessions.values()
+                                            if s["formation_id"] == formation["id"] and s["statut"] == "ouverte"),
+                "disponible": places_disponibles > 0,
+                "prix": formation["prix"],
+                "duree_jours": formation["duree_jours"],
+            }
+
+    def get_qualification_snapshot(self, formation_id: int) -> Optional[Dict[str, Any]]:
+        self.store.query()
+        with self.store.lock:
+            formation = self.store.formations.get(formation_id)
+            if not formation:
+                return None
+            slots = [
+                dict({k: v for k, v in s.items() if k != "formation_id"},
+                     start_datetime=s["start_datetime"].strftime("%Y-%m-%d %H:%M:%S"),
+                     end_datetime=s["end_datetime"].strftime("%Y-%m-%d %H:%M:%S"))
+                for s in self.store.formation_sessions.values()
+                if s["formation_id"] == formation_id and s["statut"] == "ouverte"
+                and (s["capacity"] is None or s["places_reservees"] < s["capacity"])
+            ]
+            alternatives = [
+                {"id": f["id"], "nom": f["nom"], "prix": f["prix"],
+                 "places_disponibles": f["places_max"] - f["places_reservees"]}
+                for f in self.store.formations.values()
+                if f["statut"] == "active" and f["id"] != formation_id and f["places_max"] > f["places_reservees"]
+            ]
+            places_disponibles = formation["places_max"] - formation["places_reservees"]
+            return {
+                "formation_id": formation["id"],
+                "nom": formation["nom"],
+                "places_max": formation["places_max"],
+                "places_reservees": formation["places_reservees"],
+                "places_disponibles": places_disponibles,
+                "nb_sessions_ouvertes": len(slots),
+                "disponible": formation["statut"] == "active" and places_disponibles > 0,
+                "prix": formation["prix"],
+                "duree_jours": formation["duree_jours"],
+                "slots": sorted(slots, key=lambda slot: slot["start_datetime"]),
+                "alternatives": sorted(alternatives, key=lambda alt: alt["nom"])[:5],
+                "version": f"{formation['places_reservees']}:{formation['statut']}:None",
+            }
+
+    def get_formation_version(self, formation_id: int) -> Optional[str]:
+        self.store.query()
+        with self.store.lock:
+            formation = self.store.formations.get(formation_id)
+            return f"{formation['places_reservees']}:{formation['statut']}:None" if formation else None
+
+    def get_alternative_formations(self, formation_name: str) -> List[Dict[str, Any]]:
+        formation = self._find_formation(formation_name)
+        return self.get_alternative_formations_by_id(formation["id"] if formation else None)
+
+    def get_alternative_formations_by_id(self, formation_id: Optional[int]) -> List[Dict[str, Any]]:
+        self.store.query()
+        with self.store.lock:
+            alternatives = [
+                dict(f, places_disponibles=f["places_max"] - f["places_reservees"])
+                for f in self.store.formations.values()
+                if f["statut"] == "active" and f["id"] != formation_id and f["places_max"] > f["places_reservees"]
+            ]
+        return sorted(alternatives, key=lambda f: f["nom"])[:5]
+
+    def list_sessions_by_formation_name(self, formation_name: str) -> List[Dict[str, Any]]:
+        formation = self._find_formation(formation_name)
+        return self.list_sessions_by_formation_id(formation["id"]) if formation else []
+
+    def list_sessions_by_formation_id(self, formation_id: int) -> List[Dict[str, Any]]:
+        self.store.query()
+        with self.store.lock:
+            sessions = [dict(s) for s in self.store.formation_sessions.values() if s["formation_id"] == formation_id]
+        for sess in sessions:
+            sess.pop("formation_id")
+        return sorted(sessions, key=lambda s: s["start_datetime"])
+
+    def get_formation_by_name(self, formation_name: str) -> Optional[Dict[str, Any]]:
+        formation = self._find_formation(formation_name)
+        return self.get_formation_by_id(formation["id"]) if formation else None
+
+    def get_formation_by_id(self, formation_id: int) -> Optional[Dict[str, Any]]:
+        self.store.query()
+        with self.store.lock:
+            formation = self.store.formations.get(formation_id)
+            return dict(formation) if formation else None
+
+    def reserve_place(self, formation_id: int, client_info: Dict[str, Any],
+                      statut_qualification: str, score: int, creneau_id: Optional[int] = None) -> bool:
+        self.store.query()
+        with self.store.lock:
+            formation = self.store.formations.get(formation_id)
+            if not formation or formation["statut"] != "active" or formation["places_reservees"] >= formation["places_max"]:
+                return False
+            if creneau_id:
+                slot = self.store.formation_sessions.get(creneau_id)
+                if (not slot or slot["formation_id"] != formation_id or slot["statut"] != "ouverte"
+                        or (slot["capacity"] is not None and slot["places_reservees"] >= slot["capacity"])):
+                    return False
+                slot["places_reservees"] += 1
+                if slot["capacity"] is not None and slot["places_reservees"] >= slot["capacity"]:
+                    slot["statut"] = "complet"
+            formation["places_reservees"] += 1
+            self.store.inscriptions.append({
+                "id": len(self.store.inscriptions) + 1,
+                "client_nom": client_info.get("nom", ""),
+                "client_prenom": client_info.get("prenom", ""),
+                "formation_id": formation_id,
+                "creneau_id": creneau_id,
+                "statut_qualification": statut_qualification,
+                "score_qualification": score,
+            })
+        return True
+
+    def start_analytics_session(self, session_id: str, client_info: dict = None) -> bool:
+        self.store.query()
+        with self.store.lock:
+            self.store.analytics_sessions[session_id] = {
+                "session_id": session_id, "client_info": client_info, "start_time": datetime.now(),
+                "completion_status": "in_progress", "qualification_status": "pending",
+            }
+        return True
+
+    def end_analytics_session(self, session_id: str, completion_status: str,
+                              qualification_status: str = None, duration_seconds: int = None) -> bool:
+        self.store.query()
+        with self.store.lock:
+            session = self.store.analytics_sessions.setdefault(session_id, {"session_id": session_id})
+            session.update({"completion_status": completion_status, "qualification_status": qualification_status,
+                            "duration_seconds": duration_seconds, "end_time": datetime.now()})
+        return True
+
+    def log_analytics_event(self, session_id: str, event_type: str, event_data: dict = None) -> bool:
+        self.store.query()
+        with self.store.lock:
+            self.store.analytics_events.append({"session_id": session_id, "event_type": event_type,
+                                                "event_data": event_data, "timestamp": datetime.now()})
+        return True
+
+    def log_unanswered_question(self, question_text: str) -> bool:
+        return self.upsert_unanswered_questions([(question_hash(question_text), question_text, 1)])
+
+    def upsert_unanswered_questions(self, rows) -> bool:
+        self.store.query()
+        with self.store.lock:
+            for key, question_text, count in rows:
+                entry = self.store.unanswered_questions.setdefault(key, {"question_text": question_text, "frequency": 0})
+                entry["frequency"] += count
+                entry["last_seen"] = datetime.now()
+        return True
+
+    def get_frequent_questions(self, limit: int = 200, min_frequency: int = 2, days: int = 90) -> List[Dict[str, Any]]:
+        database_service = _import_database_service()
+        self.store.query()
+        since = datetime.now() - timedelta(days=days)
+        with self.store.lock:
+            rows = [{"question_text": entry["question_text"], "frequency": entry["frequency"]}
+                    for entry in self.store.unanswered_questions.values()]
+            rows += [{"question_text": event["event_data"]["question"], "frequency": 1}
+                     for event in self.store.analytics_events
+                     if event["event_type"] == "question_asked" and event["timestamp"] >= since
+                     and (event["event_data"] or {}).get("question") not in (None, database_service.SESSION_START_QUESTION)]
+        return database_service.merge_question_counts(rows, limit, min_frequency)
+
+    def get_analytics_metrics(self, days: int = 30) -> dict:
+        self.store.query()
+        with self.store.lock:
+            sessions = list(self.store.analytics_sessions.values())
+            completed = [s for s in sessions if s.get("completion_status") == "completed"]
+            qualified = [s for s in completed if s.get("qualification_status") == "QUALIFIÉ"]
+            unanswered = sorted(self.store.unanswered_questions.values(), key=lambda q: -q["frequency"])[:10]
+        return {
+            "completion_rate": round(len(completed) * 100.0 / len(sessions), 2) if sessions else 0,
+            "total_sessions": len(sessions),
+            "completed_sessions": len(completed),
+            "qualification_rate": round(len(qualified) * 100.0 / len(completed), 2) if completed else 0,
+            "qualified_count": len(qualified),
+            "avg_duration_minutes": 0,
+            "median_duration_minutes": 0,
+            "top_unanswered_questions": unanswered,
+            "top_unanswered_clusters": [],
+        }
+
+
+# ===== ENVIRONNEMENT COMPLET =====
+
+class StubEnvironment:
+    """
+    Démarre l'ensemble des services simulés et oriente la configuration de l'application vers eux.
+
+    Usage:
+        with StubEnvironment(tokens_per_second=40) as env:
+            import llm  # importer après le démarrage
+            ...
+    """
+
+    def __init__(self, tokens_per_second: float = 50.0, first_token_latency: float = 0.05,
+                 gemini_latency: float = 0.2, smtp_latency: float = 0.05, db_latency: float = 0.002,
+                 model_tokens_per_second: Optional[Dict[str, float]] = None, embedding_latency: float = 0.0,
+                 prefill_tokens_per_second: float = 0.0, cache_slots: int = 1):
+        self.ollama = OllamaStubServer(tokens_per_second, first_token_latency,
+                                       model_tokens_per_second=model_tokens_per_second,
+                                       embedding_latency=embedding_latency,
+                                       prefill_tokens_per_second=prefill_tokens_per_second,
+                                       cache_slots=cache_slots)
+        self.gemini = GeminiStubServer(latency=gemini_latency)
+        self.smtp = SMTPStubServer(latency=smtp_latency)
+        self.store = InMemoryStore(query_latency=db_latency)
+        self._original_get_database_service = None
+        self._saved_environ: Dict[str, Optional[str]] = {}
+        self._saved_configs: List[Tuple[dict, dict]] = []
+
+    def start(self) -> "StubEnvironment":
+        self.ollama.start()
+        self.gemini.start()
+        self.smtp.start()
+        env = {
+            "OLLAMA_HOST": self.ollama.url,
+            "GEMINI_API_KEY": "stub",
+            "GEMINI_API_ENDPOINT": self.gemini.url,
+            "GEMINI_TRANSPORT": "rest",
+            "SMTP_SERVER": self.smtp.host,
+            "SMTP_PORT": str(self.smtp.port),
+            "SMTP_USE_TLS": "false",
+            "EMAIL_USER": "bench@dreampastry.local",
+            "EMAIL_PASSWORD": "stub",
+            "TEAM_EMAIL": "team@dreampastry.local",
+            "OLLAMA_WARMUP": "false",
+        }
+        self._saved_environ = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        self._apply_to_loaded_configs()
+        self.install_database()
+        return self
+
+    def _apply_to_loaded_configs(self):
+        # Les dictionnaires de configuration déjà importés sont mis à jour en place
+        import email_config
+        import gemini_config
+        self._saved_configs = [(config, dict(config)) for config in (email_config.EMAIL_CONFIG, gemini_config.GEMINI_CONFIG)]
+        email_config.EMAIL_CONFIG.update({
+            "smtp_server": self.smtp.host, "smtp_port": self.smtp.port, "use_tls": False,
+            "email_user": "bench@dreampastry.local", "email_password": "stub",
+            "team_email": "team@dreampastry.local",
+        })
+        gemini_config.GEMINI_CONFIG.update({"api_key": "stub", "api_endpoint": self.gemini.url, "transport": "rest"})
+
+    def install_database(self):
+        """Remplace get_database_service par la version en mémoire"""
+        database_service = _import_database_service()
+        if self._original_get_database_service is None:
+            self._original_get_database_service = database_service.get_database_service
+        database_service.get_database_service = lambda: InMemoryDatabaseService(self.store)
+        database_service.invalidate_formation_catalog()
+
+    def reset_database(self) -> InMemoryStore:
+        """Repart d'une base en mémoire neuve (mêmes données d'exemple, compteurs remis à zéro)"""
+        self.store = InMemoryStore(query_latency=self.store.query_latency)
+        self.install_database()
+        return self.store
+
+    def stop(self):
+        if self._original_get_database_service is not None:
+            _import_database_service().get_database_service = self._original_get_database_service
+        # Variables d'environnement et configurations remises dans leur état d'avant start()
+        for key, value in self._saved_environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        for config, saved in self._saved_configs:
+            config.clear()
+            config.update(saved)
+        self._saved_environ, self._saved_configs = {}, []
+        self.ollama.stop()
+        self.gemini.stop()
+        self.smtp.stop()
+
+    def __enter__(self) -> "StubEnvironment":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,224 @@
+import threading
+import time
+import logging
+from typing import Dict, Any, List, Optional, Union
+
+import ollama
+
+from model_router import routed_chat_models
+from models import check_if_model_is_available
+from ollama_config import get_ollama_config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def get_keep_alive() -> Union[int, str]:
+    """Retourne la valeur keep_alive à transmettre à Ollama ("-1" devient -1)"""
+    keep_alive = get_ollama_config()["keep_alive"]
+    try:
+        return int(keep_alive)
+    except (TypeError, ValueError):
+        return keep_alive
+
+
+class ModelManager:
+    """
+    Gère le cycle de vie des modèles Ollama : vérification, préchauffage,
+    maintien en mémoire et re-préchauffage après une période d'inactivité.
+
+    Les modèles requis sont vérifiés (téléchargés au besoin) et préchauffés en premier,
+    puis le gestionnaire est prêt. Les modèles optionnels (par défaut le petit modèle du
+    routage) ne sont jamais téléchargés : préchauffés ensuite s'ils sont installés, sinon
+    ignorés (le routeur passe alors par le modèle principal). Ils ne bloquent pas is_ready().
+    """
+
+    def __init__(self, chat_models: Optional[List[str]] = None, embedding_models: Optional[List[str]] = None,
+                 optional_models: Optional[List[str]] = None):
+        self.config = get_ollama_config()
+        if chat_models is None:
+            chat_models = routed_chat_models()
+            optional_models = chat_models[1:] if optional_models is None else optional_models
+        self.chat_models = chat_models
+        self.embedding_models = embedding_models or [self.config["embedding_model"]]
+        self.optional_models = set(optional_models or [])
+        self._lock = threading.Lock()
+        self._ready_event = threading.Event()
+        self._initialized_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._status = {
+            name: {
+                "kind": kind,
+                "optional": name in self.optional_models,
+                "available": False,
+                "warm": False,
+                "last_warmup": None,
+                "last_used": None,
+                "warmup_seconds": None,
+                "error": None,
+            }
+            for kind, names in (("chat", self.chat_models), ("embedding", self.embedding_models))
+            for name in names
+        }
+
+    def start(self, wait: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        Lance la vérification et le préchauffage des modèles dans un thread de fond
+
+        Args:
+            wait: Attendre que les modèles soient prêts avant de rendre la main
+            timeout: Délai maximum d'attente en secondes
+
+        Returns:
+            bool: True si les modèles sont prêts (toujours False si wait=False et non prêts)
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="ollama-model-manager", daemon=True)
+                self._thread.start()
+        if wait:
+            return self.wait_until_ready(timeout)
+        return self.is_ready()
+
+    def stop(self):
+        """Arrête le thread de maintien en mémoire"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def is_ready(self) -> bool:
+        """Indique si tous les modèles requis sont disponibles et préchauffés"""
+        return self._ready_event.is_set()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Attend la fin de la vérification initiale et indique si les modèles sont prêts"""
+        self._initialized_event.wait(timeout)
+        return self.is_ready()
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Retourne l'état de chaque modèle (disponibilité, préchauffage, erreurs)"""
+        with self._lock:
+            return {name: dict(state) for name, state in self._status.items()}
+
+    def touch(self, model_name: str):
+        """Signale l'utilisation d'un modèle (repousse le re-préchauffage)"""
+        with self._lock:
+            if model_name in self._status:
+                self._status[model_name]["last_used"] = time.time()
+
+    def warm_up(self, model_name: str) -> bool:
+        """Charge un modèle en mémoire avec une génération minimale"""
+        kind = self._status[model_name]["kind"]
+        started = time.time()
+        try:
+            if kind == "chat":
+                ollama.generate(
+                    model=model_name,
+                    prompt=self.config["warmup_prompt"],
+                    options={"num_predict": 1},
+                    keep_alive=get_keep_alive(),
+                )
+            else:
+                ollama.embed(model=model_name, input=self.config["warmup_prompt"], keep_alive=get_keep_alive())
+        except Exception as e:
+            logger.error(f"Erreur lors du préchauffage du modèle {model_name}: {e}")
+            with self._lock:
+                self._status[model_name].update({"warm": False, "error": str(e)})
+            return False
+
+        now = time.time()
+        with self._lock:
+            self._status[model_name].update({
+                "warm": True,
+                "last_warmup": now,
+                "warmup_seconds": round(now - started, 3),
+                "error": None,
+            })
+        logger.info(f"Modèle {model_name} préchauffé en {now - started:.2f}s")
+        return True
+
+    def _is_installed(self, model_name: str) -> bool:
+        """Présence du modèle dans Ollama, sans téléchargement"""
+        names = {model["model"] for model in ollama.list()["models"]}
+        return model_name in names or (":" not in model_name and f"{model_name}:latest" in names)
+
+    def _verify(self, model_name: str) -> bool:
+        try:
+            if model_name in self.optional_models:
+                if not self._is_installed(model_name):
+                    raise Exception(f"modèle optionnel non installé (ollama pull {model_name})")
+            else:
+                check_if_model_is_available(model_name)
+        except Exception as e:
+            with self._lock:
+                state = self._status[model_name]
+                changed = state["error"] != str(e)
+                state.update({"available": False, "error": str(e)})
+            if model_name not in self.optional_models:
+                logger.error(f"Modèle {model_name} indisponible: {e}")
+            elif changed:
+                # Vérifié à chaque intervalle : signalé une seule fois
+                logger.warning(f"Modèle {model_name} indisponible, le modèle principal le remplace: {e}")
+            return False
+        with self._lock:
+            self._status[model_name].update({"available": True, "error": None})
+        return True
+
+    def _idle_seconds(self, model_name: str) -> float:
+        with self._lock:
+            state = self._status[model_name]
+            last_activity = max(state["last_warmup"] or 0, state["last_used"] or 0)
+        return time.time() - last_activity
+
+    def _refresh_readiness(self):
+        with self._lock:
+            ready = all(state["available"] and state["warm"]
+                        for state in self._status.values() if not state["optional"])
+        if ready:
+            self._ready_event.set()
+        else:
+            self._ready_event.clear()
+
+    def _initialize(self, model_name: str):
+        if self._verify(model_name) and self.config["warmup_on_start"]:
+            self.warm_up(model_name)
+        elif not self.config["warmup_on_start"]:
+            with self._lock:
+                self._status[model_name]["warm"] = self._status[model_name]["available"]
+
+    def _run(self):
+        # Les modèles requis d'abord : un modèle optionnel ne retarde jamais is_ready()
+        for model_name in self._status:
+            if model_name not in self.optional_models:
+                self._initialize(model_name)
+        self._refresh_readiness()
+        self._initialized_event.set()
+        for model_name in self._status:
+            if model_name in self.optional_models:
+                self._initialize(model_name)
+
+        while not self._stop_event.wait(self.config["check_interval_seconds"]):
+            for model_name in self._status:
+                with self._lock:
+                    available = self._status[model_name]["available"]
+                if not available and not self._verify(model_name):
+                    continue
+                with self._lock:
+                    warm = self._status[model_name]["warm"]
+                if not warm or self._idle_seconds(model_name) >= self.config["rewarm_after_idle_seconds"]:
+                    self.warm_up(model_name)
+            self._refresh_readiness()
+
+
+_model_manager = None
+_model_manager_lock = threading.Lock()
+
+def get_model_manager() -> ModelManager:
+    """Retourne l'instance partagée du gestionnaire de modèles"""
+    global _model_manager
+    with _model_manager_lock:
+        if _model_manager is None:
+            _model_manager = ModelManager()
+        return _model_manager
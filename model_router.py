@@ -0,0 +1,120 @@
+"""
+Routage des appels LLM du chat entre un petit modèle rapide et le modèle principal.
+
+La reformulation de la question et les questions factuelles courtes (« quel est le prix des
+macarons ? ») partent sur le petit modèle (OLLAMA_SMALL_CHAT_MODEL) ; les questions en
+plusieurs parties, longues ou demandant un conseil, une comparaison ou une explication
+restent sur le modèle principal (OLLAMA_CHAT_MODEL). Les règles sont dans routing_config.py.
+Chaque appel est tracé avec les labels tier (small / large) et model, d'où le volume et la
+latence par niveau dans /metrics.
+"""
+
+import logging
+from typing import Any, Optional, Tuple
+
+import nlu
+from ollama_config import get_ollama_config
+from routing_config import get_routing_config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SMALL = "small"
+LARGE = "large"
+
+# Mots (normalisés) qui ouvrent une sous-question
+INTERROGATIVES = {"quel", "quelle", "quels", "quelles", "combien", "comment", "pourquoi", "quand", "lequel", "laquelle"}
+
+
+def count_sub_questions(question: str) -> int:
+    """Nombre de sous-questions : points d'interrogation ou mots interrogatifs (« est-ce » compris)"""
+    words = nlu.normalize_message(question).split()
+    interrogatives = sum(word in INTERROGATIVES for word in words)
+    interrogatives += sum(1 for first, second in zip(words, words[1:]) if first == "est" and second == "ce")
+    return max(question.count("?"), interrogatives)
+
+
+def classify_question(question: str, config: Optional[dict] = None) -> Tuple[str, str]:
+    """(niveau de modèle, règle appliquée) pour répondre à la question"""
+    config = config or get_routing_config()
+    words = nlu.normalize_message(question).split()
+    for word in words:
+        for keyword in config["escalate_keywords"]:
+            if word.startswith(keyword):
+                return LARGE, "keyword"
+    if count_sub_questions(question) > config["max_small_questions"]:
+        return LARGE, "multi_part"
+    if len(words) > config["max_small_words"]:
+        return LARGE, "length"
+    return SMALL, "factual"
+
+
+def model_name(llm: Any) -> str:
+    return getattr(llm, "model", None) or type(llm).__name__
+
+
+class ModelRouter:
+    """
+    Choisit le modèle de chaque appel ; sans petit modèle (ou routage désactivé),
+    tout passe par le modèle principal
+    """
+
+    def __init__(self, large: Any, small: Any = None, config: Optional[dict] = None):
+        self.large = large
+        self.small = small
+        self.config = config or get_routing_config()
+
+    @property
+    def enabled(self) -> bool:
+        return self.small is not None and self.config["enabled"]
+
+    def _tier(self, tier: str) -> Tuple[str, Any]:
+        if tier == SMALL and self.enabled:
+            return SMALL, self.small
+        return LARGE, self.large
+
+    def for_condense(self) -> Tuple[str, Any]:
+        """(niveau, modèle) pour reformuler la question de suivi"""
+        return self._tier(self.config["condense_tier"])
+
+    def for_answer(self, question: str) -> Tuple[str, Any]:
+        """(niveau, modèle) pour répondre à la question (reformulée)"""
+        if not self.enabled:
+            return LARGE, self.large
+        tier, rule = classify_question(question, self.config)
+        logger.debug(f"Question routée vers {tier} ({rule}): {question}")
+        return self._tier(tier)
+
+
+def as_router(llm: Any) -> ModelRouter:
+    """Le routeur tel quel, ou un routeur sans petit modèle autour d'un modèle unique"""
+    return llm if isinstance(llm, ModelRouter) else ModelRouter(llm)
+
+
+def routed_chat_models() -> list:
+    """Modèles de chat à vérifier et préchauffer : le principal, puis le petit si le routage est actif"""
+    config = get_ollama_config()
+    models = [config["chat_model"]]
+    if get_routing_config()["enabled"] and config["small_chat_model"] and config["small_chat_model"] != config["chat_model"]:
+        models.append(config["small_chat_model"])
+    return models
+
+
+def create_router(model_manager=None, **llm_kwargs) -> ModelRouter:
+    """
+    Routeur sur les modèles configurés (ChatOllama) ; le petit modèle est écarté tant que
+    le gestionnaire de modèles ne le signale pas disponible et préchauffé
+    """
+    from langchain_ollama import ChatOllama
+
+    config = get_ollama_config()
+    large = ChatOllama(model=config["chat_model"], **llm_kwargs)
+    small = None
+    small_name = config["small_chat_model"]
+    if small_name in routed_chat_models()[1:]:
+        state = model_manager.status().get(small_name) if model_manager else None
+        if state is None or (state["available"] and state["warm"]):
+            small = ChatOllama(model=small_name, **llm_kwargs)
+        else:
+            logger.warning(f"Petit modèle {small_name} indisponible, tout passe par {config['chat_model']}")
+    return ModelRouter(large, small)
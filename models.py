@@ -1,6 +1,8 @@
 import ollama
 from tqdm import tqdm
 
+from ollama_config import get_ollama_config
+
 
 def __pull_model(name: str) -> None:
     current_digest, bars = "", {}
@@ -32,19 +34,18 @@ def __is_model_available_locally(model_name: str) -> bool:
         return False
 
 
-# def get_list_of_models() -> list[str]:
-#     """
-#     Retrieves a list of available models from the Ollama repository.
-
-#     Returns:
-#         list[str]: A list of model names available in the Ollama repository.
-#     """
-#     return [model["model"] for model in ollama.list()["models"]]
-
-
+def get_list_of_models() -> list[str]:
+    """
+    Retrieves the list of models installed in the local Ollama service.
+    Falls back to the configured chat model if Ollama cannot be reached.
 
-def get_list_of_models():
-    return ["gemma3:4b"]
+    Returns:
+        list[str]: A list of model names available locally.
+    """
+    try:
+        return [model["model"] for model in ollama.list()["models"]]
+    except Exception:
+        return [get_ollama_config()["chat_model"]]
 
 
 def check_if_model_is_available(model_name: str) -> None:
@@ -0,0 +1,153 @@
+"""
+Détection d'intention d'inscription et de formation d'intérêt.
+
+Chaque message est normalisé une seule fois (casse, accents, ponctuation) puis analysé
+par des expressions régulières compilées au chargement du module :
+- toutes les formulations d'intention en une seule alternance ;
+- tous les noms de formation en une seule alternance qui écarte en un passage les messages
+  sans formation ; sinon la première formation de la liste présente l'emporte (même priorité
+  qu'avant).
+Les résultats par message sont mis en cache : l'historique n'est pas réanalysé à chaque tour.
+"""
+
+import difflib
+import os
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+from text_normalization import normalize_text
+
+# Formulations d'intention d'inscription (sur texte normalisé : sans accents ni ponctuation)
+INSCRIPTION_PATTERNS = [
+    r"\binscrire\b", r"\binscription\b",
+    r"\bparticiper\b", r"\bsuivre\b",
+    r"\bformation\b.*\binteresse\b", r"\binteresse\b.*\bformation\b",
+    r"\bje veux\b.*\bformation\b", r"\bje souhaite\b.*\bformation\b",
+    r"\bje voudrais\b.*\bformation\b", r"\bje desire\b.*\bformation\b",
+    r"\bformation\b.*\bpour moi\b", r"\bformation\b.*\bmoi\b",
+    r"\bcomment faire\b.*\binscription\b",
+    r"\bprocedure\b.*\binscription\b", r"\betapes\b.*\binscription\b",
+    r"\bmodalites\b.*\binscription\b", r"\bconditions\b.*\binscription\b",
+]
+
+# Formations reconnues, par ordre de priorité (la première trouvée l'emporte)
+FORMATIONS = [
+    "pâtisserie française", "pâtisserie", "capcakes", "cookies", "macarons", "Cap Blanc",
+    "croissant", "pain", "viennoiserie", "chocolat", "entremet", "fraisier", "Tablette chocolat Dubai",
+    "layercake", "wedding cake", "trompe l'oeil", "mignardise", "tartelette",
+    "cap pâtissier", "formation pâtisserie", "apprentissage pâtisserie",
+]
+
+NO_FORMATION = "Non spécifiée"
+
+# Identifiant des documents qui ne portent pas sur une formation précise
+GENERAL_FORMATION_ID = "general"
+
+# Mots outils ignorés pour comparer deux formulations d'une question
+STOPWORDS = {
+    "a", "au", "aux", "avec", "c", "ca", "ce", "cela", "ces", "cette", "d", "dans", "de", "des", "du", "elle",
+    "en", "est", "et", "il", "ils", "j", "je", "l", "la", "le", "les", "leur", "lui", "m", "ma", "me", "mes",
+    "mon", "ne", "nous", "on", "ou", "par", "pas", "pour", "qu", "que", "quel", "quelle", "quelles", "quels",
+    "qui", "s", "sa", "se", "ses", "son", "sont", "sur", "t", "ta", "te", "tes", "ton", "tu", "un", "une",
+    "vos", "votre", "vous", "y",
+    # La reformulation peut revenir en anglais (prompt de reformulation en anglais)
+    "and", "for", "is", "of", "the", "what",
+}
+
+_INTENT_REGEX = re.compile("|".join(f"(?:{pattern})" for pattern in INSCRIPTION_PATTERNS))
+
+_NORMALIZED_FORMATIONS = [normalize_text(name) for name in FORMATIONS]
+
+# Filtre en un passage : la plupart des messages ne citent aucune formation
+_FORMATION_REGEX = re.compile("|".join(re.escape(name) for name in sorted(set(_NORMALIZED_FORMATIONS), key=len, reverse=True)))
+
+
+@lru_cache(maxsize=4096)
+def normalize_message(text: str) -> str:
+    """Texte normalisé d'un message (mis en cache)"""
+    return normalize_text(text)
+
+
+@lru_cache(maxsize=4096)
+def detect_inscription_intent(text: str) -> bool:
+    """True si le message exprime une intention d'inscription"""
+    return _INTENT_REGEX.search(normalize_message(text)) is not None
+
+
+@lru_cache(maxsize=4096)
+def formation_index(text: str) -> Optional[int]:
+    """Indice dans FORMATIONS de la formation la plus prioritaire citée dans le message, ou None"""
+    normalized = normalize_message(text)
+    if _FORMATION_REGEX.search(normalized) is None:
+        return None
+    for index, name in enumerate(_NORMALIZED_FORMATIONS):
+        if name in normalized:
+            return index
+    return None
+
+
+def _detect_formation_index(question: str, chat_history: Optional[List[dict]]) -> Optional[int]:
+    index = formation_index(question)
+    if index is None and chat_history:
+        for message in chat_history:
+            if isinstance(message, dict) and message.get("role") == "user":
+                index = formation_index(message.get("content", ""))
+                if index is not None:
+                    break
+    return index
+
+
+def detect_formation_interest(question: str, chat_history: Optional[List[dict]] = None) -> str:
+    """
+    Formation citée dans la question, sinon dans le premier message utilisateur de
+    l'historique qui en cite une
+
+    Returns:
+        str: Nom de la formation (ex: "Macarons") ou "Non spécifiée"
+    """
+    index = _detect_formation_index(question, chat_history)
+    return FORMATIONS[index].title() if index is not None else NO_FORMATION
+
+
+def formation_id(name: str) -> str:
+    """Identifiant normalisé d'une formation ("Trompe l'oeil" -> "trompe_l_oeil")"""
+    return normalize_text(name).replace(" ", "_")
+
+
+def detect_formation_id(question: str, chat_history: Optional[List[dict]] = None) -> Optional[str]:
+    """Identifiant normalisé de la formation détectée (voir detect_formation_interest), ou None"""
+    index = _detect_formation_index(question, chat_history)
+    return formation_id(FORMATIONS[index]) if index is not None else None
+
+
+def formation_id_from_source(source: str) -> str:
+    """
+    Identifiant de la formation décrite par un document, d'après son nom de fichier
+
+    Exemple: "Research/brochure_fraisier_framboisier.pdf" -> "fraisier".
+    Les noms mal orthographiés sont rapprochés mot à mot ("mignarrdises" -> "mignardise").
+    Retourne GENERAL_FORMATION_ID si le fichier ne correspond à aucune formation.
+    """
+    stem = normalize_text(os.path.splitext(os.path.basename(source))[0])
+    index = formation_index(stem)
+    if index is None:
+        for token in stem.split():
+            matches = difflib.get_close_matches(token, _NORMALIZED_FORMATIONS, n=1, cutoff=0.8)
+            if matches:
+                index = _NORMALIZED_FORMATIONS.index(matches[0])
+                break
+    return formation_id(FORMATIONS[index]) if index is not None else GENERAL_FORMATION_ID
+
+
+def content_words(text: str) -> set:
+    """Mots normalisés porteurs de sens (sans mots outils)"""
+    return {word for word in normalize_message(text).split() if word not in STOPWORDS}
+
+
+def lexical_similarity(first: str, second: str) -> float:
+    """Indice de Jaccard des mots porteurs de sens de deux textes (1 = mêmes mots)"""
+    first_tokens, second_tokens = content_words(first), content_words(second)
+    if not first_tokens and not second_tokens:
+        return 1.0
+    return len(first_tokens & second_tokens) / len(first_tokens | second_tokens)
@@ -0,0 +1,22 @@
+import os
+from typing import Dict, Any
+
+# Configuration des modèles Ollama
+OLLAMA_CONFIG = {
+    "chat_model": os.getenv("OLLAMA_CHAT_MODEL", "gemma3:4b"),
+    # Petit modèle pour la reformulation et les questions factuelles simples (voir model_router.py)
+    "small_chat_model": os.getenv("OLLAMA_SMALL_CHAT_MODEL", "gemma3:1b"),
+    "embedding_model": os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text"),
+    # Durée pendant laquelle Ollama garde les modèles en mémoire ("-1" = indéfiniment)
+    "keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+    # Préchauffage au démarrage du processus
+    "warmup_on_start": os.getenv("OLLAMA_WARMUP", "true").lower() == "true",
+    # Inactivité (en secondes) au-delà de laquelle un modèle est re-préchauffé
+    "rewarm_after_idle_seconds": int(os.getenv("OLLAMA_REWARM_AFTER_IDLE", "1200")),
+    "check_interval_seconds": int(os.getenv("OLLAMA_CHECK_INTERVAL", "60")),
+    "warmup_prompt": os.getenv("OLLAMA_WARMUP_PROMPT", "Bonjour"),
+}
+
+def get_ollama_config() -> Dict[str, Any]:
+    """Retourne la configuration des modèles Ollama"""
+    return OLLAMA_CONFIG
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Pré-génération des réponses aux questions fréquentes (à planifier chaque nuit)
+
+Les questions sont les plus fréquentes des tables analytics (unanswered_questions,
+événements "question_asked") et les clés de Research/fallback_answers.json. Chacune passe
+par la chaîne RAG du chat (recherche, seuil de pertinence, modèle choisi par le routeur)
+dans un pool de processus, chaque processus ouvrant l'index en service. Les réponses sont
+écrites dans ANSWER_STORE_PATH avec la version de l'index : le chat les sert sans appel au
+LLM tant que cette version reste en service (answer_store.py).
+
+Exemples:
+    python pregenerate_answers.py
+    python pregenerate_answers.py --top 500 --workers 4
+    python pregenerate_answers.py --questions questions.txt --dry-run
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional
+
+from answer_store import get_answer_store, index_version
+from answer_store_config import get_answer_store_config
+from llm import FALLBACK_PATH
+from text_normalization import question_hash
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def fallback_questions(path: str = FALLBACK_PATH) -> List[str]:
+    """Clés des réponses de secours (et de leurs sous-rubriques), en texte : "nombre_formations" -> "nombre formations" """
+    with open(path, encoding="utf-8") as f:
+        answers = json.load(f)
+    questions = []
+    for key, value in answers.items():
+        questions.append(key.replace("_", " "))
+        if isinstance(value, dict):
+            questions.extend(sub_key.replace("_", " ") for sub_key in value)
+    return questions
+
+
+def mine_questions(limit: int, min_frequency: int, days: int, fallback_path: Optional[str] = FALLBACK_PATH) -> List[Dict[str, Any]]:
+    """Questions à pré-générer : les plus fréquentes en base, puis les clés des réponses de secours"""
+    from database_service import get_database_service
+
+    questions = []
+    db = get_database_service()
+    if db.connect():
+        try:
+            questions = db.get_frequent_questions(limit, min_frequency, days)
+        finally:
+            db.disconnect()
+    else:
+        logger.warning("Base de données indisponible, seules les réponses de secours sont exploitées")
+
+    if fallback_path:
+        known = {question_hash(entry["question_text"]) for entry in questions}
+        for question in fallback_questions(fallback_path):
+            if question_hash(question) not in known:
+                known.add(question_hash(question))
+                questions.append({"question_text": question, "frequency": 0})
+    return questions
+
+
+# ===== GÉNÉRATION (processus du pool) =====
+
+_db = None
+_router = None
+
+
+def _init_worker(documents_path: str):
+    global _db, _router
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from corpus_index import open_corpus
+    from model_manager import get_keep_alive
+    from model_router import create_router
+
+    _db = open_corpus(documents_path, watch=False)
+    _router = create_router(keep_alive=get_keep_alive())
+
+
+def generate_answer(question: str) -> Dict[str, Any]:
+    """Réponse du chat à une question posée sans historique (answer None si hors documents)"""
+    from llm import answer_question
+    from model_router import model_name
+
+    result = {"question": question, "index_version": index_version(_db), "answer": None}
+    answer, docs = answer_question(_router, _db, question)
+    if docs:
+        result.update({
+            "answer": answer,
+            "sources": [{"source": doc.metadata.get("source"), "page": doc.metadata.get("page")} for doc in docs],
+            "model": model_name(_router.for_answer(question)[1]),
+        })
+    return result
+
+
+# ===== CLI =====
+
+def parse_arguments() -> argparse.Namespace:
+    config = get_answer_store_config()
+    parser = argparse.ArgumentParser(description="Pré-génération des réponses aux questions fréquentes.")
+    parser.add_argument("--questions", help="Fichier de questions (une par ligne) à la place des tables analytics.")
+    parser.add_argument("--top", type=int, default=config["top_questions"], help="Nombre de questions fréquentes.")
+    parser.add_argument("--min-frequency", type=int, default=config["min_frequency"], help="Fréquence minimale.")
+    parser.add_argument("--days", type=int, default=config["days"], help="Fenêtre des événements analytics (jours).")
+    parser.add_argument("--no-fallback", action="store_true", help="Ignorer les clés de fallback_answers.json.")
+    parser.add_argument("--workers", type=int, default=config["workers"], help="Processus de génération.")
+    parser.add_argument("--documents", default="Research", help="Dossier des documents (sans index prébuilt).")
+    parser.add_argument("--force", action="store_true", help="Regénérer les réponses déjà présentes pour cet index.")
+    parser.add_argument("--dry-run", action="store_true", help="Lister les questions sans générer.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [{"question_text": line.strip(), "frequency": 0} for line in f if line.strip()]
+    else:
+        questions = mine_questions(args.top, args.min_frequency, args.days,
+                                   None if args.no_fallback else FALLBACK_PATH)
+    print(f"📋 {len(questions)} questions à pré-générer")
+    if args.dry_run:
+        for entry in questions:
+            print(f"  {entry['frequency']:>5}  {entry['question_text']}")
+        return
+
+    from corpus_index import open_corpus
+
+    version = index_version(open_corpus(args.documents, watch=False))
+    if version is None:
+        print("❌ Erreur: version de l'index en service introuvable")
+        sys.exit(1)
+
+    store = get_answer_store()
+    # Les réponses d'une autre version d'index sont abandonnées
+    answers = dict(store.answers(version))
+    todo = [entry for entry in questions if args.force or question_hash(entry["question_text"]) not in answers]
+    print(f"🗂️ Index {version} : {len(answers)} réponses existantes, {len(todo)} à générer")
+
+    started = time.perf_counter()
+    generated = refused = stale = failed = 0
+    frequencies = {entry["question_text"]: entry["frequency"] for entry in todo}
+    with ProcessPoolExecutor(max_workers=max(args.workers, 1), initializer=_init_worker,
+                             initargs=(args.documents,)) as executor:
+        futures = {executor.submit(generate_answer, entry["question_text"]): entry["question_text"] for entry in todo}
+        for future in as_completed(futures):
+            question = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Génération impossible pour « {question} »: {e}")
+                failed += 1
+                continue
+            if result["index_version"] != version:
+                # L'index a changé pendant la génération
+                stale += 1
+            elif result["answer"] is None:
+                refused += 1
+            else:
+                answers[question_hash(question)] = {
+                    "question": question,
+                    "frequency": frequencies[question],
+                    "answer": result["answer"],
+                    "sources": result["sources"],
+                    "model": result["model"],
+                    "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+                generated += 1
+
+    store.save(version, answers)
+    print(f"✅ {generated} réponses générées en {time.perf_counter() - started:.1f}s "
+          f"({refused} hors documents, {stale} obsolètes, {failed} en erreur), "
+          f"{len(answers)} réponses dans {store.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+from typing import Dict, Any
+
+# Configuration du profilage CPU / mémoire (désactivé par défaut)
+PROFILING_CONFIG = {
+    "enabled": os.getenv("PROFILING_ENABLED", "false").lower() == "true",
+    # Proportion des requêtes profilées (0.0 à 1.0)
+    "sample_rate": float(os.getenv("PROFILING_SAMPLE_RATE", "0.1")),
+    "output_dir": os.getenv("PROFILING_DIR", "profiles"),
+    "top_n": int(os.getenv("PROFILING_TOP_N", "25")),
+    "tracemalloc_frames": int(os.getenv("PROFILING_TRACEMALLOC_FRAMES", "10")),
+    # Rotation des fichiers de rapport
+    "max_bytes": int(os.getenv("PROFILING_MAX_BYTES", str(5 * 1024 * 1024))),
+    "backup_count": int(os.getenv("PROFILING_BACKUP_COUNT", "5")),
+}
+
+def get_profiling_config() -> Dict[str, Any]:
+    """Retourne la configuration du profilage"""
+    return PROFILING_CONFIG
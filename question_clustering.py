@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Regroupement des questions non répondues par similarité sémantique (traitement par lots)
+
+Les nouvelles questions sont vectorisées avec le modèle d'embedding Ollama (nomic-embed-text),
+puis affectées au centroïde existant le plus proche (similarité cosinus >= seuil) ; les autres
+forment de nouveaux regroupements. --recluster recalcule tous les regroupements à partir des
+embeddings stockés (à planifier moins souvent, ex: chaque nuit).
+
+Exemples:
+    python question_clustering.py                 # affectation incrémentale (ex: toutes les heures)
+    python question_clustering.py --recluster     # regroupement complet
+"""
+
+import argparse
+import logging
+import sys
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from analytics_config import get_analytics_config
+from ollama_config import get_ollama_config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ===== CALCULS VECTORIELS =====
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Normalise chaque ligne (norme L2 = 1)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Affecte chaque vecteur (normalisé) à son centroïde le plus proche
+
+    Returns:
+        tuple: (indices des centroïdes, -1 si la similarité est sous le seuil ; similarités)
+    """
+    if len(centroids) == 0 or len(vectors) == 0:
+        return np.full(len(vectors), -1, dtype=int), np.zeros(len(vectors))
+    similarities = vectors @ centroids.T
+    best = similarities.argmax(axis=1)
+    scores = similarities[np.arange(len(vectors)), best]
+    return np.where(scores >= threshold, best, -1), scores
+
+
+def leader_clustering(vectors: np.ndarray, weights: np.ndarray, threshold: float,
+                      centroids: Optional[np.ndarray] = None,
+                      centroid_weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Regroupement en un passage : chaque vecteur rejoint le centroïde le plus proche si la
+    similarité dépasse le seuil, sinon il crée un nouveau regroupement. Les centroïdes
+    sont des moyennes pondérées (par la fréquence) mises à jour au fil de l'eau.
+
+    Returns:
+        tuple: (indice de regroupement par vecteur, centroïdes normalisés, poids des centroïdes)
+    """
+    dimension = vectors.shape[1]
+    existing = 0 if centroids is None else len(centroids)
+    sums = np.zeros((existing + len(vectors), dimension))
+    totals = np.zeros(existing + len(vectors))
+    if existing:
+        sums[:existing] = centroids * centroid_weights[:, None]
+        totals[:existing] = centroid_weights
+    normalized = np.zeros_like(sums)
+    if existing:
+        normalized[:existing] = normalize_rows(sums[:existing])
+
+    labels = np.empty(len(vectors), dtype=int)
+    count = existing
+    for i, vector in enumerate(vectors):
+        if count:
+            similarities = normalized[:count] @ vector
+            best = int(similarities.argmax())
+            if similarities[best] >= threshold:
+                labels[i] = best
+                sums[best] += weights[i] * vector
+                totals[best] += weights[i]
+                normalized[best] = sums[best] / (np.linalg.norm(sums[best]) or 1.0)
+                continue
+        labels[i] = count
+        sums[count] = weights[i] * vector
+        totals[count] = weights[i]
+        normalized[count] = vector
+        count += 1
+    return labels, normalized[:count], totals[:count]
+
+
+def refine_clusters(vectors: np.ndarray, weights: np.ndarray, labels: np.ndarray,
+                    iterations: int = 3) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Itérations de k-means sphérique pour corriger la dépendance à l'ordre du premier passage"""
+    count = int(labels.max()) + 1 if len(labels) else 0
+    for _ in range(iterations):
+        sums = np.zeros((count, vectors.shape[1]))
+        np.add.at(sums, labels, vectors * weights[:, None])
+        centroids = normalize_rows(sums)
+        new_labels = (vectors @ centroids.T).argmax(axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+    # Renumérote les regroupements non vides
+    used, labels = np.unique(labels, return_inverse=True)
+    sums = np.zeros((len(used), vectors.shape[1]))
+    np.add.at(sums, labels, vectors * weights[:, None])
+    totals = np.bincount(labels, weights=weights, minlength=len(used))
+    return labels, normalize_rows(sums), totals
+
+
+def representatives(vectors: np.ndarray, labels: np.ndarray, centroids: np.ndarray) -> Dict[int, int]:
+    """Pour chaque regroupement, indice du vecteur le plus proche de son centroïde"""
+    scores = np.einsum("ij,ij->i", vectors, centroids[labels])
+    best: Dict[int, int] = {}
+    for index in np.argsort(-scores):
+        best.setdefault(int(labels[index]), int(index))
+    return best
+
+
+def to_blob(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def from_blob(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float32).astype(np.float64)
+
+
+# ===== TRAITEMENT PAR LOTS =====
+
+def embed_texts(texts: List[str], batch_size: int = 64) -> np.ndarray:
+    """Vectorise les textes avec le modèle d'embedding Ollama"""
+    import ollama
+
+    model = get_ollama_config()["embedding_model"]
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        response = ollama.embed(model=model, input=texts[start:start + batch_size])
+        vectors.extend(response["embeddings"])
+    return normalize_rows(np.asarray(vectors, dtype=np.float64))
+
+
+class QuestionClusteringJob:
+    """Vectorise et regroupe les questions non répondues sur une connexion DatabaseService ouverte"""
+
+    def __init__(self, db, threshold: Optional[float] = None):
+        config = get_analytics_config()
+        self.db = db
+        self.threshold = threshold or config["question_cluster_threshold"]
+        self.embedding_batch_size = config["question_embedding_batch_size"]
+
+    def run_incremental(self, limit: int = 1000) -> int:
+        """
+        Affecte les nouvelles questions aux regroupements existants ou à de nouveaux regroupements
+
+        Returns:
+            int: Nombre de questions traitées
+        """
+        processed = 0
+        while True:
+            questions = self.db.get_questions_to_embed(limit)
+            if not questions:
+                break
+            existing = self.db.get_question_clusters()
+            centroids = np.array([from_blob(c["centroid"]) for c in existing]) if existing else None
+            centroid_weights = np.array([c["weight"] for c in existing], dtype=np.float64) if existing else None
+
+            vectors = embed_texts([q["question_text"] for q in questions], self.embedding_batch_size)
+            weights = np.array([max(q["frequency"] or 1, 1) for q in questions], dtype=np.float64)
+            labels, new_centroids, new_weights = leader_clustering(vectors, weights, self.threshold,
+                                                                   centroids, centroid_weights)
+            reps = representatives(vectors, labels, new_centroids)
+
+            clusters = []
+            for index in range(len(new_centroids)):
+                if index < len(existing):
+                    if index not in reps:
+                        continue
+                    clusters.append({"id": existing[index]["id"], "key": index,
+                                     "representative_text": existing[index]["representative_text"],
+                                     "centroid": to_blob(new_centroids[index]), "weight": float(new_weights[index])})
+                else:
+                    clusters.append({"id": None, "key": index,
+                                     "representative_text": questions[reps[index]]["question_text"],
+                                     "centroid": to_blob(new_centroids[index]), "weight": float(new_weights[index])})
+            assignments = [(to_blob(vectors[i]), int(labels[i]), q["id"]) for i, q in enumerate(questions)]
+            if not self.db.save_question_clusters(clusters, assignments):
+                break
+            processed += len(questions)
+            logger.info(f"{processed} questions regroupées ({len(new_centroids)} regroupements)")
+            if len(questions) < limit:
+                break
+
+        self.db.refresh_question_cluster_stats()
+        return processed
+
+    def run_full(self, iterations: int = 3) -> int:
+        """
+        Recalcule tous les regroupements à partir des embeddings stockés
+
+        Returns:
+            int: Nombre de regroupements
+        """
+        self.run_incremental()
+        questions = self.db.get_embedded_questions()
+        if not questions:
+            return 0
+
+        vectors = normalize_rows(np.array([from_blob(q["embedding"]) for q in questions]))
+        weights = np.array([max(q["frequency"] or 1, 1) for q in questions], dtype=np.float64)
+        labels, _, _ = leader_clustering(vectors, weights, self.threshold)
+        labels, centroids, totals = refine_clusters(vectors, weights, labels, iterations)
+        reps = representatives(vectors, labels, centroids)
+
+        clusters = [{"id": None, "key": index, "representative_text": questions[reps[index]]["question_text"],
+                     "centroid": to_blob(centroids[index]), "weight": float(totals[index])}
+                    for index in range(len(centroids))]
+        assignments = [(q["embedding"], int(labels[i]), q["id"]) for i, q in enumerate(questions)]
+        if not self.db.save_question_clusters(clusters, assignments, replace=True):
+            return 0
+        self.db.refresh_question_cluster_stats()
+        return len(clusters)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Regroupement des questions non répondues.")
+    parser.add_argument("--recluster", action="store_true", help="Recalculer tous les regroupements.")
+    parser.add_argument("--threshold", type=float, default=None, help="Similarité cosinus minimale (0-1).")
+    parser.add_argument("--limit", type=int, default=1000, help="Questions vectorisées par lot.")
+    return parser.parse_args()
+
+
+def main():
+    from database_service import get_database_service
+
+    args = parse_arguments()
+    db = get_database_service()
+    if not db.connect():
+        print("❌ Impossible de se connecter à la base de données")
+        sys.exit(1)
+
+    try:
+        job = QuestionClusteringJob(db, threshold=args.threshold)
+        if args.recluster:
+            count = job.run_full()
+            print(f"✅ {count} regroupements recalculés")
+        else:
+            processed = job.run_incremental(limit=args.limit)
+            print(f"✅ {processed} nouvelles questions regroupées")
+    finally:
+        db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Profilage CPU (cProfile) et mémoire (tracemalloc) d'un échantillon de requêtes.
+
+Activé uniquement avec PROFILING_ENABLED=true : sinon profile_request() ne fait rien.
+Pour chaque requête échantillonnée, les fonctions les plus coûteuses et les principaux
+sites d'allocation (ainsi que leur évolution depuis la requête profilée précédente)
+sont écrits dans des fichiers à rotation (cpu.log et memory.log).
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Any, Callable, Optional
+
+from profiling_config import get_profiling_config
+from tracing import get_correlation_id
+
+logger = logging.getLogger(__name__)
+
+_profile_lock = threading.Lock()
+_state_lock = threading.Lock()
+_previous_snapshot = None
+_report_loggers = {}
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _get_report_logger(kind: str) -> logging.Logger:
+    """Logger dédié écrivant dans un fichier à rotation (cpu.log / memory.log)"""
+    with _state_lock:
+        if kind not in _report_loggers:
+            config = get_profiling_config()
+            os.makedirs(config["output_dir"], exist_ok=True)
+            handler = RotatingFileHandler(
+                os.path.join(config["output_dir"], f"{kind}.log"),
+                maxBytes=config["max_bytes"],
+                backupCount=config["backup_count"],
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            report_logger = logging.getLogger(f"profiling.{kind}")
+            report_logger.setLevel(logging.INFO)
+            report_logger.propagate = False
+            report_logger.addHandler(handler)
+            _report_loggers[kind] = report_logger
+        return _report_loggers[kind]
+
+
+def describe_session_state(session_state) -> Dict[str, Any]:
+    """Résume le contenu d'une session Streamlit (suspects habituels de croissance mémoire)"""
+    messages = session_state.get("messages", []) or []
+    qualification_messages = session_state.get("qualification_messages", []) or []
+    return {
+        "session_keys": len(list(session_state.keys())),
+        "messages": len(messages),
+        "messages_chars": sum(len(str(m.get("content", ""))) for m in messages),
+        "qualification_messages": len(qualification_messages),
+        "has_vectorstore": session_state.get("vectorstore") is not None,
+    }
+
+
+def _format_header(name: str, duration: float, extra: Dict[str, Any]) -> str:
+    details = " ".join(f"{key}={value}" for key, value in extra.items())
+    return (
+        f"===== {datetime.now().isoformat(timespec='seconds')} request={name} "
+        f"correlation_id={get_correlation_id() or '-'} duration_ms={duration * 1000:.1f} {details}".rstrip()
+    )
+
+
+def _write_cpu_report(profiler: cProfile.Profile, header: str, top_n: int):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top_n)
+    _get_report_logger("cpu").info(f"{header}\n{stream.getvalue()}")
+
+
+def _write_memory_report(snapshot: tracemalloc.Snapshot, previous: Optional[tracemalloc.Snapshot],
+                         header: str, top_n: int):
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [header, f"traced_current_kb={current / 1024:.1f} traced_peak_kb={peak / 1024:.1f}"]
+
+    lines.append(f"-- Top {top_n} sites d'allocation --")
+    for stat in snapshot.statistics("lineno")[:top_n]:
+        lines.append(f"{stat.size / 1024:10.1f} KiB  {stat.count:8d} blocs  {stat.traceback}")
+
+    if previous is not None:
+        lines.append(f"-- Top {top_n} variations depuis la requête profilée précédente --")
+        for stat in snapshot.compare_to(previous, "lineno")[:top_n]:
+            lines.append(
+                f"{stat.size_diff / 1024:+10.1f} KiB  {stat.count_diff:+8d} blocs  "
+                f"(total {stat.size / 1024:.1f} KiB)  {stat.traceback}"
+            )
+    _get_report_logger("memory").info("\n".join(lines) + "\n")
+
+
+@contextmanager
+def profile_request(name: str, describe: Optional[Callable[[], Dict[str, Any]]] = None):
+    """
+    Profile le bloc (CPU + mémoire) si le profilage est activé et que la requête est échantillonnée
+
+    Args:
+        name: Nom de la requête (ex: "chat", "qualification")
+        describe: Fonction appelée en fin de requête pour ajouter du contexte au rapport
+    """
+    global _previous_snapshot
+    config = get_profiling_config()
+    if not config["enabled"] or random.random() >= config["sample_rate"]:
+        yield
+        return
+
+    # Une seule requête profilée à la fois : tracemalloc est global au processus
+    if not _profile_lock.acquire(blocking=False):
+        yield
+        return
+
+    try:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(config["tracemalloc_frames"])
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - started
+            try:
+                snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+                extra = describe() if describe else {}
+                header = _format_header(name, duration, extra)
+                _write_cpu_report(profiler, header, config["top_n"])
+                _write_memory_report(snapshot, _previous_snapshot, header, config["top_n"])
+                _previous_snapshot = snapshot
+            except Exception as e:
+                logger.error(f"Erreur lors de l'écriture du rapport de profilage: {e}")
+    finally:
+        _profile_lock.release()
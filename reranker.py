@@ -0,0 +1,177 @@
+"""
+Re-classement local des extraits retrouvés, pour n'envoyer au LLM que les plus pertinents.
+
+La base vectorielle ramène largement (k extraits, peu coûteux), puis un modèle plus fin
+note chaque paire (question, extrait) par lots :
+- "cross_encoder" : petit cross-encoder sur CPU (sentence-transformers, optionnel) ;
+- "embedding" : similarité cosinus avec le modèle d'embedding existant, en utilisant les
+  préfixes de tâche de nomic-embed-text ("search_query: " / "search_document: ").
+Seuls les top_n meilleurs extraits sont gardés. Si le budget de latence est dépassé (ou s'il
+le serait d'après les mesures précédentes), le re-classement est abandonné et les
+fallback_k premiers extraits de la recherche vectorielle sont utilisés tels quels.
+"""
+
+import logging
+import math
+import threading
+from abc import ABC, abstractmethod
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from retrieval_config import get_retrieval_config
+from tracing import get_tracer, span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Reranker(ABC):
+    """Re-classement par lots avec budget de latence (score() à définir par les sous-classes)"""
+
+    name = "reranker"
+
+    def __init__(self, top_n: int = 3, budget_ms: float = 500, batch_size: int = 16, fallback_k: int = 5):
+        self.top_n = top_n
+        self.budget = budget_ms / 1000
+        self.batch_size = batch_size
+        self.fallback_k = fallback_k
+        # Durée moyenne de notation d'un extrait (moyenne glissante), pour renoncer avant de commencer
+        self.seconds_per_document = 0.0
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        """Note de chaque texte pour la question (plus haut = plus pertinent)"""
+
+    def _estimate(self, seconds_per_document: float):
+        with self._lock:
+            if self.seconds_per_document:
+                self.seconds_per_document = 0.8 * self.seconds_per_document + 0.2 * seconds_per_document
+            else:
+                self.seconds_per_document = seconds_per_document
+
+    def _skip(self, docs: List[Document], reason: str) -> List[Document]:
+        logger.info(f"Re-classement ignoré ({reason}), {min(len(docs), self.fallback_k)} extraits conservés")
+        return docs[:self.fallback_k]
+
+    def rerank(self, query: str, docs: List[Document]) -> List[Document]:
+        """
+        Les top_n extraits les mieux notés, ou les fallback_k premiers si le budget est dépassé
+        ou si la notation échoue (modèle indisponible)
+        """
+        if len(docs) <= self.top_n:
+            return docs
+
+        if self.seconds_per_document * len(docs) > self.budget:
+            # Une mesure lente isolée ne doit pas désactiver le re-classement pour toujours
+            with self._lock:
+                self.seconds_per_document *= 0.9
+            with span("chat.rerank", reranker=self.name, outcome="skipped"):
+                return self._skip(docs, "budget estimé dépassé")
+
+        # Au moins deux lots, pour que le budget soit vérifié avant la fin de la notation
+        batch_size = min(self.batch_size, math.ceil(len(docs) / 2))
+        # L'issue (notation complète, budget dépassé en cours de route, erreur) n'est connue qu'à la fin
+        started_at, started = time.time(), time.perf_counter()
+        scores: List[float] = []
+        outcome = "scored"
+        try:
+            for start in range(0, len(docs), batch_size):
+                batch = docs[start:start + batch_size]
+                scores.extend(float(value) for value in self.score(query, [doc.page_content for doc in batch]))
+                if time.perf_counter() - started > self.budget and len(scores) < len(docs):
+                    outcome = "budget_exceeded"
+                    break
+        except Exception as e:
+            outcome = "error"
+            logger.error(f"Erreur du re-classeur {self.name}: {e}")
+        elapsed = time.perf_counter() - started
+        get_tracer().record("chat.rerank", elapsed, {"reranker": self.name, "outcome": outcome},
+                            error=outcome == "error", started_at=started_at)
+        if outcome == "error":
+            return self._skip(docs, "erreur du modèle")
+        self._estimate(elapsed / len(scores))
+        if outcome == "budget_exceeded":
+            return self._skip(docs, f"budget de {self.budget * 1000:.0f} ms dépassé")
+
+        order = sorted(range(len(docs)), key=lambda i: -scores[i])[:self.top_n]
+        return [docs[i] for i in order]
+
+
+class EmbeddingReranker(Reranker):
+    """Similarité cosinus avec préfixes de tâche, via le modèle d'embedding (Ollama)"""
+
+    name = "embedding"
+    QUERY_PREFIX = "search_query: "
+    DOCUMENT_PREFIX = "search_document: "
+
+    def __init__(self, embedding=None, **kwargs):
+        super().__init__(**kwargs)
+        if embedding is None:
+            from document_loader import get_embeddings
+            embedding = get_embeddings()
+        self.embedding = embedding
+
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        query_vector = np.asarray(self.embedding.embed_query(self.QUERY_PREFIX + query), dtype=np.float32)
+        vectors = np.asarray(self.embedding.embed_documents([self.DOCUMENT_PREFIX + text for text in texts]), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * max(np.linalg.norm(query_vector), 1e-12)
+        return list(vectors @ query_vector / np.maximum(norms, 1e-12))
+
+
+class CrossEncoderReranker(Reranker):
+    """Cross-encoder sur CPU (sentence-transformers)"""
+
+    name = "cross_encoder"
+
+    def __init__(self, model_name: str, max_length: int = 512, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ImportError("Le re-classement par cross-encoder nécessite sentence-transformers "
+                              "(pip install sentence-transformers)")
+        self.model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+
+    def score(self, query: str, texts: Sequence[str]) -> List[float]:
+        return list(self.model.predict([(query, text) for text in texts], batch_size=self.batch_size))
+
+
+def create_reranker(config: Optional[dict] = None) -> Optional[Reranker]:
+    """Re-classeur configuré (RERANK_MODE), ou None si désactivé ou indisponible"""
+    config = config or get_retrieval_config()
+    mode = config["rerank_mode"]
+    options = {
+        "top_n": config["rerank_top_n"],
+        "budget_ms": config["rerank_budget_ms"],
+        "batch_size": config["rerank_batch_size"],
+        "fallback_k": config["rerank_fallback_k"],
+    }
+    if mode == "embedding":
+        return EmbeddingReranker(**options)
+    if mode == "cross_encoder":
+        try:
+            return CrossEncoderReranker(config["rerank_model"], **options)
+        except Exception as e:
+            logger.error(f"Cross-encoder {config['rerank_model']} indisponible, re-classement désactivé: {e}")
+            return None
+    if mode not in ("", "off", "none"):
+        logger.warning(f"RERANK_MODE inconnu: {mode}, re-classement désactivé")
+    return None
+
+
+_reranker = None
+_reranker_loaded = False
+_reranker_lock = threading.Lock()
+
+def get_reranker() -> Optional[Reranker]:
+    """Re-classeur partagé du processus (modèle chargé une seule fois)"""
+    global _reranker, _reranker_loaded
+    with _reranker_lock:
+        if not _reranker_loaded:
+            _reranker = create_reranker()
+            _reranker_loaded = True
+        return _reranker
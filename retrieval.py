@@ -0,0 +1,205 @@
+"""
+Recherche des extraits de documents, limitée à la formation détectée quand il y en a une.
+
+Chaque extrait indexé porte la métadonnée "formation_id" (voir document_loader). Quand la
+conversation cite une formation, la recherche est pré-filtrée sur cet identifiant : moins
+de candidats et un prompt plus court. Sans formation détectée, ou si le filtre ramène trop
+peu d'extraits (index construit avant l'étiquetage, formation sans brochure), la recherche
+porte sur tout le corpus.
+
+Chaque extrait porte son score de pertinence (metadata["relevance_score"], plus haut = plus
+pertinent ; négatif possible avec la distance L2 de Chroma). Si le
+meilleur est sous le seuil calibré (calibrate_threshold.py), aucun extrait n'est retourné :
+la question est hors des documents et la génération est évitée. Sinon les extraits sont
+re-classés (reranker.py) si configuré.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from nlu import GENERAL_FORMATION_ID, lexical_similarity
+from reranker import get_reranker
+from retrieval_config import get_retrieval_config
+from tracing import get_tracer, span
+
+logger = logging.getLogger(__name__)
+
+_calibration_cache: Dict[str, Any] = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def formation_filter(formation_id: str, include_general: bool = False) -> Dict[str, Any]:
+    """Filtre de métadonnées Chroma pour une formation"""
+    if include_general:
+        return {"formation_id": {"$in": [formation_id, GENERAL_FORMATION_ID]}}
+    return {"formation_id": formation_id}
+
+
+def _document_key(doc: Document):
+    return doc.metadata.get("source"), doc.metadata.get("page"), doc.page_content
+
+
+def search(db, query: str, k: int, where: Optional[Dict[str, Any]] = None) -> List[Document]:
+    """Recherche de similarité, éventuellement filtrée sur les métadonnées (score dans relevance_score)"""
+    docs = []
+    for doc, score in db.similarity_search_with_relevance_scores(query, k=k, filter=where):
+        doc.metadata["relevance_score"] = score
+        docs.append(doc)
+    return docs
+
+
+def best_relevance(docs: List[Document]) -> float:
+    """Score de pertinence du meilleur extrait (-inf sans extrait)"""
+    return max((doc.metadata.get("relevance_score", float("-inf")) for doc in docs), default=float("-inf"))
+
+
+def relevance_threshold() -> Optional[float]:
+    """Seuil de pertinence : RELEVANCE_THRESHOLD, sinon fichier de calibration (relu s'il change), sinon None"""
+    config = get_retrieval_config()
+    if config["relevance_threshold"] is not None:
+        return config["relevance_threshold"]
+    path = config["relevance_calibration_file"]
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _calibration_cache.get("key") != (path, mtime):
+        try:
+            with open(path, encoding="utf-8") as f:
+                threshold = float(json.load(f)["threshold"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Fichier de calibration {path} illisible: {e}")
+            threshold = None
+        _calibration_cache.update(key=(path, mtime), threshold=threshold)
+    return _calibration_cache["threshold"]
+
+
+def retrieve(db, query: str, formation_id: Optional[str] = None) -> List[Document]:
+    """
+    Extraits pertinents pour la question, re-classés si un re-classeur est configuré ;
+    liste vide si aucun n'atteint le seuil de pertinence
+
+    Args:
+        db: Base vectorielle (Chroma)
+        query: Question autonome
+        formation_id: Identifiant normalisé de la formation détectée (nlu.detect_formation_id)
+    """
+    return select_relevant(query, search_candidates(db, query, formation_id))
+
+
+def select_relevant(query: str, docs: List[Document], scored: Optional[List[Document]] = None) -> List[Document]:
+    """
+    Applique le seuil de pertinence puis le re-classement
+
+    Args:
+        query: Question autonome (utilisée pour le re-classement)
+        docs: Extraits candidats
+        scored: Extraits dont le meilleur score décide du seuil (docs par défaut)
+    """
+    threshold = relevance_threshold()
+    if threshold is not None and best_relevance(docs if scored is None else scored) < threshold:
+        return []
+    reranker = get_reranker()
+    return reranker.rerank(query, docs) if reranker else docs
+
+
+def search_candidates(db, query: str, formation_id: Optional[str] = None) -> List[Document]:
+    """Recherche vectorielle (filtrée sur la formation si elle est connue, complétée sinon)"""
+    config = get_retrieval_config()
+    if not formation_id:
+        with span("chat.retrieval", scope="global"):
+            return search(db, query, config["k"])
+
+    with span("chat.retrieval", scope="formation"):
+        docs = search(db, query, config["formation_k"], formation_filter(formation_id, config["include_general"]))
+    if len(docs) >= config["min_formation_results"]:
+        return docs
+
+    # Complète les extraits filtrés par une recherche sur tout le corpus
+    with span("chat.retrieval", scope="fallback"):
+        seen = {_document_key(doc) for doc in docs}
+        for doc in search(db, query, config["k"]):
+            if len(docs) >= config["k"]:
+                break
+            if _document_key(doc) not in seen:
+                seen.add(_document_key(doc))
+                docs.append(doc)
+    return docs
+
+
+def merge_results(primary: List[Document], secondary: List[Document]) -> List[Document]:
+    """Extraits de primary puis ceux de secondary absents de primary, au plus autant que la plus longue liste"""
+    limit = max(len(primary), len(secondary))
+    merged, seen = [], set()
+    for doc in primary + secondary:
+        if _document_key(doc) not in seen:
+            seen.add(_document_key(doc))
+            merged.append(doc)
+    return merged[:limit]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_retrieval_config()["speculative_workers"],
+                                           thread_name_prefix="speculative-retrieval")
+        return _executor
+
+
+def speculative_retrieve(db, question: str, formation_id: Optional[str],
+                         condense: Callable[[], str]) -> Tuple[str, List[Document]]:
+    """
+    Recherche sur la question brute pendant sa reformulation
+
+    Si la question reformulée reste proche de la question brute, les extraits anticipés
+    sont réutilisés ; sinon une seconde recherche est faite et les résultats fusionnés.
+    Seuil de pertinence et re-classement sont appliqués une seule fois, au résultat final
+    et pour la question reformulée : après fusion, le seuil porte sur les extraits de la
+    question reformulée. La latence gagnée par rapport à l'enchaînement reformulation puis recherche est
+    enregistrée sous "chat.speculative_saved" (label outcome = reused / merged).
+
+    Returns:
+        (question reformulée, extraits)
+    """
+    started = time.perf_counter()
+    timings = {}
+
+    def timed_search(query):
+        search_started = time.perf_counter()
+        docs = search_candidates(db, query, formation_id)
+        timings["speculative"] = time.perf_counter() - search_started
+        return docs
+
+    # Le contexte est copié pour rattacher les spans de la recherche à la requête en cours
+    future = _get_executor().submit(contextvars.copy_context().run, timed_search, question)
+    standalone_question = condense()
+    condense_duration = time.perf_counter() - started
+
+    similarity = lexical_similarity(question, standalone_question)
+    if similarity >= get_retrieval_config()["speculative_similarity"]:
+        candidates = scored = future.result()
+        outcome = "reused"
+        sequential = condense_duration + timings["speculative"]
+    else:
+        second_started = time.perf_counter()
+        scored = search_candidates(db, standalone_question, formation_id)
+        second_duration = time.perf_counter() - second_started
+        candidates = merge_results(scored, future.result())
+        outcome = "merged"
+        sequential = condense_duration + second_duration
+
+    saved = sequential - (time.perf_counter() - started)
+    docs = select_relevant(standalone_question, candidates, scored)
+    get_tracer().record("chat.speculative_saved", max(saved, 0.0), {"outcome": outcome})
+    logger.debug(f"Recherche anticipée ({outcome}, similarité {similarity:.2f}): {saved * 1000:.0f} ms gagnées")
+    return standalone_question, docs
@@ -0,0 +1,38 @@
+import os
+from typing import Dict, Any
+
+# Recherche des extraits de documents (RAG)
+RETRIEVAL_CONFIG = {
+    # Nombre d'extraits d'une recherche sur tout le corpus
+    "k": int(os.getenv("RETRIEVAL_K", "10")),
+    # Nombre d'extraits lorsque la recherche est limitée à la formation détectée
+    "formation_k": int(os.getenv("RETRIEVAL_FORMATION_K", "6")),
+    # En dessous de ce nombre d'extraits filtrés, on complète par une recherche globale
+    "min_formation_results": int(os.getenv("RETRIEVAL_MIN_FORMATION_RESULTS", "2")),
+    # Inclure les documents généraux (présentation de l'école, catalogue) dans la recherche filtrée
+    "include_general": os.getenv("RETRIEVAL_INCLUDE_GENERAL", "false").lower() == "true",
+    # Re-classement des extraits retrouvés : "off", "embedding" ou "cross_encoder" (voir reranker.py)
+    "rerank_mode": os.getenv("RERANK_MODE", "off").lower(),
+    "rerank_model": os.getenv("RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"),
+    # Extraits transmis au LLM après re-classement
+    "rerank_top_n": int(os.getenv("RERANK_TOP_N", "3")),
+    "rerank_batch_size": int(os.getenv("RERANK_BATCH_SIZE", "16")),
+    # Au-delà de ce budget, le re-classement est abandonné
+    "rerank_budget_ms": float(os.getenv("RERANK_BUDGET_MS", "500")),
+    # Extraits transmis (ordre de la recherche vectorielle) quand le re-classement est abandonné
+    "rerank_fallback_k": int(os.getenv("RERANK_FALLBACK_K", "5")),
+    # Pertinence minimale du meilleur extrait (score de Chroma, négatif possible) ; en dessous,
+    # réponse « hors documents » sans LLM.
+    # Sans RELEVANCE_THRESHOLD, valeur du fichier écrit par calibrate_threshold.py (sinon désactivé)
+    "relevance_threshold": float(os.getenv("RELEVANCE_THRESHOLD")) if os.getenv("RELEVANCE_THRESHOLD") else None,
+    "relevance_calibration_file": os.getenv("RELEVANCE_CALIBRATION_FILE", "relevance_threshold.json"),
+    # Recherche lancée sur la question brute pendant sa reformulation (getStreamingChain)
+    "speculative": os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() == "true",
+    # Similarité lexicale (0-1) question brute / reformulée au-delà de laquelle la recherche anticipée suffit
+    "speculative_similarity": float(os.getenv("SPECULATIVE_SIMILARITY", "0.6")),
+    "speculative_workers": int(os.getenv("SPECULATIVE_WORKERS", "4")),
+}
+
+def get_retrieval_config() -> Dict[str, Any]:
+    """Retourne la configuration de la recherche documentaire"""
+    return RETRIEVAL_CONFIG
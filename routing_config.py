@@ -0,0 +1,25 @@
+import os
+from typing import Dict, Any
+
+# Répartition des appels LLM entre le petit modèle et le modèle principal (model_router.py)
+ROUTING_CONFIG = {
+    "enabled": os.getenv("MODEL_ROUTING", "true").lower() == "true",
+    # Modèle de la reformulation de la question : "small" ou "large"
+    "condense_tier": os.getenv("ROUTING_CONDENSE_TIER", "small").lower(),
+    # Au-delà de ce nombre de mots, la question part sur le modèle principal
+    "max_small_words": int(os.getenv("ROUTING_MAX_SMALL_WORDS", "18")),
+    # Au-delà de ce nombre de sous-questions (points d'interrogation, mots interrogatifs), idem
+    "max_small_questions": int(os.getenv("ROUTING_MAX_SMALL_QUESTIONS", "1")),
+    # Mots (sans accents, début de mot) signalant une demande de conseil ou de comparaison
+    "escalate_keywords": [
+        keyword.strip() for keyword in os.getenv(
+            "ROUTING_ESCALATE_KEYWORDS",
+            "recommand,conseil,compar,difference,choisir,choix,hesite,laquelle,lequel,mieux,pourquoi,"
+            "expliqu,reconversion,projet,niveau,adapte",
+        ).split(",") if keyword.strip()
+    ],
+}
+
+def get_routing_config() -> Dict[str, Any]:
+    """Retourne la configuration du routage entre modèles"""
+    return ROUTING_CONFIG
@@ -0,0 +1,27 @@
+"""
+Tests des réponses pré-générées (answer_store.py)
+"""
+
+from answer_store import AnswerStore, is_standalone
+from text_normalization import question_hash
+
+
+def test_answers_are_tied_to_index_version(tmp_path):
+    store = AnswerStore(str(tmp_path / "answers.json"))
+    assert store.lookup("Quel est le prix des macarons ?", "v1") is None
+
+    store.save("v1", {question_hash("Quel est le prix des macarons ?"): {"answer": "450 euros."}})
+    assert store.lookup("quel est le PRIX des macarons", "v1")["answer"] == "450 euros."
+    assert store.lookup("Quel est le prix des macarons ?", "v2") is None
+    assert store.lookup("Quel est le prix des macarons ?", None) is None
+    assert store.status()["answers"] == 1
+
+
+def test_is_standalone():
+    question = "Et combien de jours ?"
+    assert is_standalone(question, [{"role": "assistant", "content": "Bonjour !"}, {"role": "user", "content": question}])
+    assert not is_standalone(question, [{"role": "user", "content": "Prix des macarons ?"},
+                                        {"role": "assistant", "content": "450 euros."},
+                                        {"role": "user", "content": question}])
+    assert is_standalone("Combien de jours dure la formation macarons ?",
+                         [{"role": "user", "content": "Bonjour"}, {"role": "assistant", "content": "Bonjour !"}])
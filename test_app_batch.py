@@ -0,0 +1,20 @@
+"""
+Tests de la lecture des questions du mode par lots de app.py
+"""
+
+from app import read_questions
+
+
+def test_read_jsonl_and_text_lines(tmp_path):
+    path = tmp_path / "questions.jsonl"
+    path.write_text('{"id": "q1", "question": "Prix des macarons ?"}\n\nCombien de jours ?\n', encoding="utf-8")
+    assert list(read_questions(str(path))) == [
+        {"id": "q1", "question": "Prix des macarons ?"},
+        {"question": "Combien de jours ?"},
+    ]
+
+
+def test_read_csv(tmp_path):
+    path = tmp_path / "questions.csv"
+    path.write_text('question,expected\n"Quel matériel, et quelle tenue ?",tablier\n', encoding="utf-8")
+    assert list(read_questions(str(path))) == [{"question": "Quel matériel, et quelle tenue ?", "expected": "tablier"}]
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests de corpus_index.py : artefact versionné, vérification et changement de version
+"""
+
+import os
+
+import pytest
+from langchain_core.embeddings import FakeEmbeddings
+
+from corpus_index import CorpusIndex, activate_version, build_index, current_version, verify_version
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    embedded: int = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_build_activate_and_switch(tmp_path):
+    docs, indexes = tmp_path / "docs", str(tmp_path / "indexes")
+    docs.mkdir()
+    _write(docs / "brochure_macarons.md", "Formation macarons sur deux jours.")
+    embedding = CountingEmbeddings(size=8)
+
+    first = build_index(str(docs), indexes, embedding=embedding, version="v1")
+    assert first["chunks"] == 1 and first["dimensions"] == 8
+    activate_version(indexes, "v1")
+    assert current_version(indexes) == "v1"
+
+    index = CorpusIndex(indexes, verify=True, embedding=embedding).start(watch=False)
+    embedded = embedding.embedded
+    assert [d.metadata["formation_id"] for d in index.as_retriever(search_kwargs={"k": 1}).invoke("macarons")] == ["macarons"]
+    assert embedding.embedded == embedded  # le chargement n'embedde aucun extrait
+
+    _write(docs / "brochure_fraisier.md", "Formation fraisier.")
+    build_index(str(docs), indexes, embedding=embedding, version="v2")
+    activate_version(indexes, "v2")
+    assert index.version == "v1"  # les requêtes ne chargent jamais de version
+    assert index.refresh() is True
+    assert len(index.store.get()["ids"]) == 2
+    assert index.version == "v2"
+    assert verify_version(indexes, "v1") == []  # le montage n'a rien modifié
+
+    with open(os.path.join(indexes, "v1", "chunks.jsonl"), "a", encoding="utf-8") as f:
+        f.write("\n")
+    assert verify_version(indexes, "v1") == ["chunks.jsonl"]
+    with pytest.raises(ValueError):
+        activate_version(indexes, "v1")
+
+
+def test_rollback_to_previous_version(tmp_path):
+    docs, indexes = tmp_path / "docs", str(tmp_path / "indexes")
+    docs.mkdir()
+    _write(docs / "brochure_macarons.md", "Formation macarons sur deux jours.")
+    embedding = FakeEmbeddings(size=8)
+    build_index(str(docs), indexes, embedding=embedding, version="a")
+    _write(docs / "brochure_fraisier.md", "Formation fraisier.")
+    build_index(str(docs), indexes, embedding=embedding, version="b")
+
+    index = CorpusIndex(indexes, version="a", embedding=embedding).start()
+    index.switch("b")
+    index.switch("a")  # retour arrière : la version b libérée ne doit pas emporter la nouvelle a
+    index.switch("b")
+    index.switch("a")
+    assert index.version == "a"
+    assert len(index.similarity_search_with_relevance_scores("macarons", k=4)) == 1
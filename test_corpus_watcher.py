@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests de corpus_watcher.py : réindexation incrémentale dans une collection fantôme
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from langchain_core.embeddings import FakeEmbeddings
+
+from corpus_watcher import CorpusWatcher
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    """Embeddings factices qui comptent les textes embeddés"""
+    embedded: int = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def _write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _sources(watcher):
+    return sorted({m["source"] for m in watcher.store.get()["metadatas"]})
+
+
+def test_incremental_sync_and_swap(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    _write(docs / "brochure_macarons.md", "Formation macarons sur deux jours.")
+    _write(docs / "brochure_fraisier.md", "Formation fraisier, une journée.")
+    embedding = CountingEmbeddings(size=8)
+
+    watcher = CorpusWatcher(str(docs), str(tmp_path / "storage"), embedding=embedding).start(watch=False)
+    assert embedding.embedded == 2
+    first = watcher.store
+    assert watcher.sync() is False
+
+    _write(docs / "brochure_entremet.md", "Formation entremet.")
+    os.remove(docs / "brochure_fraisier.md")
+    assert watcher.sync() is True
+    # Seul le nouveau fichier est embeddé, la collection active a été remplacée
+    assert embedding.embedded == 3
+    assert watcher.store is not first
+    assert _sources(watcher) == [str(docs / "brochure_entremet.md"), str(docs / "brochure_macarons.md")]
+    assert first.get()["ids"]  # l'ancienne collection reste lisible jusqu'au remplacement suivant
+
+    # Un nouveau processus reprend l'index persisté sans rien ré-embedder
+    restarted = CorpusWatcher(str(docs), str(tmp_path / "storage"), embedding=embedding).start(watch=False)
+    assert embedding.embedded == 3
+    assert _sources(restarted) == _sources(watcher)
+
+
+def test_watch_debounces_events(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    _write(docs / "a.md", "Pâtisserie française.")
+    watcher = CorpusWatcher(str(docs), str(tmp_path / "storage"), embedding=CountingEmbeddings(size=8),
+                            debounce_seconds=0.3).start(watch=True)
+    try:
+        first = watcher.store
+        for i in range(3):
+            _write(docs / f"b{i}.md", f"Cookies {i}.")
+        deadline = time.time() + 10
+        while len(_sources(watcher)) < 4 and time.time() < deadline:
+            time.sleep(0.1)
+        assert watcher.store is not first
+        assert len(_sources(watcher)) == 4
+    finally:
+        watcher.stop()
+
+
+def test_shared_storage_keeps_other_workers_collections(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    _write(docs / "a.md", "Formation macarons.")
+    storage = str(tmp_path / "storage")
+    embedding = CountingEmbeddings(size=8)
+    worker = CorpusWatcher(str(docs), storage, embedding=embedding).start(watch=False)
+    _write(docs / "b.md", "Formation fraisier.")
+    worker.sync()
+    retired = worker._retired
+
+    # Collection laissée par un worker terminé sur le même hôte
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    orphan = worker._open_collection("corpus_orphan", {"owner_host": socket.gethostname(), "owner_pid": dead.pid})
+    orphan.add_texts(["Orpheline."])
+
+    # Un second worker démarre puis réindexe sur le même stockage
+    other = CorpusWatcher(str(docs), storage, embedding=embedding).start(watch=False)
+    _write(docs / "c.md", "Formation entremet.")
+    other.sync()
+
+    names = {c if isinstance(c, str) else c.name for c in worker.store._client.list_collections()}
+    assert "corpus_orphan" not in names
+    assert retired._collection.name in names
+    assert len(_sources(worker)) == 2 and len(_sources(other)) == 3
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Tests de embedding_compression.py : troncature, int8 et re-classement exact
+"""
+
+import numpy as np
+from langchain_core.embeddings import FakeEmbeddings
+
+from embedding_compression import CompressedVectorIndex, matches_filter, quantize_int8, truncate
+
+
+def _corpus(count=500, dims=64, seed=0):
+    rng = np.random.default_rng(seed)
+    # Variance décroissante : les premières dimensions portent l'essentiel (comme Matryoshka)
+    vectors = rng.normal(size=(count, dims)) * np.linspace(2.0, 0.2, dims)
+    metadatas = [{"formation_id": "macarons" if i % 2 else "fraisier"} for i in range(count)]
+    return vectors.astype(np.float32), [str(i) for i in range(count)], [f"extrait {i}" for i in range(count)], metadatas
+
+
+def test_quantize_int8_round_trip():
+    vectors = truncate(np.random.default_rng(1).normal(size=(10, 32)), None)
+    codes, scales = quantize_int8(vectors)
+    assert codes.dtype == np.int8
+    assert np.abs(codes * scales[:, None] - vectors).max() < 0.01
+
+
+def test_rescoring_recovers_exact_neighbours():
+    vectors, ids, texts, metadatas = _corpus()
+    exact = CompressedVectorIndex(vectors, ids, texts, metadatas)
+    compressed = CompressedVectorIndex(vectors, ids, texts, metadatas, dims=16, quantize=True, rescore_factor=8)
+    assert compressed.memory_bytes < exact.memory_bytes / 10
+
+    query = vectors[42] + 0.1
+    expected = [row for row, _ in exact.search_vector(query, k=5)]
+    found = compressed.search_vector(query, k=5)
+    assert [row for row, _ in found] == expected
+    assert abs(found[0][1] - exact.search_vector(query, k=1)[0][1]) < 1e-5
+
+
+def test_filter_and_retriever():
+    vectors, ids, texts, metadatas = _corpus(dims=16)
+    index = CompressedVectorIndex(vectors, ids, texts, metadatas, embedding=FakeEmbeddings(size=16), dims=8, quantize=True)
+    docs = index.as_retriever(search_kwargs={"k": 6, "filter": {"formation_id": "fraisier"}}).invoke("fraisier")
+    assert len(docs) == 6 and {doc.metadata["formation_id"] for doc in docs} == {"fraisier"}
+    assert matches_filter({"formation_id": "general"}, {"formation_id": {"$in": ["fraisier", "general"]}})
+    assert index.similarity_search("x", k=3, filter={"formation_id": "cookies"}) == []
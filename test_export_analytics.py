@@ -0,0 +1,46 @@
+"""
+Tests de l'export analytics (export_analytics.py) : remplacement ou reprise des fichiers
+"""
+
+import csv
+import gzip
+from datetime import datetime
+
+from export_analytics import export_table, load_state
+
+COLUMNS = ["id", "event_type", "timestamp"]
+ROWS = [(1, "question_asked", datetime(2025, 1, 1, 9)), (2, "lead", datetime(2025, 1, 2, 10)),
+        (3, "question_asked", datetime(2025, 1, 3, 11))]
+
+
+class FakeDatabase:
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def stream_table_rows(self, table, after_id=0, since=None, chunk_size=5000, partition=None):
+        rows = [row for row in self.rows if row[0] > after_id and (not since or row[2].isoformat(sep=" ") >= since)]
+        for start in range(0, len(rows), chunk_size):
+            yield COLUMNS, rows[start:start + chunk_size]
+
+
+def read_csv(path):
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_new_export_replaces_file_and_resume_appends(tmp_path):
+    output_dir, db = str(tmp_path), FakeDatabase(ROWS)
+    path = tmp_path / "analytics_events.csv.gz"
+
+    for _ in range(2):
+        state = {}
+        assert export_table(db, "analytics_events", output_dir, "csv", 0, None, 2, state) == 3
+        assert [row[0] for row in read_csv(path)] == ["id", "1", "2", "3"]
+    assert load_state(output_dir)["analytics_events"]["last_timestamp"] == "2025-01-03 11:00:00"
+
+    db.rows.append((4, "lead", datetime(2025, 1, 4, 12)))
+    state = load_state(output_dir)
+    assert export_table(db, "analytics_events", output_dir, "csv", state["analytics_events"]["last_id"],
+                        None, 2, state, append=True) == 1
+    assert [row[0] for row in read_csv(path)] == ["id", "1", "2", "3", "4"]
+    assert state["analytics_events"]["last_id"] == 4
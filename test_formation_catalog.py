@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests de la résolution des noms de formation par le catalogue en mémoire
+"""
+
+from datetime import datetime
+
+from formation_catalog import FormationCatalog
+
+FORMATIONS = [
+    {"id": 1, "nom": "Pâtisserie Française", "places_max": 15, "places_reservees": 5},
+    {"id": 2, "nom": "Macarons", "places_max": 8, "places_reservees": 2},
+    {"id": 3, "nom": "Chocolat", "places_max": 10, "places_reservees": 3},
+    {"id": 4, "nom": "Entremets", "places_max": 12, "places_reservees": 7},
+    {"id": 5, "nom": "CAP Pâtissier", "places_max": 20, "places_reservees": 15},
+]
+SESSIONS = [
+    {"id": 11, "formation_id": 2, "start_datetime": datetime(2025, 3, 10, 9), "end_datetime": datetime(2025, 3, 10, 13)},
+    {"id": 10, "formation_id": 2, "start_datetime": datetime(2025, 3, 3, 9), "end_datetime": datetime(2025, 3, 3, 13)},
+]
+
+
+class FakeDatabase:
+    """Connexion minimale comptant les chargements du catalogue"""
+
+    def __init__(self):
+        self.loads = 0
+
+    def load_formation_catalog(self):
+        self.loads += 1
+        return FORMATIONS, SESSIONS
+
+
+def make_catalog(ttl_seconds=60):
+    db = FakeDatabase()
+    catalog = FormationCatalog(ttl_seconds=ttl_seconds)
+    catalog.load(db)
+    return catalog, db
+
+
+def test_resolve_ignores_case_and_accents():
+    catalog, db = make_catalog()
+    assert catalog.resolve("patisserie francaise", db) == 1
+    assert catalog.resolve("  CAP PÂTISSIER ! ", db) == 5
+
+
+def test_resolve_partial_and_plural():
+    catalog, db = make_catalog()
+    assert catalog.resolve("Macaron", db) == 2
+    assert catalog.resolve("Entremet", db) == 4
+    assert catalog.resolve("je veux faire la formation chocolat", db) == 3
+
+
+def test_resolve_typos():
+    catalog, db = make_catalog()
+    assert catalog.resolve("patiserie française", db) == 1
+    assert catalog.resolve("macarrons", db) == 2
+    assert catalog.resolve("chocolats noirs", db) == 3
+
+
+def test_resolve_unknown():
+    catalog, db = make_catalog()
+    assert catalog.resolve("Autre", db) is None
+    assert catalog.resolve("", db) is None
+
+
+def test_sessions_sorted_without_formation_id():
+    catalog, db = make_catalog()
+    sessions = catalog.get_sessions(2, db)
+    assert [s["id"] for s in sessions] == [10, 11]
+    assert "formation_id" not in sessions[0]
+    assert catalog.get_sessions(3, db) == []
+
+
+def test_reload_after_invalidate_or_ttl():
+    catalog, db = make_catalog()
+    catalog.resolve("Macarons", db)
+    assert db.loads == 1
+    catalog.invalidate()
+    catalog.resolve("Macarons", db)
+    assert db.loads == 2
+
+    expired, expired_db = make_catalog(ttl_seconds=0)
+    expired.resolve("Macarons", expired_db)
+    assert expired_db.loads == 2
+
+
+class FailingDatabase(FakeDatabase):
+    def load_formation_catalog(self):
+        self.loads += 1
+        return None
+
+
+def test_failed_reload_keeps_catalog_and_backs_off():
+    catalog, _ = make_catalog(ttl_seconds=60)
+    catalog.invalidate()
+    failing = FailingDatabase()
+    assert catalog.resolve("macarons", failing) == 2
+    assert catalog.resolve("chocolat", failing) == 3
+    assert failing.loads == 1  # pas de nouvelle tentative avant un TTL
@@ -0,0 +1,24 @@
+"""
+Tests de l'environnement simulé (local_stubs.py) : rien ne subsiste après sa fermeture
+"""
+
+import os
+
+import email_config
+import gemini_config
+from local_stubs import StubEnvironment
+
+
+def test_stub_environment_restores_environment_and_configs(monkeypatch):
+    monkeypatch.setenv("SMTP_PORT", "587")
+    monkeypatch.delenv("GEMINI_TRANSPORT", raising=False)
+    email_before, gemini_before = dict(email_config.EMAIL_CONFIG), dict(gemini_config.GEMINI_CONFIG)
+
+    with StubEnvironment() as env:
+        assert os.environ["SMTP_PORT"] == str(env.smtp.port)
+        assert gemini_config.GEMINI_CONFIG["api_endpoint"] == env.gemini.url
+
+    assert os.environ["SMTP_PORT"] == "587"
+    assert "GEMINI_TRANSPORT" not in os.environ
+    assert email_config.EMAIL_CONFIG == email_before
+    assert gemini_config.GEMINI_CONFIG == gemini_before
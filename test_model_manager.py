@@ -0,0 +1,43 @@
+"""
+Tests du gestionnaire de modèles (model_manager.py) : modèles requis puis optionnels
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import model_manager
+from model_manager import ModelManager
+
+
+def test_optional_model_is_never_pulled_and_does_not_delay_readiness(monkeypatch):
+    verified, release = [], threading.Event()
+
+    def check_if_model_is_available(name):
+        verified.append(name)
+
+    def generate(model, **kwargs):
+        if model == "gemma3:1b":
+            release.wait(5)  # préchauffage lent du petit modèle
+
+    fake_ollama = SimpleNamespace(list=lambda: {"models": [{"model": "gemma3:4b"}, {"model": "gemma3:1b"}]},
+                                  generate=generate, embed=lambda **kwargs: None)
+    monkeypatch.setattr(model_manager, "check_if_model_is_available", check_if_model_is_available)
+    monkeypatch.setattr(model_manager, "ollama", fake_ollama)
+
+    manager = ModelManager(chat_models=["gemma3:4b", "gemma3:1b", "phi3:mini"], embedding_models=["nomic-embed-text"],
+                           optional_models=["gemma3:1b", "phi3:mini"])
+    manager.config = dict(manager.config, warmup_on_start=True)
+    try:
+        assert manager.start(wait=True, timeout=5)
+        assert not manager.status()["gemma3:1b"]["warm"]
+        release.set()
+        deadline = time.time() + 5
+        while not manager.status()["gemma3:1b"]["warm"] and time.time() < deadline:
+            time.sleep(0.01)
+        status = manager.status()
+        assert status["gemma3:1b"]["warm"]
+        assert not status["phi3:mini"]["available"] and "ollama pull" in status["phi3:mini"]["error"]
+        assert verified == ["gemma3:4b", "nomic-embed-text"]
+    finally:
+        manager.stop()
@@ -0,0 +1,36 @@
+"""
+Tests du routage entre petit modèle et modèle principal
+"""
+
+from model_router import LARGE, SMALL, ModelRouter, as_router, classify_question
+from routing_config import get_routing_config
+
+
+def test_factual_questions_go_to_small_model():
+    assert classify_question("Quel est le prix de la formation macarons ?") == (SMALL, "factual")
+    assert classify_question("Combien d'élèves par session ?") == (SMALL, "factual")
+
+
+def test_escalation_rules():
+    assert classify_question("Quelle formation me recommandez-vous ?") == (LARGE, "keyword")
+    assert classify_question("Quel est le prix et combien de jours dure le stage ?") == (LARGE, "multi_part")
+    assert classify_question("Le tarif ? Et la durée ?") == (LARGE, "multi_part")
+    long_question = "Bonjour, j'aimerais connaître le tarif de la session de macarons du mois prochain à Paris pour moi et ma sœur"
+    assert classify_question(long_question) == (LARGE, "length")
+
+
+def test_router_tiers():
+    router = ModelRouter("large", "small", dict(get_routing_config(), enabled=True, condense_tier="small"))
+    assert router.for_condense() == (SMALL, "small")
+    assert router.for_answer("Quel est le prix des macarons ?") == (SMALL, "small")
+    assert router.for_answer("Laquelle de vos formations choisir ?") == (LARGE, "large")
+
+
+def test_without_small_model_everything_goes_to_large():
+    router = as_router("large")
+    assert as_router(router) is router
+    assert router.for_condense() == (LARGE, "large")
+    assert router.for_answer("Quel est le prix des macarons ?") == (LARGE, "large")
+
+    disabled = ModelRouter("large", "small", dict(get_routing_config(), enabled=False))
+    assert disabled.for_answer("Quel est le prix des macarons ?") == (LARGE, "large")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests de nlu.py : mêmes résultats que l'ancienne détection, sans sensibilité aux accents
+"""
+
+from benchmark_nlu import legacy_detect_inscription_intent, legacy_detect_formation_interest
+from nlu import detect_inscription_intent, detect_formation_interest
+
+MESSAGES = [
+    "Je veux m'inscrire à une formation",
+    "Comment puis-je participer à une formation ?",
+    "Je suis intéressé par une formation",
+    "Quels sont vos tarifs ?",
+    "Quelle est votre adresse ?",
+    "Je souhaite suivre une formation de pâtisserie",
+    "Comment s'inscrire ?",
+    "Bonjour, je voudrais une formation",
+    "Quelles sont les étapes pour l'inscription ?",
+    "Une formation pour moi ?",
+    "J'adore le chocolat et les macarons",
+    "La pâtisserie française me passionne",
+    "Le cap pâtissier et le fraisier",
+    "Un trompe l'oeil en tartelette",
+    "Mon copain veut apprendre",
+    "Rien de particulier",
+]
+
+
+def test_intent_matches_legacy():
+    for message in MESSAGES:
+        assert detect_inscription_intent(message) == legacy_detect_inscription_intent(message), message
+
+
+def test_formation_matches_legacy_priority():
+    for message in MESSAGES:
+        assert detect_formation_interest(message) == legacy_detect_formation_interest(message), message
+    # La priorité de la liste l'emporte sur la position dans le texte
+    assert detect_formation_interest("du chocolat puis des macarons") == "Macarons"
+
+
+def test_formation_from_history():
+    history = [
+        {"role": "user", "content": "Bonjour"},
+        {"role": "assistant", "content": "Nos macarons sont réputés"},
+        {"role": "user", "content": "Je cherche une formation entremet"},
+        {"role": "user", "content": "Et le chocolat ?"},
+    ]
+    assert detect_formation_interest("Quel est le prix ?", history) == legacy_detect_formation_interest("Quel est le prix ?", history)
+    assert detect_formation_interest("Quel est le prix ?", history) == "Entremet"
+    assert detect_formation_interest("Quel est le prix ?", []) == "Non spécifiée"
+
+
+def test_accent_and_case_insensitive():
+    assert detect_inscription_intent("je suis interesse par la FORMATION")
+    assert detect_inscription_intent("Quelles MODALITES d'INSCRIPTION ?")
+    assert detect_formation_interest("PATISSERIE FRANCAISE") == "Pâtisserie Française"
+    assert detect_formation_interest("un trompe l'œil") == "Trompe L'Oeil"
+
+
+def test_formation_id_from_source():
+    from nlu import formation_id_from_source, detect_formation_id, GENERAL_FORMATION_ID
+    assert formation_id_from_source("Research/brochure_fraisier_framboisier.pdf") == "fraisier"
+    assert formation_id_from_source("brochure_trompe_l_oeil.pdf") == "trompe_l_oeil"
+    assert formation_id_from_source("brochure_plateau_de_mignarrdises.pdf") == "mignardise"
+    assert formation_id_from_source("dream_pastry.pdf") == GENERAL_FORMATION_ID
+    assert detect_formation_id("Combien coûte le stage fraisier ?") == formation_id_from_source("brochure_fraisier_framboisier.pdf")
+    assert detect_formation_id("Quels sont vos horaires ?") is None
@@ -0,0 +1,35 @@
+"""
+Tests de la disposition des prompts pour le cache de préfixe d'Ollama
+"""
+
+from llm import ANSWER_PROMPT, CONDENSE_QUESTION_PROMPT, history_messages
+
+
+def _contents(prompt, **inputs):
+    return [message.content for message in prompt.format_messages(**inputs)]
+
+
+def test_answer_prompt_starts_with_static_system_message():
+    first = _contents(ANSWER_PROMPT, context="Extrait A", question="Prix des macarons ?")
+    second = _contents(ANSWER_PROMPT, context="Extrait B", question="Durée de l'entremet ?")
+    assert first[0] == second[0]
+    assert "Extrait A" not in first[0] and "Prix des macarons ?" in first[-1]
+
+
+def test_condense_prompt_extends_previous_turn():
+    memory = [{"role": "assistant", "content": "Bonjour !"}, {"role": "user", "content": "Prix des macarons ?"}]
+    previous = _contents(CONDENSE_QUESTION_PROMPT, question="Prix des macarons ?",
+                         chat_history=history_messages(memory, "Prix des macarons ?"))
+
+    memory += [{"role": "assistant", "content": "450 euros."}, {"role": "user", "content": "Et la durée ?"}]
+    current = _contents(CONDENSE_QUESTION_PROMPT, question="Et la durée ?",
+                        chat_history=history_messages(memory, "Et la durée ?"))
+
+    assert current[:len(previous)] == previous
+    assert current[len(previous):] == ["450 euros.", "Et la durée ?"]
+
+
+def test_history_messages_drops_pending_question_only():
+    memory = [{"role": "user", "content": "Bonjour"}, {"role": "assistant", "content": "Bonjour !"}]
+    assert history_messages(memory, "Prix ?") == [("user", "Bonjour"), ("assistant", "Bonjour !")]
+    assert history_messages(memory + [{"role": "user", "content": "Prix ?"}], "Prix ?") == history_messages(memory)
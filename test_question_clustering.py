@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests du regroupement vectoriel des questions non répondues
+"""
+
+import numpy as np
+
+from question_clustering import (assign_to_centroids, leader_clustering, normalize_rows,
+                                 refine_clusters, representatives, to_blob, from_blob)
+
+
+def make_vectors():
+    """Deux groupes de variantes autour de deux directions orthogonales"""
+    rng = np.random.default_rng(0)
+    base = np.eye(16)[:2]
+    vectors = np.vstack([base[0] + rng.normal(0, 0.05, 16) for _ in range(5)] +
+                        [base[1] + rng.normal(0, 0.05, 16) for _ in range(3)])
+    return normalize_rows(vectors)
+
+
+def test_leader_clustering_groups_variants():
+    """Les variantes proches forment un seul regroupement"""
+    vectors = make_vectors()
+    labels, centroids, weights = leader_clustering(vectors, np.ones(len(vectors)), threshold=0.8)
+    assert len(centroids) == 2
+    assert len(set(labels[:5])) == 1 and len(set(labels[5:])) == 1
+    assert list(weights) == [5.0, 3.0]
+
+
+def test_incremental_assignment_reuses_existing_centroids():
+    """Les nouvelles questions rejoignent les regroupements existants"""
+    vectors = make_vectors()
+    _, centroids, weights = leader_clustering(vectors[:6], np.ones(6), threshold=0.8)
+    labels, new_centroids, new_weights = leader_clustering(vectors[6:], np.ones(2), 0.8, centroids, weights)
+    assert list(labels) == [1, 1]
+    assert len(new_centroids) == 2
+    assert new_weights[1] == 3.0
+
+    assigned, _ = assign_to_centroids(vectors, new_centroids, threshold=0.99)
+    assert (assigned == -1).any()
+
+
+def test_refine_and_representatives():
+    """Le k-means sphérique conserve les groupes et choisit un représentant par groupe"""
+    vectors = make_vectors()
+    labels, _, _ = leader_clustering(vectors, np.ones(len(vectors)), threshold=0.8)
+    labels, centroids, totals = refine_clusters(vectors, np.ones(len(vectors)), labels)
+    reps = representatives(vectors, labels, centroids)
+    assert sorted(totals) == [3.0, 5.0]
+    assert {labels[index] for index in reps.values()} == {0, 1}
+
+
+def test_blob_roundtrip():
+    vector = np.arange(8, dtype=np.float64)
+    assert np.allclose(from_blob(to_blob(vector)), vector)
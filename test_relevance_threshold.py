@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests du seuil de pertinence : calibration et court-circuit de la recherche
+"""
+
+import json
+
+import pytest
+
+from langchain_core.documents import Document
+
+import retrieval
+from calibrate_threshold import pick_threshold
+
+
+class ScoredStore:
+    """Store factice : retourne des extraits avec les scores donnés"""
+
+    def __init__(self, scores):
+        self.scores = scores
+
+    def similarity_search_with_relevance_scores(self, query, k=4, filter=None):
+        return [(Document(page_content=f"extrait {i}"), score) for i, score in enumerate(self.scores[:k])]
+
+
+def test_pick_threshold_respects_false_refusal_budget():
+    samples = [(0.9, True), (0.8, True), (0.7, True), (0.45, True),
+               (0.5, False), (0.3, False), (0.2, False), (0.6, False)]
+    strict = pick_threshold(samples, max_false_refusal=0.0)
+    assert strict["threshold"] == 0.375 and strict["refusal_recall"] == 0.5
+    relaxed = pick_threshold(samples, max_false_refusal=0.25)
+    assert relaxed["threshold"] == 0.65
+    assert relaxed["refusal_recall"] == 1.0 and relaxed["false_refusal_rate"] == 0.25
+
+
+def test_pick_threshold_with_negative_scores():
+    result = pick_threshold([(-0.1, True), (-0.3, True), (-0.5, False), (-0.9, False)], max_false_refusal=0.0)
+    assert result["threshold"] == -0.4 and result["refusal_recall"] == 1.0
+    mixed = pick_threshold([(0.4, True), (-0.2, True), (-1.2, False), (0.1, False)], max_false_refusal=0.0)
+    assert mixed["threshold"] == -0.7 and mixed["refusal_recall"] == 0.5
+    with pytest.raises(ValueError):
+        pick_threshold([(0.4, True), (-0.2, False)], max_false_refusal=-1)
+
+
+def test_retrieve_returns_nothing_below_threshold(tmp_path, monkeypatch):
+    config = dict(retrieval.get_retrieval_config(), relevance_threshold=None,
+                  relevance_calibration_file=str(tmp_path / "calibration.json"), rerank_mode="off")
+    monkeypatch.setattr(retrieval, "get_retrieval_config", lambda: config)
+    monkeypatch.setattr(retrieval, "get_reranker", lambda: None)
+
+    assert len(retrieval.retrieve(ScoredStore([0.3, 0.2]), "question")) == 2
+    (tmp_path / "calibration.json").write_text(json.dumps({"threshold": 0.4}))
+    assert retrieval.retrieve(ScoredStore([0.3, 0.2]), "question") == []
+    docs = retrieval.retrieve(ScoredStore([0.5, 0.2]), "question")
+    assert [doc.metadata["relevance_score"] for doc in docs] == [0.5, 0.2]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests de reranker.py : re-classement par lots et budget de latence
+"""
+
+import time
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import FakeEmbeddings
+
+from reranker import EmbeddingReranker, Reranker
+from tracing import correlation, get_tracer
+
+
+class KeywordReranker(Reranker):
+    """Note = nombre d'occurrences des mots de la question (avec délai simulé par lot)"""
+    name = "keyword"
+
+    def __init__(self, delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.batches = 0
+
+    def score(self, query, texts):
+        self.batches += 1
+        time.sleep(self.delay)
+        return [sum(text.count(word) for word in query.split()) for text in texts]
+
+
+DOCS = [Document(page_content=text) for text in [
+    "horaires d'ouverture", "tarif macarons", "fraisier fraisier", "parking", "fraisier",
+    "macarons", "cookies", "pain", "fraisier et macarons", "chocolat",
+]]
+
+
+def test_rerank_keeps_best_in_batches():
+    reranker = KeywordReranker(top_n=3, batch_size=4)
+    ranked = reranker.rerank("fraisier", DOCS)
+    assert [doc.page_content for doc in ranked] == ["fraisier fraisier", "fraisier", "fraisier et macarons"]
+    assert reranker.batches == 3
+    assert reranker.rerank("fraisier", DOCS[:2]) == DOCS[:2]
+
+
+def test_budget_exceeded_falls_back_to_vector_order():
+    reranker = KeywordReranker(delay=0.05, top_n=3, batch_size=2, budget_ms=60, fallback_k=5)
+    with correlation() as correlation_id:
+        assert reranker.rerank("fraisier", DOCS) == DOCS[:5]
+        assert reranker.batches == 2
+        # La mesure précédente suffit ensuite à renoncer sans rien noter
+        assert reranker.rerank("fraisier", DOCS) == DOCS[:5]
+        assert reranker.batches == 2
+    outcomes = [entry["labels"]["outcome"] for entry in get_tracer().get_request_spans(correlation_id)]
+    assert outcomes == ["budget_exceeded", "skipped"]
+
+
+def test_embedding_reranker_scores_every_document():
+    reranker = EmbeddingReranker(embedding=FakeEmbeddings(size=16), top_n=3)
+    ranked = reranker.rerank("fraisier", DOCS)
+    assert len(ranked) == 3 and all(doc in DOCS for doc in ranked)
+
+
+class FailingReranker(KeywordReranker):
+    def score(self, query, texts):
+        raise ConnectionError("Ollama injoignable")
+
+
+def test_scoring_error_falls_back_to_vector_order():
+    reranker = FailingReranker(top_n=3, fallback_k=5)
+    with correlation() as correlation_id:
+        assert reranker.rerank("fraisier", DOCS) == DOCS[:5]
+    spans = get_tracer().get_request_spans(correlation_id)
+    assert [(entry["labels"]["outcome"], entry["error"]) for entry in spans] == [("error", True)]
+
+
+def test_budget_is_checked_within_a_single_configured_batch():
+    reranker = KeywordReranker(delay=0.1, top_n=3, batch_size=16, budget_ms=50, fallback_k=5)
+    assert reranker.rerank("fraisier", DOCS) == DOCS[:5]
+    assert reranker.batches == 1
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test de charge des réservations : de nombreux prospects réservent en même temps
+la même formation et le même créneau ; aucune place ne doit être surréservée.
+
+Nécessite un serveur MySQL (variables MYSQL_*) ; le test est ignoré sinon.
+Exemple: RESERVATION_STRESS_THREADS=200 python -m pytest -q test_reservation_concurrency.py
+"""
+
+import os
+import threading
+import uuid
+
+import pytest
+
+from database_service import DatabaseService
+
+THREADS = int(os.getenv("RESERVATION_STRESS_THREADS", "64"))
+FORMATION_PLACES = 12
+SLOT_CAPACITY = 8
+
+
+def connected_service() -> DatabaseService:
+    db = DatabaseService()
+    if not db.connect():
+        pytest.skip("Serveur MySQL indisponible")
+    return db
+
+
+@pytest.fixture
+def stress_formation():
+    """Crée une formation et un créneau dédiés au test, supprimés à la fin"""
+    db = connected_service()
+    assert db.create_tables()
+    cursor = db.connection.cursor()
+    name = f"Test concurrence {uuid.uuid4().hex[:8]}"
+    cursor.execute("""
+        INSERT INTO formations (nom, description, places_max, places_reservees, prix, duree_jours)
+        VALUES (%s, 'Formation de test', %s, 0, 100.00, 1)
+    """, (name, FORMATION_PLACES))
+    formation_id = cursor.lastrowid
+    cursor.execute("""
+        INSERT INTO formation_sessions (formation_id, start_datetime, end_datetime, capacity)
+        VALUES (%s, NOW() + INTERVAL 7 DAY, NOW() + INTERVAL 7 DAY + INTERVAL 4 HOUR, %s)
+    """, (formation_id, SLOT_CAPACITY))
+    slot_id = cursor.lastrowid
+    db.connection.commit()
+
+    yield db, formation_id, slot_id
+
+    cursor.execute("DELETE FROM inscriptions WHERE formation_id = %s", (formation_id,))
+    cursor.execute("DELETE FROM formations WHERE id = %s", (formation_id,))
+    db.connection.commit()
+    cursor.close()
+    db.disconnect()
+
+
+def reserve_concurrently(formation_id: int, creneau_id, threads: int):
+    """Lance les réservations simultanées (une connexion par prospect) et retourne les résultats"""
+    results = []
+    results_lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def prospect(index: int):
+        db = DatabaseService()
+        if not db.connect():
+            with results_lock:
+                results.append(None)
+            return
+        try:
+            client_info = {"nom": f"Prospect{index}", "prenom": "Test", "email": f"p{index}@example.com"}
+            barrier.wait()
+            success = db.reserve_place(formation_id, client_info, "QUALIFIÉ", 80, creneau_id=creneau_id)
+            with results_lock:
+                results.append(success)
+        finally:
+            db.disconnect()
+
+    workers = [threading.Thread(target=prospect, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+def counters(db: DatabaseService, formation_id: int, slot_id: int):
+    cursor = db.connection.cursor()
+    db.connection.commit()  # nouvel instantané de lecture
+    cursor.execute("SELECT places_reservees FROM formations WHERE id = %s", (formation_id,))
+    formation_reserved = cursor.fetchone()[0]
+    cursor.execute("SELECT places_reservees, statut FROM formation_sessions WHERE id = %s", (slot_id,))
+    slot_reserved, slot_status = cursor.fetchone()
+    cursor.execute("SELECT COUNT(*), SUM(creneau_id IS NOT NULL) FROM inscriptions WHERE formation_id = %s", (formation_id,))
+    inscriptions, with_slot = cursor.fetchone()
+    cursor.close()
+    return formation_reserved, slot_reserved, slot_status, inscriptions, int(with_slot or 0)
+
+
+def test_slot_capacity_is_never_exceeded(stress_formation):
+    db, formation_id, slot_id = stress_formation
+    results = reserve_concurrently(formation_id, slot_id, THREADS)
+
+    assert None not in results, "connexion MySQL refusée pendant le test"
+    assert results.count(True) == SLOT_CAPACITY
+    formation_reserved, slot_reserved, slot_status, inscriptions, with_slot = counters(db, formation_id, slot_id)
+    assert slot_reserved == SLOT_CAPACITY
+    assert slot_status == "complet"
+    assert formation_reserved == SLOT_CAPACITY
+    assert inscriptions == with_slot == SLOT_CAPACITY
+
+
+def test_formation_capacity_is_never_exceeded(stress_formation):
+    db, formation_id, slot_id = stress_formation
+    reserve_concurrently(formation_id, slot_id, THREADS)
+    results = reserve_concurrently(formation_id, None, THREADS)
+
+    assert results.count(True) == FORMATION_PLACES - SLOT_CAPACITY
+    formation_reserved, slot_reserved, _, inscriptions, _ = counters(db, formation_id, slot_id)
+    assert formation_reserved == FORMATION_PLACES
+    assert slot_reserved == SLOT_CAPACITY
+    assert inscriptions == FORMATION_PLACES
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests de la recherche anticipée pendant la reformulation de la question
+"""
+
+import time
+
+from langchain_core.documents import Document
+
+import retrieval
+from tracing import correlation, get_tracer
+
+
+class SlowStore:
+    """Store factice : 0.1 s par recherche, un extrait propre à chaque requête"""
+
+    def __init__(self):
+        self.queries = []
+
+    def similarity_search_with_relevance_scores(self, query, k=4, filter=None):
+        time.sleep(0.1)
+        self.queries.append(query)
+        return [(Document(page_content=f"{query} / {i}"), 0.9 - i / 10) for i in range(2)]
+
+
+def _slow_condense(result):
+    def condense():
+        time.sleep(0.1)
+        return result
+    return condense
+
+
+def test_close_rewrite_reuses_speculative_results(monkeypatch):
+    monkeypatch.setattr(retrieval, "get_reranker", lambda: None)
+    store = SlowStore()
+    with correlation() as correlation_id:
+        standalone, docs = retrieval.speculative_retrieve(
+            store, "prix formation macarons", None, _slow_condense("Quel est le prix de la formation macarons ?"))
+    assert standalone == "Quel est le prix de la formation macarons ?"
+    assert store.queries == ["prix formation macarons"]
+    saved = [s for s in get_tracer().get_request_spans(correlation_id) if s["name"] == "chat.speculative_saved"]
+    assert saved[0]["labels"] == {"outcome": "reused"} and saved[0]["duration_ms"] > 50
+
+
+def test_distant_rewrite_merges_both_searches(monkeypatch):
+    monkeypatch.setattr(retrieval, "get_reranker", lambda: None)
+    store = SlowStore()
+    _, docs = retrieval.speculative_retrieve(store, "et pour lui ?", None, _slow_condense("Formation fraisier pour un enfant"))
+    assert store.queries == ["et pour lui ?", "Formation fraisier pour un enfant"]
+    assert [doc.page_content for doc in docs] == ["Formation fraisier pour un enfant / 0", "Formation fraisier pour un enfant / 1"]
+
+
+class ScoredStore(SlowStore):
+    """Store factice : score 0.9 pour la question brute, 0.2 pour toute autre requête"""
+
+    def __init__(self, raw_question):
+        super().__init__()
+        self.raw_question = raw_question
+
+    def similarity_search_with_relevance_scores(self, query, k=4, filter=None):
+        self.queries.append(query)
+        score = 0.9 if query == self.raw_question else 0.2
+        return [(Document(page_content=f"{query} / {i}"), score) for i in range(2)]
+
+
+def test_threshold_applies_to_standalone_question_after_merge(monkeypatch):
+    monkeypatch.setattr(retrieval, "get_reranker", lambda: None)
+    monkeypatch.setattr(retrieval, "relevance_threshold", lambda: 0.5)
+    store = ScoredStore("et pour lui ?")
+    _, docs = retrieval.speculative_retrieve(store, "et pour lui ?", None, _slow_condense("Horaires de la piscine municipale"))
+    assert store.queries == ["et pour lui ?", "Horaires de la piscine municipale"]
+    assert docs == []
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests de la normalisation des questions et de leur agrégation en mémoire
+"""
+
+from text_normalization import normalize_text, question_hash
+from unanswered_aggregator import UnansweredQuestionAggregator
+
+
+class FakeDatabase:
+    """Base minimale enregistrant les écritures groupées"""
+
+    def __init__(self, fail: bool = False, error: Exception = None):
+        self.fail = fail
+        self.error = error
+        self.batches = []
+        self.disconnected = 0
+
+    def connect(self):
+        return not self.fail
+
+    def disconnect(self):
+        self.disconnected += 1
+
+    def upsert_unanswered_questions(self, rows):
+        if self.error:
+            raise self.error
+        self.batches.append(sorted(rows))
+        return True
+
+
+def test_normalize_text():
+    """Casse, accents, ponctuation et espaces sont ignorés"""
+    assert normalize_text("Quels sont vos TARIFS ?!") == "quels sont vos tarifs"
+    assert normalize_text("  Où   êtes-vous situés ? ") == "ou etes vous situes"
+    assert normalize_text("Crème brûlée, œufs") == "creme brulee oeufs"
+    assert normalize_text("") == ""
+
+
+def test_question_hash_groups_variants():
+    """Les variantes d'une même question ont la même clé"""
+    assert question_hash("Où êtes-vous ?") == question_hash("ou etes vous")
+    assert question_hash("Où êtes-vous ?") != question_hash("Quels horaires ?")
+    assert len(question_hash("test")) == 40
+
+
+def test_aggregator_batches_counts():
+    """Les occurrences sont comptées en mémoire et écrites en un seul lot"""
+    db = FakeDatabase()
+    aggregator = UnansweredQuestionAggregator(flush_interval=3600, max_pending=100, db_factory=lambda: db)
+    for question in ["Avez-vous un parking ?", "avez vous un parking", "Quels horaires ?"]:
+        aggregator.record(question)
+
+    assert aggregator.flush() == 2
+    assert len(db.batches) == 1
+    counts = {text: count for _, text, count in db.batches[0]}
+    assert counts == {"Avez-vous un parking ?": 2, "Quels horaires ?": 1}
+    assert aggregator.pending() == {}
+    assert aggregator.flush() == 0
+
+
+def test_aggregator_keeps_counts_on_failure():
+    """Un échec d'écriture conserve les compteurs pour le prochain vidage"""
+    failing = FakeDatabase(fail=True)
+    aggregator = UnansweredQuestionAggregator(flush_interval=3600, db_factory=lambda: failing)
+    aggregator.record("Quels horaires ?")
+    assert aggregator.flush() == 0
+    aggregator.record("quels horaires")
+    assert list(aggregator.pending().values()) == [("Quels horaires ?", 2)]
+
+
+def test_aggregator_keeps_counts_on_exception():
+    """Une exception pendant l'écriture conserve les compteurs et ferme la connexion"""
+    failing = FakeDatabase(error=RuntimeError("connexion perdue"))
+    aggregator = UnansweredQuestionAggregator(flush_interval=3600, db_factory=lambda: failing)
+    aggregator.record("Quels horaires ?")
+    assert aggregator.flush() == 0
+    assert failing.disconnected == 1
+    assert list(aggregator.pending().values()) == [("Quels horaires ?", 1)]
+
+    def no_database():
+        raise RuntimeError("pool épuisé")
+    aggregator._db_factory = no_database
+    assert aggregator.flush() == 0
+    assert list(aggregator.pending().values()) == [("Quels horaires ?", 1)]
@@ -0,0 +1,27 @@
+import hashlib
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def strip_accents(text: str) -> str:
+    """Supprime les accents (é -> e, ç -> c)"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalise un texte pour le comparer : minuscules, sans accents ni ponctuation,
+    espaces regroupés
+
+    Exemple: "Quels sont vos TARIFS ?!" -> "quels sont vos tarifs"
+    """
+    text = strip_accents((text or "").lower()).replace("œ", "oe").replace("æ", "ae")
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def question_hash(text: str) -> str:
+    """Clé SHA-1 (40 caractères hexadécimaux) du texte normalisé"""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
@@ -0,0 +1,248 @@
+"""
+Tracing léger des étapes du chat et de la qualification.
+
+Chaque étape est mesurée dans un span nommé (ex: "chat.retrieval", "db.reserve_place"),
+rattaché à l'identifiant de corrélation de la requête en cours. Les durées sont agrégées
+en histogrammes exposés au format texte Prometheus.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+
+from tracing_config import get_tracing_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_NAME = "dreampastry_stage_duration_seconds"
+
+_correlation_id = contextvars.ContextVar("correlation_id", default=None)
+
+
+class Histogram:
+    """Histogramme cumulatif à seaux fixes (format Prometheus)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+
+    def observe(self, value: float, error: bool = False):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        if error:
+            self.errors += 1
+
+
+class Tracer:
+    """Agrège les spans en histogrammes et conserve le détail des dernières requêtes"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, max_requests: int = 500):
+        self.buckets = buckets
+        self.max_requests = max_requests
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._requests: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+
+    def record(self, name: str, duration: float, labels: Optional[Dict[str, Any]] = None,
+               error: bool = False, started_at: Optional[float] = None):
+        """Enregistre la durée d'une étape"""
+        labels = {k: str(v) for k, v in (labels or {}).items()}
+        key = (name, tuple(sorted(labels.items())))
+        correlation_id = _correlation_id.get()
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(duration, error)
+
+            if correlation_id:
+                spans = self._requests.get(correlation_id)
+                if spans is None:
+                    spans = self._requests[correlation_id] = []
+                    while len(self._requests) > self.max_requests:
+                        self._requests.popitem(last=False)
+                spans.append({
+                    "name": name,
+                    "started_at": started_at if started_at is not None else time.time() - duration,
+                    "duration_ms": round(duration * 1000, 2),
+                    "labels": labels,
+                    "error": error,
+                })
+
+    def get_request_spans(self, correlation_id: str) -> List[Dict[str, Any]]:
+        """Retourne les spans d'une requête, dans l'ordre de démarrage"""
+        with self._lock:
+            spans = list(self._requests.get(correlation_id, []))
+        return sorted(spans, key=lambda s: s["started_at"])
+
+    def get_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Retourne nombre, somme et moyenne par étape (tous labels confondus)"""
+        summary = {}
+        with self._lock:
+            for (name, _), histogram in self._histograms.items():
+                entry = summary.setdefault(name, {"count": 0, "sum_seconds": 0.0, "errors": 0})
+                entry["count"] += histogram.count
+                entry["sum_seconds"] += histogram.sum
+                entry["errors"] += histogram.errors
+        for entry in summary.values():
+            entry["mean_ms"] = round(entry["sum_seconds"] * 1000 / entry["count"], 2) if entry["count"] else 0.0
+        return summary
+
+    def render_prometheus(self) -> str:
+        """Rend les histogrammes au format texte d'exposition Prometheus"""
+        lines = [
+            f"# HELP {METRIC_NAME} Durée des étapes du chat et de la qualification.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        errors = []
+        with self._lock:
+            items = sorted(self._histograms.items())
+            for (name, labels), histogram in items:
+                base = [("stage", name)] + list(labels)
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f"{METRIC_NAME}_bucket{{{_format_labels(base + [('le', _format_float(bound))])}}} {count}")
+                lines.append(f"{METRIC_NAME}_bucket{{{_format_labels(base + [('le', '+Inf')])}}} {histogram.count}")
+                lines.append(f"{METRIC_NAME}_sum{{{_format_labels(base)}}} {histogram.sum:.6f}")
+                lines.append(f"{METRIC_NAME}_count{{{_format_labels(base)}}} {histogram.count}")
+                errors.append(f"dreampastry_stage_errors_total{{{_format_labels(base)}}} {histogram.errors}")
+        lines.append("# HELP dreampastry_stage_errors_total Nombre d'étapes terminées en erreur.")
+        lines.append("# TYPE dreampastry_stage_errors_total counter")
+        lines.extend(errors)
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._requests.clear()
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value))
+
+
+def _format_labels(labels: List[Tuple[str, str]]) -> str:
+    escaped = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{key}="{value}"')
+    return ",".join(escaped)
+
+
+_tracer = Tracer(max_requests=get_tracing_config()["max_requests"])
+
+def get_tracer() -> Tracer:
+    """Retourne le tracer partagé du processus"""
+    return _tracer
+
+
+# ===== CORRÉLATION =====
+
+def new_correlation_id() -> str:
+    """Crée un identifiant de corrélation et l'associe au contexte courant"""
+    correlation_id = uuid.uuid4().hex[:12]
+    _correlation_id.set(correlation_id)
+    return correlation_id
+
+def get_correlation_id() -> Optional[str]:
+    """Retourne l'identifiant de corrélation de la requête en cours"""
+    return _correlation_id.get()
+
+@contextmanager
+def correlation(correlation_id: Optional[str] = None):
+    """Associe un identifiant de corrélation au bloc (nouvel identifiant par défaut)"""
+    token = _correlation_id.set(correlation_id or uuid.uuid4().hex[:12])
+    try:
+        yield _correlation_id.get()
+    finally:
+        _correlation_id.reset(token)
+
+
+# ===== SPANS =====
+
+@contextmanager
+def span(name: str, **labels):
+    """Mesure la durée du bloc sous le nom d'étape donné"""
+    if not get_tracing_config()["enabled"]:
+        yield
+        return
+    started_at = time.time()
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except GeneratorExit:
+        raise
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _tracer.record(name, time.perf_counter() - started, labels, error=error, started_at=started_at)
+
+def traced(name: str):
+    """Décorateur : mesure chaque appel de la fonction sous le nom d'étape donné"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ===== ENDPOINT PROMETHEUS =====
+
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[ThreadingHTTPServer]:
+    """Démarre (une seule fois) le serveur HTTP exposant /metrics"""
+    global _metrics_server
+    config = get_tracing_config()
+    port = config["metrics_port"] if port is None else port
+    host = config["metrics_host"] if host is None else host
+    if not port:
+        return None
+
+    with _metrics_server_lock:
+        if _metrics_server is not None:
+            return _metrics_server
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = _tracer.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            _metrics_server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            logger.warning(f"Endpoint /metrics non démarré sur le port {port}: {e}")
+            return None
+        _metrics_server.daemon_threads = True
+        threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info(f"Endpoint Prometheus disponible sur http://{host}:{port}/metrics")
+        return _metrics_server
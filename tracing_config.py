@@ -0,0 +1,19 @@
+import os
+from typing import Dict, Any
+
+# Configuration du tracing (durée des étapes)
+TRACING_CONFIG = {
+    "enabled": os.getenv("TRACING_ENABLED", "true").lower() == "true",
+    # Port de l'endpoint Prometheus (/metrics), 0 = désactivé
+    "metrics_port": int(os.getenv("METRICS_PORT", "9464")),
+    # Interface d'écoute : locale par défaut, 0.0.0.0 pour un scraper distant
+    "metrics_host": os.getenv("METRICS_HOST", "127.0.0.1"),
+    # Nombre de requêtes dont le détail des étapes est conservé en mémoire
+    "max_requests": int(os.getenv("TRACING_MAX_REQUESTS", "500")),
+    # Affiche le panneau de debug par requête dans l'interface
+    "debug_panel": os.getenv("TRACING_DEBUG_PANEL", "false").lower() == "true",
+}
+
+def get_tracing_config() -> Dict[str, Any]:
+    """Retourne la configuration du tracing"""
+    return TRACING_CONFIG
@@ -1,15 +1,83 @@
 import streamlit as st
 import os
 import re
-from langchain_ollama import ChatOllama
-from document_loader import load_documents_into_database
+from corpus_index import open_corpus
 
 from models import get_list_of_models
+from model_manager import get_model_manager, get_keep_alive
+from model_router import create_router
+from ollama_config import get_ollama_config
+from tracing import get_tracer, new_correlation_id, start_metrics_server
+from tracing_config import get_tracing_config
+from request_profiling import profile_request, describe_session_state
+from analytics_snapshot import get_analytics_snapshot_service
 
 from llm import getStreamingChain, get_fallback_answer, process_qualification_flow, detect_inscription_intent
 
-EMBEDDING_MODEL = "nomic-embed-text"
+EMBEDDING_MODEL = get_ollama_config()["embedding_model"]
+CHAT_MODEL = get_ollama_config()["chat_model"]
 PATH = "Research"
+MODEL_READY_TIMEOUT = 120
+
+
+@st.cache_resource
+def get_started_model_manager():
+    """Démarre une seule fois par processus le préchauffage des modèles Ollama"""
+    manager = get_model_manager()
+    manager.start()
+    return manager
+
+
+model_manager = get_started_model_manager()
+
+
+@st.cache_resource
+def get_metrics_server():
+    """Démarre une seule fois par processus l'endpoint Prometheus /metrics"""
+    return start_metrics_server()
+
+
+get_metrics_server()
+
+
+@st.cache_resource
+def get_analytics_snapshots():
+    """Service d'instantanés analytics partagé par toutes les sessions du processus"""
+    return get_analytics_snapshot_service()
+
+
+analytics_snapshots = get_analytics_snapshots()
+
+
+@st.cache_resource
+def get_corpus_index():
+    """
+    Index documentaire partagé par les sessions : index prébuilt déployé (index_build.py)
+    s'il y en a un, sinon indexation de Research/ tenue à jour en arrière-plan
+    """
+    return open_corpus(PATH)
+
+
+def render_debug_panel():
+    """Affiche la durée de chaque étape de la dernière requête (mode debug)"""
+    correlation_id = st.session_state.get("last_correlation_id")
+    if not get_tracing_config()["debug_panel"] or not correlation_id:
+        return
+    spans = get_tracer().get_request_spans(correlation_id)
+    with st.expander(f"🔍 Détail des étapes (requête {correlation_id})"):
+        if spans:
+            origin = spans[0]["started_at"]
+            st.table([
+                {
+                    "Étape": s["name"],
+                    "Début (ms)": round((s["started_at"] - origin) * 1000, 1),
+                    "Durée (ms)": s["duration_ms"],
+                    "Erreur": "❌" if s["error"] else "",
+                }
+                for s in spans
+            ])
+        else:
+            st.write("Aucune étape enregistrée pour cette requête.")
 
 
 st.set_page_config(
@@ -208,7 +276,7 @@ if "app_mode" not in st.session_state:
 if "documents_loaded" not in st.session_state:
     with st.spinner("Chargement des documents..."):
         try:
-            st.session_state["vectorstore"] = load_documents_into_database(EMBEDDING_MODEL, PATH)
+            st.session_state["vectorstore"] = get_corpus_index()
             st.session_state["documents_loaded"] = True
             st.success("✅ Documents chargés avec succès !")
         except Exception as e:
@@ -386,6 +454,8 @@ with tab1:
             </div>
             """, unsafe_allow_html=True)
             
+            if not model_manager.is_ready():
+                st.info("⏳ Préchauffage de l'assistant en cours, la première réponse peut prendre quelques secondes...")
             
             for message in st.session_state.messages:
                 if message["role"] == "user":
@@ -418,16 +488,23 @@ with tab1:
             
             if "pending_user_message" in st.session_state:
                 user_msg = st.session_state["pending_user_message"]
+                st.session_state["last_correlation_id"] = new_correlation_id()
                 
                 
-                with st.spinner("🧁 L'assistant réfléchit à votre question..."):
+                with st.spinner("🧁 L'assistant réfléchit à votre question..."), \
+                        profile_request("chat", lambda: describe_session_state(st.session_state)):
                     try:
                         if detect_inscription_intent(user_msg):
                             st.session_state["app_mode"] = "qualification"
                             del st.session_state["pending_user_message"]
                             st.rerun()
                         else:
-                            llm = ChatOllama(model="gemma3:4b")
+                            if not model_manager.is_ready():
+                                model_manager.wait_until_ready(MODEL_READY_TIMEOUT)
+                            for model in model_manager.chat_models + [EMBEDDING_MODEL]:
+                                model_manager.touch(model)
+                            # Petit modèle pour la reformulation et les questions simples (model_router.py)
+                            llm = create_router(model_manager, keep_alive=get_keep_alive())
                             db = st.session_state.get("vectorstore")
 
                             
@@ -436,7 +513,8 @@ with tab1:
                                 response = fallback_answer
                             else:
                                 
-                                chain = getStreamingChain(user_msg, st.session_state.messages, llm, db)
+                                # Question déjà comptée comme non répondue par get_fallback_answer
+                                chain = getStreamingChain(user_msg, st.session_state.messages, llm, db, track_unanswered=False)
                                 response = ""
                                 placeholder = st.empty()
                                 for chunk in chain:
@@ -474,6 +552,8 @@ with tab1:
                 if "pending_user_message" in st.session_state:
                     del st.session_state["pending_user_message"]
 
+            render_debug_panel()
+
         
         elif st.session_state["app_mode"] == "qualification":
             
@@ -518,7 +598,9 @@ with tab1:
                 """, unsafe_allow_html=True)
 
                 
-                with st.spinner("🎯 Évaluation de votre réponse en cours..."):
+                st.session_state["last_correlation_id"] = new_correlation_id()
+                with st.spinner("🎯 Évaluation de votre réponse en cours..."), \
+                        profile_request("qualification", lambda: describe_session_state(st.session_state)):
                     try:
                         final_response, email_sent, qualification_completee = process_qualification_flow(
                             st.session_state["client_info"],
@@ -590,6 +672,8 @@ with tab1:
                         """, unsafe_allow_html=True)
                         st.session_state["qualification_messages"].append({"role": "assistant", "content": error_msg})
 
+            render_debug_panel()
+
 # ===== ONGLET 2: DASHBOARD ANALYTICS =====
 with tab2:
     
@@ -618,15 +702,20 @@ with tab2:
                            help="Sélectionnez la période d'analyse des données")
     with col2:
         if st.button("🔄 Actualiser les données", type="secondary", use_container_width=True):
+            with st.spinner("Recalcul des métriques..."):
+                analytics_snapshots.refresh_now()
             st.rerun()
     
     try:
-        from database_service import get_database_service
-        db = get_database_service()
+        snapshot = analytics_snapshots.get_snapshot(days)
         
-        if db.connect():
-            metrics = db.get_analytics_metrics(days)
-            db.disconnect()
+        if snapshot is not None:
+            metrics = snapshot["metrics"]
+            age_minutes = int(snapshot["age_seconds"] // 60)
+            st.caption(f"🕒 Données calculées il y a {age_minutes} min "
+                       f"(actualisation automatique toutes les {analytics_snapshots.refresh_interval // 60} min)")
+            if snapshot["stale"]:
+                st.warning(f"⚠️ Données périmées : le dernier recalcul a échoué ({snapshot['error'] or 'raison inconnue'})")
             
             if metrics and any(metrics.values()):
                 
@@ -781,8 +870,25 @@ with tab2:
                 st.markdown("---")
                 st.subheader("❓ Top Questions Non Répondues")
                 
+                clusters = metrics.get('top_unanswered_clusters', [])
                 unanswered = metrics.get('top_unanswered_questions', [])
-                if unanswered:
+                if clusters:
+                    st.write("Questions fréquemment posées mais non couvertes dans la FAQ (regroupées par similarité) :")
+
+                    for i, cluster in enumerate(clusters, 1):
+                        with st.expander(f"#{i} - {cluster['representative_text'][:100]} ({cluster['total_frequency']} fois)"):
+                            st.write(f"**Question représentative:** {cluster['representative_text']}")
+                            st.write(f"**Fréquence totale:** {cluster['total_frequency']} fois, "
+                                     f"{cluster['question_count']} formulation(s)")
+                            st.write(f"**Dernière fois:** {cluster['last_seen']}")
+                            if cluster['sample_questions']:
+                                st.write("**Formulations les plus fréquentes:**")
+                                for sample in cluster['sample_questions']:
+                                    st.write(f"- {sample}")
+
+                            if st.button(f"📝 Ajouter à la FAQ", key=f"add_faq_cluster_{cluster['id']}"):
+                                st.success("✅ Question ajoutée à la liste d'amélioration de la FAQ")
+                elif unanswered:
                     st.write("Ces questions sont fréquemment posées mais non couvertes dans la FAQ :")
                     
                     for i, q in enumerate(unanswered, 1):
@@ -826,8 +932,10 @@ with tab2:
             else:
                 st.warning("⚠️ Aucune donnée analytics disponible pour cette période")
                 
+        elif analytics_snapshots.last_error():
+            st.error(f"❌ {analytics_snapshots.last_error()}")
         else:
-            st.error("❌ Impossible de se connecter à la base de données")
+            st.info("⏳ Calcul des métriques en cours, réessayez dans quelques secondes...")
             
     except Exception as e:
         st.error(f"❌ Erreur lors du chargement des analytics: {str(e)}")
@@ -0,0 +1,127 @@
+import atexit
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from analytics_config import get_analytics_config
+from text_normalization import question_hash
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class UnansweredQuestionAggregator:
+    """
+    Compte en mémoire les questions non répondues (clé = hash du texte normalisé) et
+    écrit périodiquement les incréments en base en une seule requête groupée.
+    """
+
+    def __init__(self, flush_interval: Optional[int] = None, max_pending: Optional[int] = None, db_factory=None):
+        config = get_analytics_config()
+        self.flush_interval = flush_interval or config["unanswered_flush_interval_seconds"]
+        self.max_pending = max_pending or config["unanswered_max_pending"]
+        self._db_factory = db_factory
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, List] = {}
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Démarre le thread de vidage périodique"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="unanswered-questions", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Arrête le thread et écrit les compteurs restants"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def record(self, question: str):
+        """Compte une occurrence de la question (aucune requête SQL)"""
+        key = question_hash(question)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = [question.strip(), 1]
+            else:
+                entry[1] += 1
+            should_flush = len(self._pending) >= self.max_pending
+        if should_flush:
+            self._wake_event.set()
+
+    def pending(self) -> Dict[str, Tuple[str, int]]:
+        """Compteurs en attente d'écriture"""
+        with self._lock:
+            return {key: (text, count) for key, (text, count) in self._pending.items()}
+
+    def flush(self) -> int:
+        """
+        Écrit les compteurs accumulés en base
+
+        Returns:
+            int: Nombre de questions distinctes écrites (0 si rien à écrire ou en cas d'échec)
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            rows = [(key, text, count) for key, (text, count) in batch.items()]
+            written = False
+            db = None
+            try:
+                db = self._get_db()
+                written = db.connect() and db.upsert_unanswered_questions(rows)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'écriture des questions non répondues: {e}")
+            finally:
+                if db is not None:
+                    try:
+                        db.disconnect()
+                    except Exception as e:
+                        logger.warning(f"Déconnexion impossible après l'écriture des questions non répondues: {e}")
+                if not written:
+                    # Les compteurs sont réintégrés pour le prochain vidage
+                    with self._lock:
+                        for key, text, count in rows:
+                            entry = self._pending.setdefault(key, [text, 0])
+                            entry[1] += count
+            return len(rows) if written else 0
+
+    def _get_db(self):
+        if self._db_factory:
+            return self._db_factory()
+        from database_service import get_database_service
+        return get_database_service()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.flush_interval)
+            self._wake_event.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Erreur lors de l'écriture des questions non répondues: {e}")
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+def get_unanswered_aggregator() -> UnansweredQuestionAggregator:
+    """Retourne l'agrégateur partagé (démarré au premier appel, vidé à l'arrêt du processus)"""
+    global _aggregator
+    with _aggregator_lock:
+        if _aggregator is None:
+            _aggregator = UnansweredQuestionAggregator()
+            _aggregator.start()
+            atexit.register(_aggregator.stop)
+        return _aggregator